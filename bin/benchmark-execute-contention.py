@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""Benchmark concurrent workflow submissions against a scratch database.
+
+Intended to be run against the local postgres from the docker compose
+environment, with the `.env` file sourced. Runs the API's execute
+statement (payload lock, cache lookup, payload_cache upsert, action
+insert) for `--submissions` payloads at once, for each writer pool size,
+comparing the 64-bit payload lock key with also taking the previous 16-bit
+one, as during a rolling upgrade. `--io-latency` simulates the input
+upload made inside the transaction.
+
+Workloads:
+  distinct   every submission has its own payload
+  identical  every submission has the same payload
+  mixed      submissions draw from a pool of 100 payloads
+
+    ./bin/benchmark-execute-contention.py --connections 1 4 16 --io-latency 20
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from types import SimpleNamespace
+
+import asyncpg
+from swoop.db import SwoopDB
+
+from swoop.api.submissions import submit_workflow_query
+
+DB_NAME = "swoop_bench_execute"
+
+# the attributes of a workflow the execute statement uses
+WORKFLOW = SimpleNamespace(
+    id="mirror",
+    version=1,
+    handler="handler",
+    handlerType="argoWorkflow",
+)
+
+# whether to take the legacy lock as well
+LOCKS = {
+    "64-bit": False,
+    "16+64": True,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--connections",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16],
+        help="writer pool sizes to test",
+    )
+    parser.add_argument(
+        "--submissions",
+        type=int,
+        default=2000,
+        help="number of concurrent submissions per run",
+    )
+    parser.add_argument(
+        "--io-latency",
+        type=float,
+        default=10,
+        help="simulated input upload time inside the transaction, in ms",
+    )
+    parser.add_argument(
+        "--workloads",
+        nargs="+",
+        default=["distinct", "identical", "mixed"],
+        choices=["distinct", "identical", "mixed"],
+    )
+    return parser.parse_args()
+
+
+def payloads(workload: str, count: int) -> list[uuid.UUID]:
+    def payload(i):
+        return uuid.uuid5(uuid.NAMESPACE_OID, f"{time.time_ns()}-{i}")
+
+    if workload == "distinct":
+        return [payload(i) for i in range(count)]
+    if workload == "identical":
+        return [payload(0)] * count
+    distinct = [payload(i) for i in range(100)]
+    return [random.choice(distinct) for _ in range(count)]
+
+
+async def submit(pool, legacy_lock, payload_uuid, io_latency) -> bool:
+    q, p = submit_workflow_query(WORKFLOW, payload_uuid, legacy_lock)
+    async with pool.acquire() as conn, conn.transaction():
+        record = await conn.fetchrow(q, *p)
+        if record["cached"]:
+            return False
+        await asyncio.sleep(io_latency / 1000)
+        return True
+
+
+async def run(args):
+    swoopdb = SwoopDB()
+    await swoopdb.create_database(DB_NAME)
+    try:
+        async with swoopdb.get_db_connection(database=DB_NAME) as conn:
+            await swoopdb.load_schema(conn=conn)
+
+        print(
+            f"{'workload':<10} {'lock':<7} {'conns':>5} "
+            f"{'created':>8} {'seconds':>8} {'subs/s':>8}"
+        )
+        for workload in args.workloads:
+            for name, lock in LOCKS.items():
+                for connections in args.connections:
+                    batch = payloads(workload, args.submissions)
+                    async with asyncpg.create_pool(
+                        database=DB_NAME,
+                        min_size=connections,
+                        max_size=connections,
+                    ) as pool:
+                        start = time.perf_counter()
+                        created = await asyncio.gather(
+                            *[
+                                submit(pool, lock, payload_uuid, args.io_latency)
+                                for payload_uuid in batch
+                            ]
+                        )
+                        elapsed = time.perf_counter() - start
+                    print(
+                        f"{workload:<10} {name:<7} {connections:>5} "
+                        f"{sum(created):>8} {elapsed:>8.2f} "
+                        f"{len(batch) / elapsed:>8.0f}"
+                    )
+    finally:
+        await swoopdb.drop_database(DB_NAME)
+
+
+def main():
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
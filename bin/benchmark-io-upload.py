@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Benchmark object uploads against the configured object store.
+
+Intended to be run against the local MinIO from the docker compose
+environment, with the `.env` file sourced. Uploads objects of each size
+with each part size and concurrency combination, reporting throughput.
+
+    ./bin/benchmark-io-upload.py --sizes 10 100 1000 --concurrency 1 4 8
+"""
+
+import argparse
+import os
+import time
+
+from swoop.api.config import Settings
+from swoop.api.io import S3IOClient
+
+MiB = 1024 * 1024
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+        help="object sizes to upload, in MiB",
+    )
+    parser.add_argument(
+        "--part-sizes",
+        type=int,
+        nargs="+",
+        default=[16],
+        help="multipart part sizes to test, in MiB",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 4, 8],
+        help="numbers of parallel part uploads to test",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="number of uploads per combination",
+    )
+    parser.add_argument(
+        "--bucket",
+        default=None,
+        help="bucket to upload to (defaults to SWOOP_BUCKET_NAME + '-bench')",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    settings = Settings()
+    bucket = args.bucket or f"{settings.bucket_name}-bench"
+
+    print(f"{'size':>8} {'part':>6} {'conc':>5} {'best s':>8} {'MiB/s':>8}")
+
+    for size in args.sizes:
+        content = os.urandom(size * MiB)
+        for part_size in args.part_sizes:
+            for concurrency in args.concurrency:
+                ioclient = S3IOClient(
+                    bucket,
+                    settings.s3_endpoint,
+                    upload_part_size=part_size * MiB,
+                    upload_concurrency=concurrency,
+                )
+                timings = []
+                for i in range(args.repeat):
+                    start = time.perf_counter()
+                    ioclient.put_object(
+                        f"bench/{size}-{part_size}-{concurrency}-{i}",
+                        content,
+                        content_type="application/octet-stream",
+                    )
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+                print(
+                    f"{size:>6}Mi {part_size:>4}Mi {concurrency:>5} "
+                    f"{best:>8.3f} {size / best:>8.1f}"
+                )
+                ioclient.delete_objects(prefix="bench/")
+
+    S3IOClient(bucket, settings.s3_endpoint).delete_bucket()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+"""Benchmark the job listing query against a seeded database.
+
+Intended to be run against the local postgres from the docker compose
+environment, with the `.env` file sourced. Creates a scratch database,
+seeds it with `--rows` workflow actions (and their threads) spread over
+the last 60 days with a mix of statuses, then times the job listing
+query for a set of filter combinations, comparing the query builder
+against the previous catch-all query.
+
+    ./bin/benchmark-jobs-query.py --rows 2000000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import asyncpg
+from buildpg import V, funcs, render
+from swoop.db import SwoopDB
+
+from swoop.api.models.jobs import SwoopStatusCode
+from swoop.api.queries.jobs import JobFilter, list_jobs_query
+
+DB_NAME = "swoop_bench_jobs"
+LIMIT = 1000
+
+SEED_PAYLOADS = """
+INSERT INTO swoop.payload_cache (payload_uuid, workflow_name)
+SELECT unnest($1::uuid[]), 'bench'
+"""
+
+SEED_ACTIONS = """
+INSERT INTO swoop.action (
+    action_uuid,
+    action_type,
+    action_name,
+    handler_name,
+    handler_type,
+    payload_uuid,
+    workflow_version,
+    created_at
+)
+SELECT
+    gen_uuid_v7(s.ts),
+    'workflow',
+    'workflow_' || (s.i % 20),
+    'handler_' || (s.i % 3),
+    'argo-workflow',
+    ($2::uuid[])[1 + s.i % array_length($2::uuid[], 1)],
+    1,
+    s.ts
+FROM (
+    SELECT i, now() - random() * interval '60 days' AS ts
+    FROM generate_series(1, $1::integer) AS i
+) AS s
+"""
+
+# assigns statuses directly, skipping the event machinery, as only the
+# resulting thread state matters for the listing query
+SEED_STATUSES = """
+UPDATE swoop.thread SET
+    status = (
+        ARRAY[
+            'PENDING', 'QUEUED', 'RUNNING', 'SUCCESSFUL', 'FAILED', 'CANCELED'
+        ]
+    )[1 + floor(random() * 6)::integer],
+    started_at = created_at + random() * interval '10 minutes',
+    last_update = created_at + interval '10 minutes' + random() * interval '2 hours'
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=2_000_000,
+        help="number of workflow actions to seed",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=10,
+        help="number of executions per query",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="keep (and reuse) the seeded database",
+    )
+    return parser.parse_args()
+
+
+def legacy_query(f: JobFilter, limit: int):
+    """The catch-all job listing query the query builder replaced."""
+    return render(
+        """
+        WITH jobs AS (
+            SELECT
+                a.action_name,
+                a.action_uuid,
+                a.handler_type,
+                t.status AS status,
+                t.created_at,
+                t.last_update,
+                a.payload_uuid,
+                t.started_at,
+                CASE
+                    WHEN t.status = 'RUNNING'
+                        THEN EXTRACT(EPOCH FROM (NOW() - t.started_at))
+                    WHEN :completed_where
+                        THEN EXTRACT(EPOCH FROM (t.last_update - t.started_at))
+                END AS duration
+            FROM swoop.action a
+            INNER JOIN swoop.thread t
+            ON t.action_uuid = a.action_uuid
+            WHERE a.action_type = 'workflow'
+            AND (:processes::text[] IS NULL OR :proc_where)
+            AND (:types::text[] IS NULL OR :type_where)
+            AND (:jobs::uuid[] IS NULL OR :job_where)
+            AND (:status::text[] IS NULL OR :status_where)
+            AND (:swoop_status::text[] IS NULL OR :swoop_status_where)
+            AND (
+                (a.created_at >= :start::TIMESTAMPTZ OR :start::TIMESTAMPTZ IS NULL)
+                AND (a.created_at <= :end::TIMESTAMPTZ OR :end::TIMESTAMPTZ IS NULL)
+            )
+            AND (a.created_at = :dt::TIMESTAMPTZ OR :dt::TIMESTAMPTZ IS NULL)
+        )
+        SELECT *
+        FROM jobs
+        WHERE (
+            (
+                duration IS NOT NULL
+                AND (duration >= :min::integer OR :min::integer IS NULL)
+                AND (duration <= :max::integer OR :max::integer IS NULL)
+                AND (
+                    CASE
+                        WHEN :status::text[] IS NULL AND
+                            (:min::integer IS NOT NULL OR :max::integer IS NOT NULL)
+                        THEN :dur_status_where ELSE TRUE
+                    END
+                )
+            )
+            OR (
+                CASE
+                    WHEN duration IS NULL AND
+                        (:min::integer IS NOT NULL OR :max::integer IS NOT NULL)
+                    THEN :dur_status_where
+                END
+            )
+            OR (
+                duration IS NULL
+                AND (:min::integer IS NULL AND :max::integer IS NULL)
+            )
+        )
+        ORDER BY action_uuid DESC
+        LIMIT :limit
+        """,
+        processes=f.processes,
+        proc_where=V("a.action_name") == funcs.any(f.processes),
+        types=f.types,
+        type_where=V("a.handler_type") == funcs.any(f.types),
+        jobs=f.jobs,
+        job_where=V("a.action_uuid") == funcs.any(f.jobs),
+        status=f.statuses,
+        status_where=V("t.status") == funcs.any(f.statuses),
+        swoop_status=f.swoop_statuses,
+        swoop_status_where=V("t.status") == funcs.any(f.swoop_statuses),
+        dur_status_where=V("status")
+        == funcs.any([s.value for s in SwoopStatusCode.duration_states()]),
+        completed_where=V("t.status")
+        == funcs.any([s.value for s in SwoopStatusCode.terminal_states()]),
+        start=f.start,
+        end=f.end,
+        dt=f.dt,
+        min=f.min_duration,
+        max=f.max_duration,
+        limit=limit,
+    )
+
+
+def scenarios():
+    now = datetime.now(tz=UTC)
+    return {
+        "unfiltered": JobFilter(),
+        "process": JobFilter(processes=["workflow_3"]),
+        "status": JobFilter(statuses=["RUNNING"]),
+        "last day": JobFilter(start=now - timedelta(days=1), end=now),
+        "process + week": JobFilter(
+            processes=["workflow_3"],
+            start=now - timedelta(days=7),
+            end=now,
+        ),
+        "min duration": JobFilter(min_duration=3600),
+        "duration range + day": JobFilter(
+            min_duration=600,
+            max_duration=3600,
+            start=now - timedelta(days=1),
+            end=now,
+        ),
+    }
+
+
+async def seed(conn, rows):
+    payloads = [uuid.uuid5(uuid.NAMESPACE_OID, str(i)) for i in range(1000)]
+    await conn.execute(SEED_PAYLOADS, payloads)
+    await conn.execute(SEED_ACTIONS, rows, payloads)
+    await conn.execute(SEED_STATUSES)
+    await conn.execute("ANALYZE")
+
+
+async def timed(conn, q, p, repeat):
+    # first execution prepares the statement and warms the cache
+    await conn.fetch(q, *p)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await conn.fetch(q, *p)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+async def run(args):
+    swoopdb = SwoopDB()
+    async with swoopdb.get_db_connection() as conn:
+        exists = await conn.fetchval(
+            "SELECT true FROM pg_database WHERE datname = $1",
+            DB_NAME,
+        )
+
+    if not (exists and args.keep):
+        if exists:
+            await swoopdb.drop_database(DB_NAME)
+        await swoopdb.create_database(DB_NAME)
+        async with swoopdb.get_db_connection(database=DB_NAME) as conn:
+            await swoopdb.load_schema(conn=conn)
+            start = time.perf_counter()
+            await seed(conn, args.rows)
+            print(f"seeded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+    try:
+        conn = await asyncpg.connect(database=DB_NAME)
+        print(f"{'scenario':<24} {'legacy ms':>10} {'builder ms':>11}")
+        for name, job_filter in scenarios().items():
+            legacy = await timed(conn, *legacy_query(job_filter, LIMIT), args.repeat)
+            builder = await timed(
+                conn,
+                *list_jobs_query(job_filter, limit=LIMIT),
+                args.repeat,
+            )
+            print(f"{name:<24} {legacy:>10.1f} {builder:>11.1f}")
+        await conn.close()
+    finally:
+        if not args.keep:
+            await swoopdb.drop_database(DB_NAME)
+
+
+def main():
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
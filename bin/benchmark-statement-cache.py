@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""Benchmark query throughput with and without asyncpg's statement cache.
+
+Intended to be run against the local postgres from the docker compose
+environment, with the `.env` file sourced, or through a PgBouncer in
+transaction mode in front of it with `--host`. Creates a scratch database
+seeded with `--rows` workflow actions, then runs `--queries` job lookups
+and job listings, each on a connection acquired from the pool as a request
+would, for each pool configuration:
+
+  cached    asyncpg's default statement cache, for direct or session
+            pooled connections
+  uncached  no statement cache, so every query is prepared again
+  pooler    the API's pooler mode: no statement cache, process unique
+            statement names and no connection reset on release
+
+The cached configuration needs a session of its own, so leave it out with
+`--configs` when going through PgBouncer, and compare its direct numbers
+with pooler mode through PgBouncer to see the tradeoff.
+
+    ./bin/benchmark-statement-cache.py --connections 4 16 --queries 20000
+    ./bin/benchmark-statement-cache.py --host pgbouncer --configs pooler
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import asyncpg
+from swoop.db import SwoopDB
+
+from swoop.api.config import Settings
+from swoop.api.db import pool_options
+from swoop.api.queries.jobs import JobFilter, list_jobs_query
+
+DB_NAME = "swoop_bench_statements"
+
+SEED_PAYLOAD = """
+INSERT INTO swoop.payload_cache (payload_uuid, workflow_name)
+VALUES ($1, 'bench')
+"""
+
+SEED_ACTIONS = """
+INSERT INTO swoop.action (
+    action_type,
+    action_name,
+    handler_name,
+    handler_type,
+    payload_uuid,
+    workflow_version
+)
+SELECT 'workflow', 'workflow_' || (i % 20), 'handler', 'argo-workflow', $2, 1
+FROM generate_series(1, $1::integer) AS i
+"""
+
+FETCH_JOB = """
+SELECT a.action_uuid, a.action_name, t.status, t.created_at, t.last_update
+FROM swoop.action a
+JOIN swoop.thread t ON t.action_uuid = a.action_uuid
+WHERE a.action_uuid = $1
+"""
+
+CONFIGURATIONS = {
+    "cached": {"db_statement_cache_size": 100},
+    "uncached": {"db_statement_cache_size": 0},
+    "pooler": {"db_pooler_mode": True},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--host",
+        help="host to run the queries through, defaulting to PGHOST",
+    )
+    parser.add_argument(
+        "--connections",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16],
+        help="pool sizes to test",
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=10000,
+        help="number of queries per run",
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=10000,
+        help="number of workflow actions to seed",
+    )
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=list(CONFIGURATIONS),
+        choices=list(CONFIGURATIONS),
+    )
+    return parser.parse_args()
+
+
+async def query(pool, action_uuid, job_list) -> float:
+    start = time.perf_counter()
+    async with pool.acquire() as conn:
+        if action_uuid is not None:
+            await conn.fetchrow(FETCH_JOB, action_uuid)
+        else:
+            await conn.fetch(*job_list)
+    return time.perf_counter() - start
+
+
+async def run(args):
+    swoopdb = SwoopDB()
+    await swoopdb.create_database(DB_NAME)
+    try:
+        async with swoopdb.get_db_connection(database=DB_NAME) as conn:
+            await swoopdb.load_schema(conn=conn)
+            payload_uuid = uuid.uuid4()
+            await conn.execute(SEED_PAYLOAD, payload_uuid)
+            await conn.execute(SEED_ACTIONS, args.rows, payload_uuid)
+            await conn.execute("ANALYZE")
+            jobs = [
+                r[0] for r in await conn.fetch("SELECT action_uuid FROM swoop.action")
+            ]
+
+        q, p = list_jobs_query(JobFilter(processes=["workflow_3"]), limit=10)
+        # one job listing to every nine lookups
+        work = [
+            None if i % 10 == 0 else jobs[i % len(jobs)] for i in range(args.queries)
+        ]
+
+        print(
+            f"{'config':<9} {'conns':>5} {'seconds':>8} {'queries/s':>10} "
+            f"{'p50 ms':>7} {'p99 ms':>7}"
+        )
+        for connections in args.connections:
+            for name in args.configs:
+                settings = Settings().model_copy(
+                    update={
+                        "db_name": DB_NAME,
+                        "db_min_conn_size": connections,
+                        "db_max_conn_size": connections,
+                        **CONFIGURATIONS[name],
+                    }
+                )
+                async with asyncpg.create_pool(
+                    **pool_options(args.host, settings)
+                ) as pool:
+                    start = time.perf_counter()
+                    latencies = await asyncio.gather(
+                        *[query(pool, action_uuid, (q, *p)) for action_uuid in work]
+                    )
+                    elapsed = time.perf_counter() - start
+                quantiles = statistics.quantiles(latencies, n=100)
+                print(
+                    f"{name:<9} {connections:>5} {elapsed:>8.2f} "
+                    f"{len(work) / elapsed:>10.0f} "
+                    f"{quantiles[49] * 1000:>7.1f} {quantiles[98] * 1000:>7.1f}"
+                )
+    finally:
+        await swoopdb.drop_database(DB_NAME)
+
+
+def main():
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+from uuid import UUID
+
+import asyncpg
+
+from swoop.api.models.jobs import SwoopStatusCode
+from swoop.api.notifications import JobEventHub
+from swoop.api.queries.jobs import JobFilter
+from swoop.api.ttlcache import MISSING, TTLCache
+
+logger = logging.getLogger(__name__)
+
+# statuses from which an action stops being returned for its payload by
+# swoop.find_cached_action_for_payload
+UNCACHED_STATES = [
+    SwoopStatusCode.failed.value,
+    SwoopStatusCode.canceled.value,
+    SwoopStatusCode.timed_out.value,
+    SwoopStatusCode.retries_exhausted.value,
+    SwoopStatusCode.unknown.value,
+]
+
+
+class PayloadActionCache:
+    """
+    Per-process cache of the action a payload submission resolves to.
+
+    Maps a payload UUID and workflow version to the action returned by the
+    last submission of that payload, so repeat submissions can be
+    redirected without going to the database. Entries are dropped when:
+
+    - the payload cache entry is invalidated by any API process, which
+      notifies `channel`;
+    - the action moves to a status it would no longer be returned from,
+      as seen on the job event hub;
+    - they are older than `ttl` seconds.
+
+    The ttl bounds how stale an entry can get when a notification is
+    missed, for instance while the listening connection is reconnecting,
+    or when an invalidation time is set in the future.
+    """
+
+    def __init__(
+        self,
+        hub: JobEventHub,
+        channel: str,
+        ttl: float,
+        maxsize: int,
+    ) -> None:
+        self.hub = hub
+        self.channel = channel
+        self._cache = TTLCache(ttl, maxsize)
+        self._invalidations = 0
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def from_settings(cls, hub: JobEventHub, settings) -> PayloadActionCache:
+        return cls(
+            hub,
+            channel=settings.payload_cache_channel,
+            ttl=settings.payload_action_cache_ttl,
+            maxsize=settings.payload_action_cache_size,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.ttl > 0
+
+    def stats(self) -> dict[str, Any]:
+        stats = self._cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "hit_ratio": stats["hits"] / lookups if lookups else 0.0,
+            "invalidations": self._invalidations,
+        }
+
+    def register_metrics(self, metrics) -> None:
+        metrics.register("payload_action_cache", self.stats)
+
+    def get(self, payload_uuid: UUID, workflow_version: int) -> UUID | None:
+        if not self.enabled:
+            return None
+        entry = self._cache.get(payload_uuid)
+        if entry is MISSING or entry[0] != workflow_version:
+            return None
+        return entry[1]
+
+    def token(self) -> int:
+        """Taken before a lookup, and passed to `set` with its result."""
+        return self._invalidations
+
+    def set(
+        self,
+        payload_uuid: UUID,
+        workflow_version: int,
+        action_uuid: UUID,
+        token: int,
+    ) -> None:
+        # a lookup that raced an invalidation may have read the old action
+        if token != self._invalidations:
+            return
+        self._cache.set(payload_uuid, (workflow_version, action_uuid))
+
+    def invalidate(self, payload_uuid: UUID) -> None:
+        self._invalidations += 1
+        self._cache.pop(payload_uuid)
+
+    def clear(self) -> None:
+        self._invalidations += 1
+        self._cache.clear()
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        await self.hub.listen(self.channel, self._on_notification)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notification(self, conn, pid, channel, payload) -> None:
+        try:
+            self.invalidate(UUID(payload))
+        except ValueError:
+            self.clear()
+
+    async def _run(self) -> None:
+        job_filter = JobFilter(swoop_statuses=UNCACHED_STATES)
+        while True:
+            try:
+                subscription = await self.hub.subscribe(job_filter)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.exception("Failed to subscribe to job events")
+                await asyncio.sleep(self.hub.poll_interval)
+                continue
+
+            try:
+                while True:
+                    record = await subscription.queue.get()
+                    self.invalidate(record["payload_uuid"])
+                    if subscription.overflowed:
+                        # changes were dropped, so any entry may be stale
+                        self.clear()
+                        subscription.reset()
+            finally:
+                self.hub.unsubscribe(subscription)
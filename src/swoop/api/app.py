@@ -1,36 +1,79 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.responses import JSONResponse
 from jsonschema import ValidationError
 
+from swoop.api.action_cache import PayloadActionCache
 from swoop.api.config import Settings
-from swoop.api.db import close_db_connection, connect_to_db
-from swoop.api.exceptions import HTTPException
+from swoop.api.db import close_db_connection, connect_to_db, set_acquire_timeout
+from swoop.api.exceptions import DatabaseBusyError, HTTPException
 from swoop.api.io import IOClient
+from swoop.api.metrics import Metrics
+from swoop.api.notifications import JobEventHub
 from swoop.api.routers import jobs, payloads, processes, root
+from swoop.api.submissions import SingleFlight, SubmissionQueue
+from swoop.api.ttlcache import TTLCache
 from swoop.api.workflows import init_workflows_config
 
 
 def get_app() -> FastAPI:
     app: FastAPI = FastAPI(
         title="swoop-api",
+        dependencies=[Depends(set_acquire_timeout)],
     )
 
     app.state.settings = Settings()
+    app.state.metrics = Metrics()
+    app.state.job_facets_cache = TTLCache(app.state.settings.job_facets_cache_ttl)
+    app.state.analytics_cache = TTLCache(app.state.settings.analytics_cache_ttl)
 
     @app.on_event("startup")
     async def startup_event():
         """Connect to database on startup."""
-        app.state.io = IOClient(
-            app.state.settings.bucket_name,
-            app.state.settings.s3_endpoint,
-        )
+        app.state.io = IOClient.from_settings(app.state.settings)
+        app.state.io.register_metrics(app.state.metrics)
         init_workflows_config(app)
         await connect_to_db(app)
+        app.state.db.register_metrics(app.state.metrics)
+        app.state.writepool.register_metrics(app.state.metrics, "db_writepool")
+        app.state.job_events = JobEventHub.from_settings(app.state.settings)
+        app.state.job_events.register_metrics(app.state.metrics)
+        app.state.job_loader = jobs.JobLoader.from_settings(
+            app.state.readpool,
+            app.state.settings,
+        )
+        app.state.job_loader.register_metrics(app.state.metrics)
+        app.state.payload_action_cache = PayloadActionCache.from_settings(
+            app.state.job_events,
+            app.state.settings,
+        )
+        app.state.payload_action_cache.register_metrics(app.state.metrics)
+        await app.state.payload_action_cache.start()
+        app.state.submission_flights = SingleFlight()
+        app.state.submission_flights.register_metrics(
+            app.state.metrics,
+            "submission_flights",
+        )
+        app.state.submission_queue = None
+        if app.state.settings.execution_queue_enabled:
+            app.state.submission_queue = SubmissionQueue.from_settings(
+                app.state.writepool,
+                app.state.io,
+                app.state.settings,
+                # so callers can hand clients the batch's commit position
+                after_commit=app.state.db.commit_lsn,
+            )
+            app.state.submission_queue.register_metrics(app.state.metrics)
 
     @app.on_event("shutdown")
     async def shutdown_event():
         """Close database connection."""
+        if app.state.submission_queue is not None:
+            await app.state.submission_queue.close()
+        await app.state.payload_action_cache.stop()
+        await app.state.job_loader.close()
+        await app.state.job_events.stop()
         await close_db_connection(app)
+        app.state.io.close()
 
     app.include_router(
         root.router,
@@ -52,6 +95,14 @@ def get_app() -> FastAPI:
     async def swoop_http_exception_handler(request: Request, exc: HTTPException):
         return exc.to_json()
 
+    @app.exception_handler(DatabaseBusyError)
+    async def database_busy_exception_handler(request: Request, exc: DatabaseBusyError):
+        return HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(app.state.settings.db_retry_after)},
+        ).to_json()
+
     @app.exception_handler(ValidationError)
     async def validation_exception_handler(request: Request, exc: ValidationError):
         status = 422
@@ -1,6 +1,7 @@
 from pathlib import Path
+from typing import Literal
 
-from pydantic import Field
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -22,8 +23,22 @@ class Settings(BaseSettings):
     # Only the reader host is required to be set. If the writer host is
     # unspecified only one connection pool will be created, and it will be
     # shared for both reads and writes.
+    #
+    # With a separate reader, responses to writes carry the writer's commit
+    # position in the `Swoop-Commit-LSN` header and cookie. Reads sending it
+    # back go to a reader that has replayed that far, or to the writer if
+    # none has, so clients always see their own writes.
+    #
+    # The reader host may be a comma-separated list of hosts. Reads are
+    # then balanced across them by measured latency and busy connections.
+    # Each host is pinged every `db_reader_health_interval` seconds, and
+    # one failing `db_reader_eject_after` pings or connections in a row
+    # gets no reads until a ping succeeds again. Without a writer host, the
+    # first reader host takes the writes.
     db_reader_host: str | None = None
     db_writer_host: str | None = None
+    db_reader_health_interval: float = Field(5, gt=0)
+    db_reader_eject_after: int = Field(3, ge=1)
 
     # DATABASE NAME SETTING
     #
@@ -32,12 +47,204 @@ class Settings(BaseSettings):
     # overriding during tests.
     db_name: str | None = Field(..., alias="PGDATABASE")
 
+    # DATABASE POOL SETTINGS
+    #
+    # Each pool hands out between `db_min_conn_size` and `db_max_conn_size`
+    # connections at once. The limit grows by one whenever a request waits
+    # longer than `db_pool_target_wait` seconds for a connection, and
+    # shrinks by one after `db_pool_adjust_interval` seconds in which under
+    # half of it was used. Idle connections are closed after
+    # `db_max_inactive_conn_lifetime` seconds.
+    #
+    # Requests wait at most `db_acquire_timeout` seconds for a connection,
+    # or as set per route name in `db_acquire_timeouts`, and otherwise get a
+    # 503 response asking them to retry after `db_retry_after` seconds.
     db_min_conn_size: int = 2
-    db_max_conn_size: int = 2
+    db_max_conn_size: int = 10
     db_max_queries: int = 50000
     db_max_inactive_conn_lifetime: float = 300
+    db_pool_target_wait: float = Field(0.01, ge=0)
+    db_pool_adjust_interval: float = Field(10, gt=0)
+    db_acquire_timeout: float = Field(5, gt=0)
+    db_acquire_timeouts: dict[str, float] = {}
+    db_retry_after: int = Field(1, ge=0)
+
+    # EXTERNAL POOLER SETTINGS
+    #
+    # Enable `db_pooler_mode` when the database hosts are reached through a
+    # pooler in transaction mode, such as PgBouncer, which may run each
+    # transaction on a different server connection. asyncpg's statement
+    # cache is then disabled, statement names are made unique to the
+    # process, and connections are not reset on release. With PgBouncer
+    # 1.21 or later and `max_prepared_statements` set, the cache can be
+    # turned back on with `db_statement_cache_size`, which otherwise
+    # defaults to asyncpg's 100 statements, or 0 in pooler mode.
+    #
+    # LISTEN needs a session of its own, so job event and payload cache
+    # notifications are received on a connection to `db_listen_host`, which
+    # should reach postgres directly, bypassing the pooler. Without it they
+    # use the writer host, and through a transaction mode pooler only
+    # polling will then pick up job changes.
+    db_pooler_mode: bool = False
+    db_statement_cache_size: int | None = Field(None, ge=0)
+    db_listen_host: str | None = None
+
+    # JOB LISTING SETTINGS
+    #
+    # `job_max_limit` caps the page size of the jobs listing. Larger result
+    # sets can be streamed from the jobs export endpoint, which reads rows
+    # through a server-side cursor `job_export_chunk_size` rows at a time, so
+    # only about one chunk per export is held in memory.
+    #
+    # Job facet counts are cached in-process for `job_facets_cache_ttl`
+    # seconds; 0 disables the cache.
+    #
+    # The jobs change feed is ordered by each thread's `last_update`, which
+    # swoop.db sets to the time reported by the status event rather than
+    # the commit time. The feed holds back updates from the last
+    # `job_changes_settle_time` seconds, so events committing shortly after
+    # the time they report are not skipped by clients' cursors. Events
+    # committed later than that, such as ones delivered late by a handler,
+    # can land behind a cursor and are then never returned by the feed.
+    job_max_limit: int = Field(10000, ge=1)
+    job_export_chunk_size: int = Field(1000, ge=1)
+    job_facets_cache_ttl: float = Field(10, ge=0)
+    job_changes_settle_time: float = Field(1, ge=0)
+
+    # JOB LOOKUP BATCHING SETTINGS
+    #
+    # Single job lookups arriving within `job_loader_delay` seconds of each
+    # other are made with one query, of at most `job_loader_max_batch` jobs.
+    job_loader_delay: float = Field(0.002, ge=0)
+    job_loader_max_batch: int = Field(100, ge=1)
+
+    # JOB ANALYTICS SETTINGS
+    #
+    # Analytics cover windows of up to `analytics_max_window` seconds split
+    # into at most `analytics_max_buckets` buckets. Each analytics query runs
+    # with a statement timeout of `analytics_statement_timeout` milliseconds,
+    # and results are cached per bucket-aligned window for
+    # `analytics_cache_ttl` seconds; 0 disables the cache.
+    analytics_max_window: int = Field(7 * 24 * 60 * 60, ge=1)
+    analytics_max_buckets: int = Field(1440, ge=1)
+    analytics_statement_timeout: int = Field(5000, ge=0)
+    analytics_cache_ttl: float = Field(60, ge=0)
+
+    # JOB EVENT SETTINGS
+    #
+    # Job status events are read from the job change feed by one task per
+    # API process and fanned out to subscribers. A dedicated connection
+    # LISTENs on `job_events_channel`, and any notification there triggers
+    # an immediate read; otherwise the feed is read every
+    # `job_events_poll_interval` seconds. Each subscriber buffers up to
+    # `job_events_queue_size` events and resyncs from the feed if it falls
+    # further behind. Idle event streams send a keepalive comment every
+    # `job_events_keepalive` seconds. Job status requests can wait for a
+    # change for at most `job_wait_max` seconds.
+    job_events_channel: str = "swoop_job_status"
+    job_events_poll_interval: float = Field(1, gt=0)
+    job_events_queue_size: int = Field(1000, ge=1)
+    job_events_keepalive: float = Field(15, gt=0)
+    job_wait_max: float = Field(60, gt=0)
+
+    # JOB SUBMISSION SETTINGS
+    #
+    # Batch executions accept at most `execution_batch_max_size` items per
+    # request, and upload up to `execution_batch_upload_concurrency` job
+    # inputs at once.
+    #
+    # With `execution_queue_enabled`, single execute requests are queued
+    # and submitted together: up to `execution_queue_max_batch` requests
+    # arriving within `execution_queue_delay` seconds of the first share one
+    # transaction. This trades a little latency for write throughput.
+    #
+    # Submissions lock each payload on a 64-bit key. Versions before it
+    # locked on the payload's low 16 bits instead, and the two do not
+    # exclude each other, so set `execution_legacy_payload_locks` while
+    # rolling out over such a version to take both locks; turn it off once
+    # no old processes remain.
+    execution_batch_max_size: int = Field(1000, ge=1)
+    execution_batch_upload_concurrency: int = Field(16, ge=1)
+    execution_queue_enabled: bool = False
+    execution_queue_delay: float = Field(0.005, ge=0)
+    execution_queue_max_batch: int = Field(100, ge=1)
+    execution_legacy_payload_locks: bool = False
+
+    # PAYLOAD ACTION CACHE SETTINGS
+    #
+    # Each API process can cache the job a payload submission resolved to,
+    # for up to `payload_action_cache_ttl` seconds, so repeat submissions
+    # are redirected without a database round trip; 0 disables the cache.
+    # At most `payload_action_cache_size` payloads are cached. Entries are
+    # dropped when the job fails or is canceled, and when the payload cache
+    # entry is invalidated through the API, which notifies all processes on
+    # `payload_cache_channel`.
+    payload_action_cache_ttl: float = Field(0, ge=0)
+    payload_action_cache_size: int = Field(10000, ge=1)
+    payload_cache_channel: str = "swoop_payload_cache"
 
     bucket_name: str
     execution_dir: str
-    s3_endpoint: str
+    s3_endpoint: str = "s3.amazonaws.com"
     config_file: Path
+
+    # OBJECT STORAGE BACKEND SETTINGS
+    #
+    # Objects are stored in S3 (or an S3-compatible store like MinIO) by
+    # default. Single-node deployments can instead use the `filesystem`
+    # backend, which stores objects as files under `storage_root`, in a
+    # directory named for the bucket.
+    storage_backend: Literal["s3", "filesystem"] = "s3"
+    storage_root: Path | None = None
+
+    # OBJECT STORAGE REDIRECT SETTINGS
+    #
+    # When enabled, job inputs and result payloads are returned as a 303
+    # redirect to a short-lived presigned object storage URL instead of being
+    # proxied through the API. Clients can also opt in per request with the
+    # `Prefer: redirect` header, or opt out with `Prefer: return=representation`.
+    io_presigned_redirect: bool = False
+    io_presigned_url_expiry: int = 300
+
+    # OBJECT STORAGE UPLOAD SETTINGS
+    #
+    # Objects larger than the part size are uploaded as a multipart upload,
+    # with up to `s3_upload_concurrency` parts in flight at once. S3 requires
+    # a part size of at least 5 MiB.
+    s3_upload_part_size: int = Field(16 * 1024 * 1024, ge=5 * 1024 * 1024)
+    s3_upload_concurrency: int = Field(4, ge=1)
+
+    # OBJECT STORAGE HTTP CLIENT SETTINGS
+    #
+    # All object storage requests share one HTTP connection pool manager,
+    # keeping up to `s3_max_pool_connections` connections alive per host.
+    # When `s3_pool_block` is set, requests wait for a free connection instead
+    # of opening (and then discarding) extra ones. Timeouts are in seconds.
+    # Failed requests (connection errors and 5xx responses) are retried up to
+    # `s3_max_retries` times with exponential backoff. TCP keepalive probes
+    # start after `s3_tcp_keepalive_idle` seconds idle; None disables them.
+    s3_max_pool_connections: int = Field(10, ge=1)
+    s3_pool_block: bool = False
+    s3_connect_timeout: float = 5
+    s3_read_timeout: float = 60
+    s3_max_retries: int = Field(5, ge=0)
+    s3_retry_backoff_factor: float = 0.2
+    s3_tcp_keepalive_idle: int | None = 60
+
+    # OBJECT STORAGE HEDGED READ SETTINGS
+    #
+    # When enabled, an object read that has not received response headers
+    # within the `s3_hedge_percentile` percentile of recently observed read
+    # latencies gets a second, identical request, and whichever responds
+    # first is used. The delay never drops below `s3_hedge_min_delay`, and
+    # `s3_hedge_initial_delay` is used until enough latencies are observed.
+    s3_hedge_reads: bool = False
+    s3_hedge_percentile: float = Field(95, gt=0, lt=100)
+    s3_hedge_min_delay: float = 0.01
+    s3_hedge_initial_delay: float = 0.1
+
+    @model_validator(mode="after")
+    def check_storage_root(self) -> "Settings":
+        if self.storage_backend == "filesystem" and self.storage_root is None:
+            raise ValueError("storage_root is required for the filesystem backend")
+        return self
@@ -1,20 +1,584 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import Any
+
 import asyncpg
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 
 from swoop.api.config import Settings
+from swoop.api.exceptions import DatabaseBusyError
+
+logger = logging.getLogger(__name__)
+
+# weight of the latest ping in a replica's moving average latency
+LATENCY_WEIGHT = 0.3
+
+# clients echo the commit position of their last write back to us in this
+# header or cookie, so their later reads see that write
+LSN_HEADER = "Swoop-Commit-LSN"
+LSN_COOKIE = "swoop_commit_lsn"
+
+# prefix of the prepared statement names of this process, as other
+# processes' statements may be on the same server connection behind a pooler
+STATEMENT_PREFIX = f"__swoop_{os.getpid():x}_{os.urandom(4).hex()}"
+
+_statement_ids = itertools.count(1)
+
+
+def parse_lsn(lsn: str) -> int:
+    """Parse a postgres WAL location, like `16/B374D848`, to an integer."""
+    high, low = lsn.split("/")
+    if len(high) > 8 or len(low) > 8:
+        raise ValueError(f"invalid WAL location: {lsn}")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def format_lsn(lsn: int) -> str:
+    return f"{lsn >> 32:X}/{lsn & 0xFFFFFFFF:X}"
+
+
+def request_lsn(request: Request) -> int | None:
+    """The commit position a request must read past, if any."""
+    lsn = request.headers.get(LSN_HEADER) or request.cookies.get(LSN_COOKIE)
+    if not lsn:
+        return None
+    try:
+        return parse_lsn(lsn)
+    except ValueError:
+        # not one we handed out, so there is no write of the client's to see
+        return None
+
+
+# acquisition timeout for the current request's route, set per request
+acquire_timeout: ContextVar[float | None] = ContextVar("acquire_timeout", default=None)
+
+
+async def set_acquire_timeout(request: Request) -> None:
+    """Apply the route's connection acquisition timeout to the request."""
+    settings = request.app.state.settings
+    route = request.scope.get("route")
+    acquire_timeout.set(
+        settings.db_acquire_timeouts.get(
+            getattr(route, "name", None),
+            settings.db_acquire_timeout,
+        )
+    )
+
+
+class _PoolAcquire:
+    """Acquire from an adaptive pool, as a context manager or awaitable."""
+
+    def __init__(self, pool: AdaptivePool, timeout: float | None) -> None:
+        self.pool = pool
+        self.timeout = timeout
+        self.conn = None
+
+    def __await__(self):
+        return self.pool._acquire(self.timeout).__await__()
+
+    async def __aenter__(self):
+        self.conn = await self.pool._acquire(self.timeout)
+        return self.conn
+
+    async def __aexit__(self, *exc) -> None:
+        await self.pool.release(self.conn)
+
+
+class AdaptivePool:
+    """
+    An asyncpg pool that sizes itself to demand.
+
+    The underlying pool may open up to `max_size` connections, but only
+    `limit` of them are handed out at once. An acquisition waiting longer
+    than `target_wait` on a fully used pool raises the limit by one, up to
+    `max_size`. When under half of the limit was used over the last
+    `adjust_interval` seconds it is lowered by one, down to `min_size`,
+    and the pool's inactivity timeout then closes the idle connections.
+
+    Acquisitions wait at most `timeout` seconds, defaulting to the current
+    route's acquisition timeout, then raise DatabaseBusyError.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        min_size: int,
+        max_size: int,
+        target_wait: float,
+        adjust_interval: float,
+        default_timeout: float | None = None,
+    ) -> None:
+        self.pool = pool
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_wait = target_wait
+        self.adjust_interval = adjust_interval
+        self.default_timeout = default_timeout
+        self.limit = max(min_size, 1)
+        self.in_use = 0
+        self._cond = asyncio.Condition()
+        self._waiting = 0
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        # most connections in use since the limit was last adjusted
+        self._adjusted = time.monotonic()
+        self._peak = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "in_use": self.in_use,
+            "waiting": self._waiting,
+            "acquisitions": self._acquisitions,
+            "timeouts": self._timeouts,
+            "wait_ms_avg": (
+                self._wait_total / self._acquisitions * 1000
+                if self._acquisitions
+                else 0.0
+            ),
+            "wait_ms_max": self._wait_max * 1000,
+        }
+
+    def register_metrics(self, metrics, name: str) -> None:
+        metrics.register(name, self.stats)
+
+    def get_size(self) -> int:
+        return self.pool.get_size()
+
+    def get_idle_size(self) -> int:
+        return self.pool.get_idle_size()
+
+    def acquire(self, *, timeout: float | None = None) -> _PoolAcquire:
+        return _PoolAcquire(self, timeout)
+
+    async def release(self, conn, *, timeout: float | None = None) -> None:
+        try:
+            await self.pool.release(conn, timeout=timeout)
+        finally:
+            async with self._cond:
+                self.in_use -= 1
+                self._cond.notify()
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    async def _acquire(self, timeout: float | None):
+        if timeout is None:
+            timeout = acquire_timeout.get()
+        if timeout is None:
+            timeout = self.default_timeout
+
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            async with asyncio.timeout(timeout):
+                async with self._cond:
+                    while self.in_use >= self.limit:
+                        try:
+                            await asyncio.wait_for(self._cond.wait(), self.target_wait)
+                        except TimeoutError:
+                            # waited too long on a fully used pool
+                            self.limit = min(self.limit + 1, self.max_size)
+                    self.in_use += 1
+                try:
+                    conn = await self.pool.acquire()
+                except BaseException:
+                    async with self._cond:
+                        self.in_use -= 1
+                        self._cond.notify()
+                    raise
+        except TimeoutError:
+            self._timeouts += 1
+            raise DatabaseBusyError(
+                f"no database connection available within {timeout}s"
+            ) from None
+        finally:
+            self._waiting -= 1
+
+        self._record(time.monotonic() - start)
+        return conn
+
+    def _record(self, wait: float) -> None:
+        self._acquisitions += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        self._peak = max(self._peak, self.in_use)
+
+        now = time.monotonic()
+        if now - self._adjusted < self.adjust_interval:
+            return
+        if self._peak < self.limit / 2:
+            self.limit = max(self.limit - 1, self.min_size, 1)
+        self._adjusted = now
+        self._peak = 0
+
+
+async def replayed_lsn(conn) -> int:
+    """How far a server has replayed the writer's WAL."""
+    lsn = await conn.fetchval("SELECT pg_last_wal_replay_lsn()::text")
+    if lsn is None:
+        # not a standby, so it has every write
+        lsn = await conn.fetchval("SELECT pg_current_wal_lsn()::text")
+    return parse_lsn(lsn)
+
+
+class Replica:
+    """
+    A reader host's pool and what has been measured about it.
+
+    The host is pinged over a dedicated connection opened by `connect`,
+    outside of the pool, so a pool busy with requests is not mistaken for
+    a failing host.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        pool,
+        connect: Callable[[], Awaitable[asyncpg.Connection]],
+    ) -> None:
+        self.host = host
+        self.pool = pool
+        self.connect = connect
+        self._ping_conn: asyncpg.Connection | None = None
+        self.healthy = True
+        self.failures = 0
+        self.latency: float | None = None
+        self.replayed: int | None = None
+        self.acquisitions = 0
+
+    @property
+    def in_use(self) -> int:
+        return self.pool.in_use
+
+    def score(self) -> float:
+        # expected wait: round trip time scaled by the connections already
+        # busy on the host
+        return (self.latency or 0.001) * (self.in_use + 1)
+
+    async def ping(self) -> int:
+        """Return how far the host has replayed, on the ping connection."""
+        if self._ping_conn is None or self._ping_conn.is_closed():
+            self._ping_conn = await self.connect()
+        try:
+            return await replayed_lsn(self._ping_conn)
+        except BaseException:
+            # reconnect on the next ping, rather than reuse a connection in
+            # an unknown state
+            self.close_ping()
+            raise
+
+    def close_ping(self) -> None:
+        if self._ping_conn is not None:
+            self._ping_conn.terminate()
+            self._ping_conn = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "latency_ms": None if self.latency is None else self.latency * 1000,
+            "replayed_lsn": (
+                None if self.replayed is None else format_lsn(self.replayed)
+            ),
+            "acquisitions": self.acquisitions,
+            "pool": self.pool.stats(),
+        }
+
+
+class _ReplicaAcquire:
+    """Acquire from the best replica, as a context manager or awaitable."""
+
+    def __init__(self, readers: ReaderSet, timeout: float | None) -> None:
+        self.readers = readers
+        self.timeout = timeout
+        self.conn = None
+
+    async def _acquire(self):
+        replica = self.readers.choose()
+        replica.acquisitions += 1
+        try:
+            conn = await replica.pool.acquire(timeout=self.timeout)
+        except TimeoutError:
+            # a pool too busy to hand out a connection in time is not a
+            # failing host, though TimeoutError, and so DatabaseBusyError,
+            # is an OSError
+            raise
+        except (OSError, asyncpg.PostgresConnectionError):
+            self.readers.failed(replica)
+            raise
+        self.readers._owners[conn] = replica
+        return conn
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def __aenter__(self):
+        self.conn = await self._acquire()
+        return self.conn
+
+    async def __aexit__(self, *exc) -> None:
+        await self.readers.release(self.conn)
+
+
+class ReaderSet:
+    """
+    Balances reads across reader hosts, one pool per host.
+
+    Each acquisition goes to the healthy replica with the lowest measured
+    round trip time scaled by its busy connections. Every
+    `health_interval` seconds each replica is pinged on a connection of its
+    own, outside the pool limit, which measures its latency and how far it
+    has replayed the writer's WAL. A replica failing `eject_after` pings or
+    connection attempts in a row is ejected until a ping succeeds again; a
+    pool that is merely busy is not a failure.
+    """
+
+    def __init__(
+        self,
+        replicas: list[Replica],
+        health_interval: float,
+        eject_after: int,
+    ) -> None:
+        self.replicas = replicas
+        self.health_interval = health_interval
+        self.eject_after = eject_after
+        self._owners: dict[Any, Replica] = {}
+        self._task: asyncio.Task | None = None
+        self._refresh: asyncio.Task | None = None
+
+    def stats(self) -> dict[str, Any]:
+        return {replica.host: replica.stats() for replica in self.replicas}
+
+    def register_metrics(self, metrics) -> None:
+        metrics.register("db_readers", self.stats)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            replica.close_ping()
+            await replica.pool.close()
+
+    def choose(self, min_lsn: int | None = None) -> Replica | None:
+        """
+        The best replica to read from, having replayed up to `min_lsn`.
+
+        Without `min_lsn`, an ejected replica is still returned when every
+        replica is ejected; with it, None is returned when no healthy
+        replica is known to have replayed that far.
+        """
+        candidates = [r for r in self.replicas if r.healthy]
+        if min_lsn is not None:
+            candidates = [
+                r
+                for r in candidates
+                if r.replayed is not None and r.replayed >= min_lsn
+            ]
+            if not candidates:
+                return None
+        return min(candidates or self.replicas, key=Replica.score)
+
+    def acquire(self, *, timeout: float | None = None) -> _ReplicaAcquire:
+        return _ReplicaAcquire(self, timeout)
+
+    async def release(self, conn, *, timeout: float | None = None) -> None:
+        replica = self._owners.pop(conn)
+        await replica.pool.release(conn, timeout=timeout)
+
+    def failed(self, replica: Replica) -> None:
+        replica.failures += 1
+        if replica.failures >= self.eject_after and replica.healthy:
+            logger.warning("Ejecting database reader %s", replica.host)
+            replica.healthy = False
+
+    async def refresh(self) -> None:
+        """Ping every replica now; concurrent callers share one round."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._check_all())
+        await asyncio.shield(self._refresh)
+
+    async def _run(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.health_interval)
+
+    async def _check_all(self) -> None:
+        await asyncio.gather(*[self._check(replica) for replica in self.replicas])
+
+    async def _check(self, replica: Replica) -> None:
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.health_interval):
+                replayed = await replica.ping()
+        except (OSError, TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError):
+            self.failed(replica)
+            return
+        latency = time.perf_counter() - start
+        replica.latency = (
+            latency
+            if replica.latency is None
+            else LATENCY_WEIGHT * latency + (1 - LATENCY_WEIGHT) * replica.latency
+        )
+        replica.replayed = replayed
+        replica.failures = 0
+        if not replica.healthy:
+            logger.warning("Readmitting database reader %s", replica.host)
+            replica.healthy = True
+
+
+class DatabaseRouter:
+    """
+    Routes queries between the writer and the readers.
+
+    Writes always go to the writer. Reads go to the readers, unless the
+    client has written something the readers may not have replayed yet: a
+    read carrying a commit position is only sent to a reader that has
+    replayed past that position, and to the writer if there is none.
+    """
+
+    def __init__(self, writepool, readers: ReaderSet | None = None) -> None:
+        self.writepool = writepool
+        self.readers = readers
+        self.last_lsn: int | None = None
+        self._reads = 0
+        self._fallbacks = 0
+
+    @property
+    def has_replica(self) -> bool:
+        return self.readers is not None
+
+    @property
+    def readpool(self):
+        return self.writepool if self.readers is None else self.readers
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "reads": self._reads,
+            "writer_fallbacks": self._fallbacks,
+        }
+
+    def register_metrics(self, metrics) -> None:
+        metrics.register("db_routing", self.stats)
+        if self.readers is not None:
+            self.readers.register_metrics(metrics)
+
+    async def read_pool(self, min_lsn: int | None = None):
+        """The pool to read from, having seen writes up to `min_lsn`."""
+        self._reads += 1
+        if min_lsn is None or self.readers is None:
+            return self.readpool
+        replica = self.readers.choose(min_lsn)
+        if replica is None:
+            await self.readers.refresh()
+            replica = self.readers.choose(min_lsn)
+        if replica is not None:
+            return replica.pool
+        self._fallbacks += 1
+        return self.writepool
+
+    @asynccontextmanager
+    async def reader(self, min_lsn: int | None = None):
+        pool = await self.read_pool(min_lsn)
+        async with pool.acquire() as conn:
+            yield conn
+
+    async def commit_lsn(self, conn) -> str | None:
+        """
+        A commit position at or after every write committed on `conn`.
+
+        Read on the writer connection that made the writes, once they are
+        committed, so no other connection is needed. None when reads and
+        writes share a pool, as there is nothing to wait for then, or if
+        the position cannot be read.
+        """
+        if not self.has_replica:
+            return None
+        try:
+            lsn = parse_lsn(await conn.fetchval("SELECT pg_current_wal_lsn()::text"))
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+            # the writes are committed, so only the client's next reads lose
+            # the guarantee of seeing them
+            logger.exception("Failed to read the commit position")
+            return None
+        self.last_lsn = max(lsn, self.last_lsn or 0)
+        return format_lsn(lsn)
+
+    def known_commit_lsn(self) -> str | None:
+        """The latest commit position read by `commit_lsn`, if any."""
+        if self.has_replica and self.last_lsn is not None:
+            return format_lsn(self.last_lsn)
+        return None
+
+
+def set_commit_lsn(response: Response, lsn: str | None) -> None:
+    """Hand a client the commit position its next reads must see."""
+    if lsn is None:
+        return
+    response.headers[LSN_HEADER] = lsn
+    response.set_cookie(LSN_COOKIE, lsn, httponly=True, samesite="lax")
+
+
+def db_reader(request: Request):
+    """Acquire a read connection that sees the request's earlier writes."""
+    return request.app.state.db.reader(request_lsn(request))
+
+
+def reader_hosts(settings: Settings) -> list[str | None]:
+    """The reader hosts, from the comma-separated `db_reader_host`."""
+    hosts = [h.strip() for h in (settings.db_reader_host or "").split(",")]
+    return [h for h in hosts if h] or [None]
 
 
 async def connect_to_db(app: FastAPI) -> None:
     """Connect to Database."""
-    app.state.writepool = app.state.readpool = await create_pool(
-        app.state.settings.db_reader_host,
-        app.state.settings,
-    )
-    if app.state.settings.db_writer_host:
-        app.state.writepool = await create_pool(
-            app.state.settings.db_writer_host,
-            app.state.settings,
+    settings = app.state.settings
+    hosts = reader_hosts(settings)
+
+    if settings.db_writer_host:
+        app.state.writepool = await create_pool(settings.db_writer_host, settings)
+        pools = [await create_pool(host, settings) for host in hosts]
+    else:
+        # the first reader host takes the writes too
+        app.state.writepool = await create_pool(hosts[0], settings)
+        pools = [app.state.writepool]
+        pools += [await create_pool(host, settings) for host in hosts[1:]]
+
+    readers = None
+    if pools != [app.state.writepool]:
+        readers = ReaderSet(
+            [
+                Replica(host, pool, partial(connect_host, host, settings))
+                for host, pool in zip(hosts, pools)
+            ],
+            health_interval=settings.db_reader_health_interval,
+            eject_after=settings.db_reader_eject_after,
         )
+        readers.start()
+
+    app.state.db = DatabaseRouter(app.state.writepool, readers)
+    app.state.readpool = app.state.db.readpool
 
 
 async def close_db_connection(app: FastAPI) -> None:
@@ -23,13 +587,79 @@ async def close_db_connection(app: FastAPI) -> None:
     await app.state.writepool.close()
 
 
-async def create_pool(host: str, settings: Settings):
+class PoolerConnection(asyncpg.Connection):
+    """
+    A connection through a transaction mode pooler.
+
+    Prepared statements are given names unique to this process, and the
+    connection is not reset when released to the pool: the reset would run
+    on whichever server connection the pooler picks, and the API leaves no
+    session state behind, as its settings and advisory locks are scoped to
+    transactions and LISTEN has its own connection.
+    """
+
+    def _get_unique_id(self, prefix: str) -> str:
+        return f"{STATEMENT_PREFIX}_{prefix}_{next(_statement_ids):x}__"
+
+    def _get_reset_query(self) -> str:
+        return ""
+
+
+def connection_options(host: str | None, settings: Settings) -> dict[str, Any]:
+    """The asyncpg connection arguments for `host`."""
+    options = {
+        "host": host,
+        "database": settings.db_name,
+    }
+    statement_cache_size = settings.db_statement_cache_size
+    if settings.db_pooler_mode:
+        options["connection_class"] = PoolerConnection
+        if statement_cache_size is None:
+            statement_cache_size = 0
+    if statement_cache_size is not None:
+        options["statement_cache_size"] = statement_cache_size
+    return options
+
+
+def pool_options(host: str | None, settings: Settings) -> dict[str, Any]:
+    """The asyncpg pool arguments for `host`."""
+    return {
+        **connection_options(host, settings),
+        "min_size": settings.db_min_conn_size,
+        "max_size": settings.db_max_conn_size,
+        "max_queries": settings.db_max_queries,
+        "max_inactive_connection_lifetime": settings.db_max_inactive_conn_lifetime,
+    }
+
+
+async def connect_host(host: str | None, settings: Settings) -> asyncpg.Connection:
+    """Open a single connection to `host`, outside of the pools."""
+    return await asyncpg.connect(**connection_options(host, settings))
+
+
+async def create_pool(host: str | None, settings: Settings) -> AdaptivePool:
     """Create a connection pool."""
-    return await asyncpg.create_pool(
-        host=host,
-        database=settings.db_name,
+    pool = await asyncpg.create_pool(**pool_options(host, settings))
+    return AdaptivePool(
+        pool,
         min_size=settings.db_min_conn_size,
         max_size=settings.db_max_conn_size,
-        max_queries=settings.db_max_queries,
-        max_inactive_connection_lifetime=settings.db_max_inactive_conn_lifetime,
+        target_wait=settings.db_pool_target_wait,
+        adjust_interval=settings.db_pool_adjust_interval,
+        default_timeout=settings.db_acquire_timeout,
+    )
+
+
+async def connect_listener(settings: Settings) -> asyncpg.Connection:
+    """
+    Open a dedicated connection for LISTEN, outside of the pools.
+
+    Notifications are not replicated, so this connects to the writer host
+    when one is configured, unless a direct `db_listen_host` is set. The
+    connection also runs queries, so it takes the pooler mode options in
+    case it goes through the pooler after all.
+    """
+    return await connect_host(
+        settings.db_listen_host or settings.db_writer_host or reader_hosts(settings)[0],
+        settings,
     )
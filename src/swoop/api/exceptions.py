@@ -10,6 +10,10 @@ class WorkflowConfigError(SwoopApiException, ValueError):
     pass
 
 
+class DatabaseBusyError(SwoopApiException, TimeoutError):
+    pass
+
+
 class HTTPException(SwoopApiException, FAPIHttpException):
     def __init__(
         self,
@@ -42,4 +46,5 @@ class HTTPException(SwoopApiException, FAPIHttpException):
         return JSONResponse(
             status_code=self.status_code,
             content=content,
+            headers=self.headers,
         )
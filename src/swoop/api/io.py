@@ -1,6 +1,25 @@
+from __future__ import annotations
+
 import io
+import json
 import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent import futures
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, BinaryIO, TypeVar
 
+import certifi
+import urllib3
+from fastapi.responses import FileResponse, JSONResponse, Response
 from minio import Minio
 from minio.credentials import (
     ChainedProvider,
@@ -10,8 +29,13 @@ from minio.credentials import (
 )
 from minio.error import S3Error
 
+from swoop.api.config import Settings
+from swoop.api.metrics import Metrics
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 def split_endpoint_protocol(s3_endpoint: str) -> tuple[bool, str]:
     secure = True
@@ -26,14 +50,283 @@ def split_endpoint_protocol(s3_endpoint: str) -> tuple[bool, str]:
     return secure, s3_endpoint
 
 
-class IOClient:
-    def __init__(self, bucket_name: str, s3_endpoint: str = "s3.amazonaws.com"):
+DEFAULT_UPLOAD_PART_SIZE = 16 * 1024 * 1024
+DEFAULT_UPLOAD_CONCURRENCY = 4
+
+
+def create_http_client(
+    max_pool_connections: int = 10,
+    pool_block: bool = False,
+    connect_timeout: float = 5,
+    read_timeout: float = 60,
+    max_retries: int = 5,
+    retry_backoff_factor: float = 0.2,
+    tcp_keepalive_idle: int | None = 60,
+) -> urllib3.PoolManager:
+    """Create a pool manager to share across object storage clients.
+
+    Mirrors the minio client defaults for certificate handling and retried
+    status codes, but with configurable pool size, timeouts, and retries.
+    """
+    socket_options = list(urllib3.connection.HTTPConnection.default_socket_options)
+
+    if tcp_keepalive_idle is not None:
+        socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        # TCP_KEEPIDLE is not available on all platforms (e.g., macOS)
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            socket_options.append(
+                (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, tcp_keepalive_idle)
+            )
+
+    return urllib3.PoolManager(
+        maxsize=max_pool_connections,
+        block=pool_block,
+        timeout=urllib3.util.Timeout(connect=connect_timeout, read=read_timeout),
+        retries=urllib3.Retry(
+            total=max_retries,
+            backoff_factor=retry_backoff_factor,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        socket_options=socket_options,
+    )
+
+
+def http_pool_stats(http_client: urllib3.PoolManager) -> dict[str, Any]:
+    """Snapshot the utilization of each host pool in a pool manager."""
+    pools = []
+
+    # the pools container does not support direct iteration
+    for key in http_client.pools.keys():  # noqa: SIM118
+        pool = http_client.pools.get(key)
+        if pool is None or pool.pool is None:
+            continue
+
+        # the pool queue is prefilled with `maxsize` placeholders, so any
+        # slot missing from the queue is a connection currently checked out
+        queued = list(pool.pool.queue)
+        pools.append(
+            {
+                "host": pool.host,
+                "port": pool.port,
+                "maxsize": pool.pool.maxsize,
+                "in_use": pool.pool.maxsize - len(queued),
+                "idle": sum(1 for conn in queued if conn is not None),
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            }
+        )
+
+    return {"pools": pools}
+
+
+class LatencyTracker:
+    """Track recent request latencies to derive a hedging delay."""
+
+    def __init__(
+        self,
+        percentile: float = 95,
+        min_delay: float = 0.01,
+        initial_delay: float = 0.1,
+        window: int = 1000,
+        min_samples: int = 20,
+    ) -> None:
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def delay(self) -> float:
+        samples = sorted(self._samples)
+
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+
+        index = min(int(len(samples) * self.percentile / 100), len(samples) - 1)
+        return max(samples[index], self.min_delay)
+
+
+def hedged_call(
+    executor: futures.Executor,
+    fn: Callable[[], T],
+    delay: float,
+    discard: Callable[[T], None],
+) -> tuple[T, bool, bool]:
+    """Call `fn`, issuing a second identical call if the first is slow.
+
+    If the first call has not completed within `delay` seconds, a hedge call
+    is started and whichever succeeds first is returned. The result of the
+    other call is passed to `discard` once it completes, to allow cleaning up
+    any resources it holds.
+
+    Returns the result and whether the hedge was fired and won.
+    """
+    primary = executor.submit(fn)
+
+    try:
+        return primary.result(timeout=delay), False, False
+    except futures.TimeoutError:
+        pass
+
+    hedge = executor.submit(fn)
+    pending = {primary, hedge}
+    winner: futures.Future | None = None
+
+    while pending and winner is None:
+        done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+        for future in done:
+            if winner is None and future.exception() is None:
+                winner = future
+
+    if winner is None:
+        # both calls failed; surface the primary error
+        return primary.result(), True, False
+
+    loser = hedge if winner is primary else primary
+
+    def discard_result(future: futures.Future) -> None:
+        if future.exception() is None:
+            discard(future.result())
+
+    loser.add_done_callback(discard_result)
+
+    return winner.result(), True, winner is hedge
+
+
+def release_response(response: urllib3.BaseHTTPResponse) -> None:
+    response.close()
+    response.release_conn()
+
+
+class IOClient(ABC):
+    """Object storage for workflow execution inputs and outputs."""
+
+    supports_presigned_urls: bool = False
+
+    def __init__(self, bucket_name: str) -> None:
+        self.bucket_name = bucket_name
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings,
+        bucket_name: str | None = None,
+    ) -> IOClient:
+        """Create a client for the storage backend selected in settings."""
+        bucket_name = bucket_name or settings.bucket_name
+
+        if settings.storage_backend == "filesystem":
+            return FileIOClient(bucket_name, settings.storage_root)
+
+        return S3IOClient(
+            bucket_name,
+            settings.s3_endpoint,
+            upload_part_size=settings.s3_upload_part_size,
+            upload_concurrency=settings.s3_upload_concurrency,
+            http_client=create_http_client(
+                max_pool_connections=settings.s3_max_pool_connections,
+                pool_block=settings.s3_pool_block,
+                connect_timeout=settings.s3_connect_timeout,
+                read_timeout=settings.s3_read_timeout,
+                max_retries=settings.s3_max_retries,
+                retry_backoff_factor=settings.s3_retry_backoff_factor,
+                tcp_keepalive_idle=settings.s3_tcp_keepalive_idle,
+            ),
+            hedge_reads=settings.s3_hedge_reads,
+            hedge_latency=LatencyTracker(
+                percentile=settings.s3_hedge_percentile,
+                min_delay=settings.s3_hedge_min_delay,
+                initial_delay=settings.s3_hedge_initial_delay,
+            ),
+        )
+
+    def register_metrics(self, metrics: Metrics) -> None:
+        """Register any backend-specific metrics providers."""
+
+    def close(self) -> None:
+        """Release any resources held by the client."""
+
+    @abstractmethod
+    def get_object(self, object_name: str) -> Any:
+        """Retrieve a JSON object, or None if it does not exist."""
+        ...
+
+    def object_response(self, object_name: str) -> Response | None:
+        """Build a response serving an object, or None if it does not exist."""
+        content = self.get_object(object_name)
+        return JSONResponse(content) if content is not None else None
+
+    @abstractmethod
+    def get_presigned_url(self, object_name: str, expires: timedelta) -> str | None:
+        """
+        Generate a presigned GET URL for an object.
+
+        Returns None if the backend cannot presign URLs, in which case
+        callers serve the object content themselves.
+        """
+        ...
+
+    @abstractmethod
+    def put_object(
+        self,
+        object_name: str,
+        object_content: str | bytes | BinaryIO,
+        content_type="application/json",
+        length: int | None = None,
+    ) -> None: ...
+
+    @abstractmethod
+    def put_file_object(self, object_name: str, file_name: str) -> None: ...
+
+    @abstractmethod
+    def delete_object(self, object_name: str) -> None: ...
+
+    @abstractmethod
+    def create_bucket(self) -> None: ...
+
+    @abstractmethod
+    def delete_bucket(self) -> None: ...
+
+    @abstractmethod
+    def bucket_exists(self) -> bool: ...
+
+    @abstractmethod
+    def list_objects(self, prefix: str = "", recursive: bool = True) -> Iterator[str]:
+        """Iterate over the names of objects starting with `prefix`."""
+        ...
+
+    def delete_objects(self, prefix="", recursive=True) -> None:
+        for object_name in list(self.list_objects(prefix=prefix, recursive=recursive)):
+            self.delete_object(object_name)
+
+
+class S3IOClient(IOClient):
+    supports_presigned_urls = True
+
+    def __init__(
+        self,
+        bucket_name: str,
+        s3_endpoint: str = "s3.amazonaws.com",
+        upload_part_size: int = DEFAULT_UPLOAD_PART_SIZE,
+        upload_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+        http_client: urllib3.PoolManager | None = None,
+        hedge_reads: bool = False,
+        hedge_latency: LatencyTracker | None = None,
+    ):
         """Initialize IO Client."""
+        super().__init__(bucket_name)
         secure, s3_endpoint = split_endpoint_protocol(s3_endpoint)
 
+        self.http_client = http_client or create_http_client()
         self.client = Minio(
             s3_endpoint,
             secure=secure,
+            http_client=self.http_client,
             credentials=ChainedProvider(
                 [
                     EnvMinioProvider(),
@@ -43,24 +336,90 @@ class IOClient:
             ),
         )
 
-        self.bucket_name = bucket_name
+        self.upload_part_size = upload_part_size
+        self.upload_concurrency = upload_concurrency
+
+        self.hedge_reads = hedge_reads
+        self.hedge_latency = hedge_latency or LatencyTracker()
+        # threads are only started once a hedge is fired
+        self._hedge_executor = futures.ThreadPoolExecutor(
+            thread_name_prefix="swoop-io-hedge",
+        )
+        self._read_stats_lock = threading.Lock()
+        self._reads = 0
+        self._hedges_fired = 0
+        self._hedges_won = 0
+
         self.create_bucket()
 
+    def register_metrics(self, metrics: Metrics) -> None:
+        metrics.register("s3_http_pool", self.pool_stats)
+        metrics.register("s3_reads", self.read_stats)
+
+    def close(self) -> None:
+        # losing reads are released as they finish, so there is no need to wait
+        self._hedge_executor.shutdown(wait=False)
+
+    def pool_stats(self) -> dict[str, Any]:
+        return http_pool_stats(self.http_client)
+
+    def read_stats(self) -> dict[str, Any]:
+        return {
+            "reads": self._reads,
+            "hedges_fired": self._hedges_fired,
+            "hedges_won": self._hedges_won,
+            "hedge_delay": self.hedge_latency.delay() if self.hedge_reads else None,
+        }
+
+    def _timed_get(self, object_name: str) -> urllib3.BaseHTTPResponse:
+        start = time.monotonic()
+        # minio does not preload content, so this returns once headers arrive
+        response = self.client.get_object(self.bucket_name, object_name)
+        self.hedge_latency.record(time.monotonic() - start)
+        return response
+
+    def _open_object(self, object_name: str) -> urllib3.BaseHTTPResponse:
+        if not self.hedge_reads:
+            with self._read_stats_lock:
+                self._reads += 1
+            return self.client.get_object(self.bucket_name, object_name)
+
+        response, fired, won = hedged_call(
+            self._hedge_executor,
+            lambda: self._timed_get(object_name),
+            self.hedge_latency.delay(),
+            release_response,
+        )
+
+        with self._read_stats_lock:
+            self._reads += 1
+            self._hedges_fired += fired
+            self._hedges_won += won
+
+        return response
+
     def get_object(self, object_name: str):
         """Retrieve from object storage."""
         object_response = None
         try:
-            response = self.client.get_object(self.bucket_name, object_name)
+            response = self._open_object(object_name)
         except S3Error as err:
             logger.error(err)
         else:
             object_response = response.json()
             logger.debug(f"retrieved object content: {object_response}")
-            response.close()
-            response.release_conn()
+            release_response(response)
 
         return object_response
 
+    def get_presigned_url(self, object_name: str, expires: timedelta) -> str:
+        """Generate a presigned GET URL for an object."""
+        return self.client.presigned_get_object(
+            self.bucket_name,
+            object_name,
+            expires=expires,
+        )
+
     def put_file_object(self, object_name: str, file_name: str):
         result = self.client.fput_object(self.bucket_name, object_name, file_name)
         logger.debug(
@@ -70,14 +429,39 @@ class IOClient:
         )
 
     def put_object(
-        self, object_name: str, object_content: str, content_type="application/json"
+        self,
+        object_name: str,
+        object_content: str | bytes | BinaryIO,
+        content_type="application/json",
+        length: int | None = None,
     ):
+        """Upload to object storage.
+
+        Content larger than the configured part size is sent as a multipart
+        upload with parts uploaded in parallel. Content can be a str (encoded
+        as utf-8), a bytes-like buffer, or a readable binary stream. Streams
+        of unknown `length` are read and uploaded one part at a time, so the
+        whole object never needs to be held in memory.
+        """
+        if isinstance(object_content, str):
+            object_content = object_content.encode("utf-8")
+
+        if isinstance(object_content, bytes | bytearray | memoryview):
+            length = len(object_content)
+            # BytesIO shares the buffer of an immutable bytes object
+            # rather than copying it
+            object_content = io.BytesIO(object_content)
+        elif length is None:
+            length = -1
+
         result = self.client.put_object(
             self.bucket_name,
             object_name,
-            io.BytesIO(object_content.encode("utf-8")),
-            len(object_content.encode("utf-8")),
+            object_content,
+            length,
             content_type,
+            part_size=self.upload_part_size,
+            num_parallel_uploads=self.upload_concurrency,
         )
         logger.debug(
             "created {} object; etag: {}, version-id: {}".format(
@@ -102,12 +486,128 @@ class IOClient:
     def bucket_exists(self):
         return self.client.bucket_exists(self.bucket_name)
 
-    def list_objects(self, prefix: str = "", recursive: bool = True):
-        return self.client.list_objects(
+    def list_objects(self, prefix: str = "", recursive: bool = True) -> Iterator[str]:
+        for obj in self.client.list_objects(
             self.bucket_name, prefix=prefix, recursive=recursive
+        ):
+            yield obj.object_name
+
+
+class FileIOClient(IOClient):
+    """Object storage on the local filesystem.
+
+    Objects are stored as files under `<root>/<bucket_name>`. Writes go to a
+    temporary file in the destination directory that is then atomically
+    renamed into place, so readers never observe a partially written object.
+    `object_response` hands the file itself to the server to stream rather
+    than loading it into the API process. Presigned URLs are not supported.
+    """
+
+    def __init__(self, bucket_name: str, root: Path | str) -> None:
+        super().__init__(bucket_name)
+        self.root = Path(root).resolve()
+        self.bucket_path = self.root / bucket_name
+        self.create_bucket()
+
+    def _path(self, object_name: str) -> Path:
+        # object names are relative to the bucket regardless of leading slashes
+        path = (self.bucket_path / object_name.lstrip("/")).resolve()
+
+        if not path.is_relative_to(self.bucket_path):
+            raise ValueError(f"object name outside of bucket: {object_name}")
+
+        return path
+
+    def get_object(self, object_name: str) -> Any:
+        try:
+            path = self._path(object_name)
+            with path.open("rb") as f:
+                object_response = json.load(f)
+        except (OSError, ValueError) as err:
+            logger.error(err)
+            return None
+
+        logger.debug(f"retrieved object content: {object_response}")
+        return object_response
+
+    def get_presigned_url(self, object_name: str, expires: timedelta) -> None:
+        return None
+
+    def object_response(self, object_name: str) -> Response | None:
+        try:
+            path = self._path(object_name)
+        except ValueError as err:
+            logger.error(err)
+            return None
+
+        if not path.is_file():
+            return None
+
+        return FileResponse(path, media_type="application/json")
+
+    def put_object(
+        self,
+        object_name: str,
+        object_content: str | bytes | BinaryIO,
+        content_type="application/json",
+        length: int | None = None,
+    ) -> None:
+        path = self._path(object_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if isinstance(object_content, str):
+            object_content = object_content.encode("utf-8")
+
+        fd, tmp_name = tempfile.mkstemp(
+            dir=path.parent,
+            prefix=f".{path.name}.",
+            suffix=".tmp",
         )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(object_content, bytes | bytearray | memoryview):
+                    f.write(object_content)
+                else:
+                    shutil.copyfileobj(object_content, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        logger.debug(f"created {object_name} object")
+
+    def put_file_object(self, object_name: str, file_name: str) -> None:
+        with open(file_name, "rb") as f:
+            self.put_object(object_name, f)
+
+    def delete_object(self, object_name: str) -> None:
+        self._path(object_name).unlink(missing_ok=True)
+        logger.debug(f"deleted object: {object_name}")
+
+    def create_bucket(self) -> None:
+        if not self.bucket_exists():
+            self.bucket_path.mkdir(parents=True, exist_ok=True)
+            logger.debug(f"created bucket: {self.bucket_name}")
+
+    def delete_bucket(self) -> None:
+        if self.bucket_exists():
+            shutil.rmtree(self.bucket_path)
+            logger.debug(f"deleted bucket: {self.bucket_name}")
+
+    def bucket_exists(self) -> bool:
+        return self.bucket_path.is_dir()
+
+    def list_objects(self, prefix: str = "", recursive: bool = True) -> Iterator[str]:
+        paths = self.bucket_path.rglob("*") if recursive else self.bucket_path.glob("*")
+        prefix = prefix.lstrip("/")
+
+        for path in paths:
+            # skip directories and in-progress writes
+            if not path.is_file() or path.name.startswith("."):
+                continue
 
-    def delete_objects(self, prefix="", recursive=True):
-        objects_to_delete = self.list_objects(prefix=prefix, recursive=recursive)
-        for obj in objects_to_delete:
-            self.client.remove_object(self.bucket_name, obj.object_name)
+            object_name = path.relative_to(self.bucket_path).as_posix()
+            if object_name.startswith(prefix):
+                yield object_name
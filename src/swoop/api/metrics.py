@@ -0,0 +1,25 @@
+from collections.abc import Callable
+from typing import Any
+
+MetricsProvider = Callable[[], dict[str, Any]]
+
+
+class Metrics:
+    """Process-local registry of metrics providers.
+
+    Components register a callable returning a snapshot of their current
+    metrics. Snapshots are only taken when metrics are collected, so
+    registering a provider adds no overhead to the request path.
+    """
+
+    def __init__(self) -> None:
+        self._providers: dict[str, MetricsProvider] = {}
+
+    def register(self, name: str, provider: MetricsProvider) -> None:
+        self._providers[name] = provider
+
+    def unregister(self, name: str) -> None:
+        self._providers.pop(name, None)
+
+    def collect(self) -> dict[str, dict[str, Any]]:
+        return {name: provider() for name, provider in self._providers.items()}
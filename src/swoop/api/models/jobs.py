@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from uuid import UUID
 
@@ -8,7 +8,7 @@ from asyncpg import Record
 from fastapi import Request
 from pydantic import BaseModel
 
-from swoop.api.models.shared import Link
+from swoop.api.models.shared import APIException, Link
 
 
 class SwoopStatusCode(str, Enum):
@@ -86,6 +86,17 @@ class Type(str, Enum):
     process = "process"
 
 
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    json = "json"
+
+
+class JobSortBy(str, Enum):
+    created = "created"
+    updated = "updated"
+    started = "started"
+
+
 class StatusInfo(BaseModel):
     processID: str
     type: Type
@@ -180,3 +191,138 @@ class StatusInfo(BaseModel):
 class JobList(BaseModel):
     jobs: list[StatusInfo]
     links: list[Link]
+
+
+class BatchExecutionItem(BaseModel):
+    index: int
+    jobID: str | None = None
+    cached: bool | None = None
+    error: APIException | None = None
+
+
+class BatchExecutionResults(BaseModel):
+    created: int
+    cached: int
+    failed: int
+    results: list[BatchExecutionItem]
+
+
+class JobFacetCount(BaseModel):
+    processID: str
+    type: str
+    status: StatusCode
+    swoopStatus: SwoopStatusCode
+    count: int
+
+
+class JobFacets(BaseModel):
+    total: int
+    processID: dict[str, int]
+    type: dict[str, int]
+    status: dict[str, int]
+    swoopStatus: dict[str, int]
+    counts: list[JobFacetCount]
+    links: list[Link]
+
+    @classmethod
+    def from_records(cls, records: list[Record], links: list[Link]) -> JobFacets:
+        counts = [
+            JobFacetCount(
+                processID=record["action_name"],
+                type=record["handler_type"],
+                status=StatusCode.from_swoop_status(record["status"]),
+                swoopStatus=record["status"],
+                count=record["count"],
+            )
+            for record in records
+        ]
+
+        def totals(field: str) -> dict:
+            result: dict = {}
+            for count in counts:
+                key = getattr(count, field)
+                key = key.value if isinstance(key, Enum) else key
+                result[key] = result.get(key, 0) + count.count
+            return result
+
+        return cls(
+            total=sum(count.count for count in counts),
+            processID=totals("processID"),
+            type=totals("type"),
+            status=totals("status"),
+            swoopStatus=totals("swoopStatus"),
+            counts=counts,
+            links=links,
+        )
+
+
+class DurationPercentiles(BaseModel):
+    p50: float
+    p95: float
+    p99: float
+
+
+class ThroughputBucket(BaseModel):
+    start: datetime
+    completed: int
+
+
+class WorkflowAnalytics(BaseModel):
+    processID: str
+    completed: int
+    duration: DurationPercentiles
+    throughput: list[ThroughputBucket]
+
+
+class JobAnalytics(BaseModel):
+    start: datetime
+    end: datetime
+    bucket: int
+    workflows: list[WorkflowAnalytics]
+    links: list[Link] = []
+
+    @classmethod
+    def from_records(
+        cls,
+        start: datetime,
+        end: datetime,
+        bucket: int,
+        percentiles: list[Record],
+        throughput: list[Record],
+    ) -> JobAnalytics:
+        buckets = [
+            start + timedelta(seconds=offset)
+            for offset in range(0, int((end - start).total_seconds()), bucket)
+        ]
+        completions: dict[str, dict[datetime, int]] = {}
+        for record in throughput:
+            completions.setdefault(record["action_name"], {})[
+                record["bucket_start"]
+            ] = record["completed"]
+
+        return cls(
+            start=start,
+            end=end,
+            bucket=bucket,
+            workflows=[
+                WorkflowAnalytics(
+                    processID=record["action_name"],
+                    completed=record["completed"],
+                    duration=DurationPercentiles(
+                        p50=record["percentiles"][0],
+                        p95=record["percentiles"][1],
+                        p99=record["percentiles"][2],
+                    ),
+                    throughput=[
+                        ThroughputBucket(
+                            start=bucket_start,
+                            completed=completions.get(record["action_name"], {}).get(
+                                bucket_start, 0
+                            ),
+                        )
+                        for bucket_start in buckets
+                    ],
+                )
+                for record in percentiles
+            ],
+        )
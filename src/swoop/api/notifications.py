@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections.abc import Callable, Iterable
+from typing import Any
+from uuid import UUID
+
+import asyncpg
+from asyncpg import Record
+
+from swoop.api.config import Settings
+from swoop.api.db import connect_listener
+from swoop.api.models.jobs import JobSortBy
+from swoop.api.queries.jobs import JobCursor, JobFilter, job_changes_query
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """
+    A subscriber's bounded queue of job changes.
+
+    If the subscriber falls behind and its queue fills up, further changes
+    are dropped and `overflowed` is set; the subscriber is then expected to
+    resync from the job change feed, starting at its last seen position.
+    """
+
+    def __init__(self, job_filter: JobFilter, cursor: JobCursor, maxsize: int):
+        self.job_filter = job_filter
+        self.cursor = cursor
+        self.queue: asyncio.Queue[Record] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def matches(self, record: Record) -> bool:
+        f = self.job_filter
+        return (
+            (f.processes is None or record["action_name"] in f.processes)
+            and (f.types is None or record["handler_type"] in f.types)
+            and (f.jobs is None or record["action_uuid"] in f.jobs)
+            and (f.statuses is None or record["status"] in f.statuses)
+            and (f.swoop_statuses is None or record["status"] in f.swoop_statuses)
+        )
+
+    def publish(self, record: Record) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def reset(self) -> None:
+        """Drop any queued changes and clear the overflow flag."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+
+class JobEventHub:
+    """
+    Fans job changes out to subscribers within this process.
+
+    A single dedicated connection LISTENs on the configured channel. Any
+    notification on it wakes the hub, which reads the job change feed from
+    its last position and publishes each change to matching subscribers.
+    The feed is also read every `poll_interval` seconds, so changes are
+    still delivered, with more latency, when nothing notifies the channel.
+    Either way the database work is one feed query per process rather than
+    one query per subscriber. Subscriptions to
+    particular jobs are indexed by job, so a change is only matched against
+    those for its own job and the ones not limited to any job.
+
+    The connection also LISTENs on the channels passed to `listen`.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        channel: str,
+        poll_interval: float,
+        queue_size: int,
+        settle_time: float = 0,
+        batch_size: int = 1000,
+    ) -> None:
+        self.settings = settings
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.settle_time = settle_time
+        self.batch_size = batch_size
+        self.cursor: JobCursor | None = None
+        self._conn: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._subscribers: set[Subscription] = set()
+        # the subscribers not limited to particular jobs, and the others by job
+        self._unscoped: set[Subscription] = set()
+        self._by_job: dict[UUID, set[Subscription]] = {}
+        self._listeners: dict[str, Callable] = {}
+        self._sweeps = 0
+        self._published = 0
+        self._overflows = 0
+        self._notifications = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> JobEventHub:
+        return cls(
+            settings,
+            channel=settings.job_events_channel,
+            poll_interval=settings.job_events_poll_interval,
+            queue_size=settings.job_events_queue_size,
+            settle_time=settings.job_changes_settle_time,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "connected": self._conn is not None and not self._conn.is_closed(),
+            "subscribers": len(self._subscribers),
+            "sweeps": self._sweeps,
+            "published": self._published,
+            "overflows": self._overflows,
+            "notifications": self._notifications,
+        }
+
+    def register_metrics(self, metrics) -> None:
+        metrics.register("job_events", self.stats)
+
+    async def subscribe(self, job_filter: JobFilter) -> Subscription:
+        async with self._lock:
+            await self._connect()
+            if self.cursor is None:
+                self.cursor = await self._current_cursor()
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._run())
+            subscription = Subscription(job_filter, self.cursor, self.queue_size)
+            self._add(subscription)
+            return subscription
+
+    async def listen(self, channel: str, callback: Callable) -> None:
+        """Pass notifications on another channel to `callback` as well."""
+        async with self._lock:
+            self._listeners[channel] = callback
+            if self._conn is not None and not self._conn.is_closed():
+                await self._conn.add_listener(channel, callback)
+
+    def _add(self, subscription: Subscription) -> None:
+        self._subscribers.add(subscription)
+        if subscription.job_filter.jobs is None:
+            self._unscoped.add(subscription)
+        for job_id in subscription.job_filter.jobs or []:
+            self._by_job.setdefault(job_id, set()).add(subscription)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        self._unscoped.discard(subscription)
+        for job_id in subscription.job_filter.jobs or []:
+            subscribers = self._by_job.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_job[job_id]
+
+    def subscribers_for(self, record: Record) -> Iterable[Subscription]:
+        """The subscribers a change to the record's job could match."""
+        scoped = self._by_job.get(record["action_uuid"])
+        if scoped is None:
+            return self._unscoped
+        return itertools.chain(self._unscoped, scoped)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _connect(self) -> None:
+        if self._conn is not None and not self._conn.is_closed():
+            return
+        self._conn = await connect_listener(self.settings)
+        await self._conn.add_listener(self.channel, self._on_notification)
+        for channel, callback in self._listeners.items():
+            await self._conn.add_listener(channel, callback)
+
+    def _on_notification(self, conn, pid, channel, payload) -> None:
+        self._notifications += 1
+        self._wake.set()
+
+    async def _current_cursor(self) -> JobCursor:
+        now = await self._conn.fetchval(
+            "SELECT now() - $1::float8 * interval '1 second'",
+            self.settle_time,
+        )
+        return JobCursor(sortby=JobSortBy.updated, value=now, action_uuid=UUID(int=0))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                async with self._lock:
+                    if not self._subscribers:
+                        # nobody is listening, so start from the current
+                        # position for the next subscriber
+                        self.cursor = None
+                        continue
+                    await self._connect()
+                    await self._sweep()
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.exception("Failed to read job changes")
+
+    async def _sweep(self) -> None:
+        self._sweeps += 1
+        while True:
+            q, p = job_changes_query(
+                JobFilter(),
+                limit=self.batch_size,
+                cursor=self.cursor,
+                settle_time=self.settle_time,
+            )
+            records = await self._conn.fetch(q, *p)
+
+            for record in records:
+                for subscription in self.subscribers_for(record):
+                    if subscription.matches(record):
+                        overflowed = subscription.overflowed
+                        subscription.publish(record)
+                        self._published += 1
+                        self._overflows += subscription.overflowed and not overflowed
+
+            if records:
+                self.cursor = JobCursor.from_record(JobSortBy.updated, records[-1])
+            if len(records) < self.batch_size:
+                return
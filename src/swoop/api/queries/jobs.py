@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+from buildpg import render
+
+from swoop.api.models.jobs import JobSortBy, SwoopStatusCode
+
+JOB_COLUMNS = """
+    a.action_name,
+    a.action_uuid,
+    a.handler_type,
+    t.status,
+    t.created_at,
+    t.last_update,
+    a.payload_uuid,
+    t.started_at
+"""
+
+JOB_FROM = """
+    swoop.action a
+    INNER JOIN swoop.thread t ON t.action_uuid = a.action_uuid
+"""
+
+# sort column and the record key it is selected as
+SORT_COLUMNS = {
+    JobSortBy.created: ("a.created_at", "created_at"),
+    JobSortBy.updated: ("t.last_update", "last_update"),
+    JobSortBy.started: ("t.started_at", "started_at"),
+}
+
+
+@dataclass
+class JobFilter:
+    """
+    Filters for selecting workflow jobs.
+
+    A filter left as None is not applied at all.
+    """
+
+    processes: list[str] | None = None
+    types: list[str] | None = None
+    jobs: list[UUID] | None = None
+    statuses: list[str] | None = None
+    swoop_statuses: list[str] | None = None
+    start: datetime | None = None
+    end: datetime | None = None
+    dt: datetime | None = None
+    min_duration: int | None = None
+    max_duration: int | None = None
+
+
+@dataclass
+class JobCursor:
+    """
+    Position in a sorted job listing: the sort value and job ID of the last
+    job returned. Encoded as an opaque token for use in `next` links.
+    """
+
+    sortby: JobSortBy
+    value: datetime | None
+    action_uuid: UUID
+
+    @classmethod
+    def from_record(cls, sortby: JobSortBy, record) -> JobCursor:
+        return cls(
+            sortby=sortby,
+            value=record[SORT_COLUMNS[sortby][1]],
+            action_uuid=record["action_uuid"],
+        )
+
+    def encode(self) -> str:
+        value = self.value.isoformat() if self.value is not None else None
+        token = json.dumps([self.sortby.value, value, str(self.action_uuid)])
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> JobCursor:
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            sortby, value, action_uuid = json.loads(base64.urlsafe_b64decode(padded))
+            return cls(
+                sortby=JobSortBy(sortby),
+                value=datetime.fromisoformat(value) if value is not None else None,
+                action_uuid=UUID(action_uuid),
+            )
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
+
+
+class QueryBuilder:
+    """
+    Accumulates WHERE conditions and their bind parameters.
+
+    Conditions are static SQL written in this module and all values are
+    passed as parameters, so the statement text only depends on which
+    filters are in use. That keeps the set of distinct statements small
+    enough for asyncpg's prepared statement cache to be effective, while
+    letting the planner see only the predicates that actually apply.
+    """
+
+    def __init__(self) -> None:
+        self.conditions: list[str] = []
+        self.params: dict[str, Any] = {}
+
+    def where(self, condition: str, **params: Any) -> QueryBuilder:
+        self.conditions.append(condition)
+        self.params.update(params)
+        return self
+
+    def where_clause(self) -> str:
+        if not self.conditions:
+            return ""
+        return "WHERE " + "\n    AND ".join(self.conditions)
+
+    def render(self, template: str, **params: Any) -> tuple[str, list[Any]]:
+        """
+        Render `template`, substituting `{where}` with the accumulated
+        conditions before binding parameters.
+        """
+        return render(
+            template.format(where=self.where_clause()),
+            **self.params,
+            **params,
+        )
+
+
+def duration_conditions(
+    min_duration: int | None,
+    max_duration: int | None,
+) -> str:
+    """
+    Build the condition for a duration range.
+
+    A job's duration is `now() - started_at` while it is running and
+    `last_update - started_at` once terminal. Rather than computing that for
+    every row, the bounds are rewritten as range predicates on `started_at`
+    and `last_update`, which the planner can match against indexes.
+    """
+    running = []
+    terminal = []
+    if min_duration is not None:
+        running.append(
+            "t.started_at <= now() - :min_duration::integer * interval '1 second'"
+        )
+        terminal.append(
+            "t.last_update >= t.started_at + :min_duration::integer * interval '1 second'"
+        )
+    if max_duration is not None:
+        running.append(
+            "t.started_at >= now() - :max_duration::integer * interval '1 second'"
+        )
+        terminal.append(
+            "t.last_update <= t.started_at + :max_duration::integer * interval '1 second'"
+        )
+    # jobs that have not started have no duration and are always
+    # included, provided they are in one of the duration states
+    return """
+        t.status = ANY(:duration_states)
+        AND (
+            t.status = 'QUEUED'
+            OR t.started_at IS NULL
+            OR (t.status = 'RUNNING' AND {running})
+            OR (t.status <> 'RUNNING' AND {terminal})
+        )
+    """.format(
+        running=" AND ".join(running),
+        terminal=" AND ".join(terminal),
+    )
+
+
+def apply_job_filter(query: QueryBuilder, job_filter: JobFilter) -> QueryBuilder:
+    query.where("a.action_type = 'workflow'")
+
+    if job_filter.processes is not None:
+        query.where(
+            "a.action_name = ANY(:processes)",
+            processes=job_filter.processes,
+        )
+
+    if job_filter.types is not None:
+        query.where("a.handler_type = ANY(:types)", types=job_filter.types)
+
+    if job_filter.jobs is not None:
+        query.where("a.action_uuid = ANY(:jobs)", jobs=job_filter.jobs)
+
+    if job_filter.statuses is not None:
+        query.where("t.status = ANY(:statuses)", statuses=job_filter.statuses)
+
+    if job_filter.swoop_statuses is not None:
+        query.where(
+            "t.status = ANY(:swoop_statuses)",
+            swoop_statuses=job_filter.swoop_statuses,
+        )
+
+    # thread.created_at is copied from the action, so repeating the
+    # datetime predicates on it allows partition pruning on both tables
+    if job_filter.start is not None:
+        query.where(
+            "a.created_at >= :start_datetime AND t.created_at >= :start_datetime",
+            start_datetime=job_filter.start,
+        )
+
+    if job_filter.end is not None:
+        query.where(
+            "a.created_at <= :end_datetime AND t.created_at <= :end_datetime",
+            end_datetime=job_filter.end,
+        )
+
+    if job_filter.dt is not None:
+        query.where("a.created_at = :dt AND t.created_at = :dt", dt=job_filter.dt)
+
+    if job_filter.min_duration is not None or job_filter.max_duration is not None:
+        query.where(
+            duration_conditions(job_filter.min_duration, job_filter.max_duration),
+            duration_states=[s.value for s in SwoopStatusCode.duration_states()],
+            min_duration=job_filter.min_duration,
+            max_duration=job_filter.max_duration,
+        )
+
+    return query
+
+
+def keyset_condition(column: str, cursor: JobCursor) -> str:
+    """
+    Condition selecting the jobs after `cursor` when sorting by
+    `column DESC NULLS LAST, action_uuid DESC`.
+    """
+    if cursor.value is None:
+        return f"{column} IS NULL AND a.action_uuid < :cursor_uuid"
+
+    condition = f"""
+        {column} <= :cursor_value
+        AND ({column}, a.action_uuid) < (:cursor_value, :cursor_uuid)
+    """
+    if cursor.sortby == JobSortBy.started:
+        condition = f"({condition} OR {column} IS NULL)"
+    elif cursor.sortby == JobSortBy.created:
+        # keep partition pruning on thread as for the datetime filter
+        condition += " AND t.created_at <= :cursor_value"
+    return condition
+
+
+def list_jobs_query(
+    job_filter: JobFilter,
+    limit: int | None,
+    last: UUID | None = None,
+    sortby: JobSortBy | None = None,
+    cursor: JobCursor | None = None,
+) -> tuple[str, list[Any]]:
+    query = apply_job_filter(QueryBuilder(), job_filter)
+
+    if sortby is None:
+        if last is not None:
+            query.where("a.action_uuid < :last", last=last)
+        order_by = "a.action_uuid DESC"
+    else:
+        column = SORT_COLUMNS[sortby][0]
+        if cursor is not None:
+            query.where(
+                keyset_condition(column, cursor),
+                cursor_value=cursor.value,
+                cursor_uuid=cursor.action_uuid,
+            )
+        # only started_at is nullable, other columns keep the default
+        # ordering so a backward index scan can satisfy it
+        nulls = " NULLS LAST" if sortby == JobSortBy.started else ""
+        order_by = f"{column} DESC{nulls}, a.action_uuid DESC"
+
+    limit_clause = "LIMIT :limit" if limit is not None else ""
+
+    return query.render(
+        f"""
+        SELECT {JOB_COLUMNS}
+        FROM {JOB_FROM}
+        {{where}}
+        ORDER BY {order_by}
+        {limit_clause}
+        """,
+        limit=limit,
+    )
+
+
+def job_changes_query(
+    job_filter: JobFilter,
+    limit: int,
+    cursor: JobCursor | None = None,
+    settle_time: float = 0,
+) -> tuple[str, list[Any]]:
+    """
+    Select jobs updated after `cursor`, oldest change first.
+
+    Changes are ordered by `thread.last_update`, the time reported by the
+    latest status event rather than its commit time. Updates from the last
+    `settle_time` seconds are held back, so that transactions still
+    committing around the cursor are not skipped, but an event committed
+    more than `settle_time` after the time it reports can fall behind a
+    cursor and be missed.
+    """
+    query = apply_job_filter(QueryBuilder(), job_filter)
+
+    if cursor is not None:
+        query.where(
+            """
+            t.last_update >= :cursor_value
+            AND (t.last_update, a.action_uuid) > (:cursor_value, :cursor_uuid)
+            """,
+            cursor_value=cursor.value,
+            cursor_uuid=cursor.action_uuid,
+        )
+
+    if settle_time > 0:
+        query.where(
+            "t.last_update <= now() - :settle_time::float8 * interval '1 second'",
+            settle_time=settle_time,
+        )
+
+    return query.render(
+        f"""
+        SELECT {JOB_COLUMNS}
+        FROM {JOB_FROM}
+        {{where}}
+        ORDER BY t.last_update, a.action_uuid
+        LIMIT :limit
+        """,
+        limit=limit,
+    )
+
+
+def job_facets_query(job_filter: JobFilter) -> tuple[str, list[Any]]:
+    query = apply_job_filter(QueryBuilder(), job_filter)
+    return query.render(f"""
+        SELECT a.action_name, a.handler_type, t.status, count(*) AS count
+        FROM {JOB_FROM}
+        {{where}}
+        GROUP BY a.action_name, a.handler_type, t.status
+        """)
+
+
+def analytics_window(
+    window: int,
+    bucket: int,
+    now: datetime | None = None,
+) -> tuple[datetime, datetime]:
+    """
+    The `window` seconds ending at the start of the current bucket.
+
+    Aligning to the bucket size keeps the window, and so any cached
+    results for it, the same until the next bucket completes.
+    """
+    now = now or datetime.now(tz=UTC)
+    timestamp = now.timestamp()
+    end = datetime.fromtimestamp(timestamp - timestamp % bucket, tz=UTC)
+    return end - timedelta(seconds=window), end
+
+
+def completed_jobs_query(
+    processes: list[str] | None,
+    start: datetime,
+    end: datetime,
+) -> QueryBuilder:
+    """
+    Select workflow jobs that finished in [start, end).
+
+    A job is created before it is last updated, so the created_at bounds
+    let both partitioned tables be pruned to the partitions before `end`.
+    """
+    query = QueryBuilder()
+    query.where("a.action_type = 'workflow'")
+    query.where(
+        "t.status = ANY(:terminal_states)",
+        terminal_states=[s.value for s in SwoopStatusCode.terminal_states()],
+    )
+    query.where("t.started_at IS NOT NULL")
+    query.where(
+        "t.last_update >= :start AND t.last_update < :end",
+        start=start,
+        end=end,
+    )
+    query.where("a.created_at < :end AND t.created_at < :end")
+    if processes is not None:
+        query.where("a.action_name = ANY(:processes)", processes=processes)
+    return query
+
+
+def job_duration_percentiles_query(
+    processes: list[str] | None,
+    start: datetime,
+    end: datetime,
+) -> tuple[str, list[Any]]:
+    return completed_jobs_query(processes, start, end).render(f"""
+        SELECT
+            a.action_name,
+            count(*) AS completed,
+            percentile_cont(ARRAY[0.5, 0.95, 0.99]) WITHIN GROUP (
+                ORDER BY EXTRACT(EPOCH FROM (t.last_update - t.started_at))
+            ) AS percentiles
+        FROM {JOB_FROM}
+        {{where}}
+        GROUP BY a.action_name
+        ORDER BY a.action_name
+        """)
+
+
+def job_throughput_query(
+    processes: list[str] | None,
+    start: datetime,
+    end: datetime,
+    bucket: int,
+) -> tuple[str, list[Any]]:
+    return completed_jobs_query(processes, start, end).render(
+        f"""
+        SELECT
+            a.action_name,
+            date_bin(
+                :bucket::integer * interval '1 second',
+                t.last_update,
+                :start
+            ) AS bucket_start,
+            count(*) AS completed
+        FROM {JOB_FROM}
+        {{where}}
+        GROUP BY a.action_name, bucket_start
+        ORDER BY a.action_name, bucket_start
+        """,
+        bucket=bucket,
+    )
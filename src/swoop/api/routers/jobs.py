@@ -1,18 +1,47 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
+from datetime import timedelta
 from typing import Annotated
 from uuid import UUID
 
-from buildpg import V, funcs, render
-from fastapi import APIRouter, Query, Request, Response
-from fastapi.responses import JSONResponse
+from asyncpg.cursor import Cursor
+from asyncpg.exceptions import QueryCanceledError
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
-from swoop.api.exceptions import HTTPException
-from swoop.api.models.jobs import JobList, StatusCode, StatusInfo, SwoopStatusCode
+from swoop.api.db import db_reader, request_lsn
+from swoop.api.exceptions import DatabaseBusyError, HTTPException
+from swoop.api.models.jobs import (
+    ExportFormat,
+    JobAnalytics,
+    JobFacets,
+    JobList,
+    JobSortBy,
+    StatusCode,
+    StatusInfo,
+    SwoopStatusCode,
+)
 from swoop.api.models.shared import APIException, Link, Results
 from swoop.api.models.workflows import Payload
+from swoop.api.notifications import Subscription
+from swoop.api.queries.jobs import (
+    JobCursor,
+    JobFilter,
+    analytics_window,
+    job_changes_query,
+    job_duration_percentiles_query,
+    job_facets_query,
+    job_throughput_query,
+    list_jobs_query,
+)
 from swoop.api.rfc3339 import rfc3339_str_to_datetime, str_to_interval
+from swoop.api.ttlcache import MISSING
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +53,126 @@ router: APIRouter = APIRouter(
 )
 
 
+class JobLoader:
+    """
+    Coalesces concurrent single job lookups.
+
+    Lookups arriving within `delay` seconds of each other are resolved
+    together by one `action_uuid = ANY($1)` query, and lookups of a job
+    that is already pending or in flight share that lookup's result.
+    """
+
+    def __init__(self, pool, delay: float, max_batch: int) -> None:
+        self.pool = pool
+        self.delay = delay
+        self.max_batch = max_batch
+        self._pending: dict[UUID, asyncio.Future] = {}
+        self._in_flight: dict[UUID, asyncio.Future] = {}
+        self._handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._loads = 0
+        self._batches = 0
+        self._keys = 0
+
+    @classmethod
+    def from_settings(cls, pool, settings) -> JobLoader:
+        return cls(
+            pool,
+            delay=settings.job_loader_delay,
+            max_batch=settings.job_loader_max_batch,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "loads": self._loads,
+            "batches": self._batches,
+            "keys": self._keys,
+        }
+
+    def register_metrics(self, metrics) -> None:
+        metrics.register("job_loader", self.stats)
+
+    async def load(self, job_id: UUID):
+        """Return the job record for `job_id`, or None if there is none."""
+        self._loads += 1
+        future = self._pending.get(job_id) or self._in_flight.get(job_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[job_id] = future
+            if len(self._pending) >= self.max_batch:
+                self._dispatch()
+            elif self._handle is None:
+                self._handle = loop.call_later(self.delay, self._dispatch)
+        # a cancelled waiter must not cancel the lookup for the others
+        return await asyncio.shield(future)
+
+    async def close(self) -> None:
+        """Look up any pending jobs and wait for all batches to finish."""
+        if self._pending:
+            self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _dispatch(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        self._in_flight.update(batch)
+        task = asyncio.create_task(self._fetch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def fetch(self, pool, job_id: UUID):
+        """Look up a job on a particular pool, outside of any batch."""
+        self._loads += 1
+        records = await self._query(pool, [job_id])
+        return records[0] if records else None
+
+    async def _query(self, pool, job_ids: list[UUID]) -> list:
+        async with pool.acquire() as conn:
+            return await conn.fetch(
+                """
+                SELECT
+                    a.action_name,
+                    a.action_uuid,
+                    t.status,
+                    t.created_at,
+                    t.last_update,
+                    a.payload_uuid,
+                    t.started_at,
+                    t.error
+                FROM swoop.action a
+                INNER JOIN swoop.thread t
+                ON t.action_uuid = a.action_uuid
+                WHERE a.action_type = 'workflow'
+                AND a.action_uuid = ANY($1::uuid[])
+                """,
+                job_ids,
+            )
+
+    async def _fetch(self, batch: dict[UUID, asyncio.Future]) -> None:
+        self._batches += 1
+        self._keys += len(batch)
+        try:
+            records = await self._query(self.pool, list(batch))
+        except Exception as e:  # noqa: BLE001
+            # raised to each waiter instead
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            for job_id in batch:
+                self._in_flight.pop(job_id, None)
+
+        found = {record["action_uuid"]: record for record in records}
+        for job_id, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(job_id))
+
+
 def job_not_found():
     raise HTTPException(
         status_code=404,
@@ -31,15 +180,56 @@ def job_not_found():
     )
 
 
-@router.get(
-    "",
-    response_model=JobList,
-    responses={"404": {"model": APIException}, "422": {"model": APIException}},
-    response_model_exclude_unset=True,
-)
-async def list_workflow_executions(
-    request: Request,
-    limit: int = Query(ge=1, default=DEFAULT_JOB_LIMIT),
+def prefers_redirect(request: Request) -> bool:
+    """
+    Whether object content should be returned via a presigned URL redirect.
+
+    The default comes from the `io_presigned_redirect` setting, and can be
+    overridden per request using the `Prefer` header. Storage backends that
+    cannot presign URLs always serve content directly.
+    """
+    if not request.app.state.io.supports_presigned_urls:
+        return False
+
+    preferences = [
+        pref.split(";")[0].replace(" ", "").lower()
+        for pref in request.headers.get("prefer", "").split(",")
+    ]
+
+    if "redirect" in preferences:
+        return True
+
+    if "return=representation" in preferences:
+        return False
+
+    return request.app.state.settings.io_presigned_redirect
+
+
+async def presigned_url(request: Request, object_name: str) -> str | None:
+    # presigning may look up the bucket region over the network
+    return await run_in_threadpool(
+        request.app.state.io.get_presigned_url,
+        object_name,
+        expires=timedelta(
+            seconds=request.app.state.settings.io_presigned_url_expiry,
+        ),
+    )
+
+
+async def object_redirect(
+    request: Request, object_name: str
+) -> RedirectResponse | None:
+    url = await presigned_url(request, object_name)
+    if url is None:
+        return None
+    return RedirectResponse(
+        url,
+        status_code=303,
+        headers={"Preference-Applied": "redirect"},
+    )
+
+
+def get_job_filter(
     processID: Annotated[list[str] | None, Query()] = None,
     jobID: Annotated[list[UUID] | None, Query()] = None,
     types: Annotated[list[str] | None, Query(alias="type")] = None,
@@ -48,12 +238,7 @@ async def list_workflow_executions(
     datetime: Annotated[str, Query()] = None,
     minDuration: Annotated[int, Query()] = None,
     maxDuration: Annotated[int, Query()] = None,
-    lastID: UUID | None = None,
-) -> JobList | APIException:
-    """
-    Returns a list of all available workflow executions
-    """
-
+) -> JobFilter:
     try:
         if datetime is None:
             start = None
@@ -79,134 +264,86 @@ async def list_workflow_executions(
         statuses = None
 
     if swoopStatus is not None:
-        swoop_status = [s.value for s in swoopStatus]
+        swoop_statuses = [s.value for s in swoopStatus]
     else:
-        swoop_status = None
-
-    proc_clause = V("a.action_name") == funcs.any(processID)
-    type_clause = V("a.handler_type") == funcs.any(types)
-    job_clause = V("a.action_uuid") == funcs.any(jobID)
-    status_clause = V("t.status") == funcs.any(statuses)
-    swoop_status_clause = V("t.status") == funcs.any(swoop_status)
-    duration_status_clause = V("status") == funcs.any(
-        [s.value for s in SwoopStatusCode.duration_states()],
-    )
-    completed_status_clause = V("t.status") == funcs.any(
-        [s.value for s in SwoopStatusCode.terminal_states()],
+        swoop_statuses = None
+
+    return JobFilter(
+        processes=processID,
+        types=types,
+        jobs=jobID,
+        statuses=statuses,
+        swoop_statuses=swoop_statuses,
+        start=start,
+        end=end,
+        dt=dt,
+        min_duration=minDuration,
+        max_duration=maxDuration,
     )
 
-    async with request.app.state.readpool.acquire() as conn:
-        q, p = render(
-            """
-            WITH jobs AS (
-                SELECT
-                    a.action_name,
-                    a.action_uuid,
-                    a.handler_type,
-                    t.status AS status,
-                    t.created_at,
-                    t.last_update,
-                    a.payload_uuid,
-                    t.started_at,
-                    CASE
-                        WHEN t.status = 'RUNNING'
-                            THEN EXTRACT(EPOCH FROM (NOW() - t.started_at))
-                        WHEN :completed_where
-                            THEN EXTRACT(EPOCH FROM (t.last_update - t.started_at))
-                    END AS duration
-                FROM swoop.action a
-                INNER JOIN swoop.thread t
-                ON t.action_uuid = a.action_uuid
-                WHERE a.action_type = 'workflow'
-                AND (:processes::text[] IS NULL OR :proc_where)
-                AND (:types::text[] IS NULL OR :type_where)
-                AND (:jobs::uuid[] IS NULL OR :job_where)
-                AND (:status::text[] IS NULL OR :status_where)
-                AND (:swoop_status::text[] IS NULL OR :swoop_status_where)
-                AND (
-                        (
-                            a.created_at >= :start_datetime::TIMESTAMPTZ
-                            OR :start_datetime::TIMESTAMPTZ IS NULL
-                        )
-                        AND
-                        (
-                            a.created_at <= :end_datetime::TIMESTAMPTZ
-                            OR :end_datetime::TIMESTAMPTZ IS NULL
-                        )
-                )
-                AND (
-                    a.created_at = :dt::TIMESTAMPTZ
-                    OR :dt::TIMESTAMPTZ IS NULL
-                )
-            )
-            SELECT *
-            FROM jobs
-            WHERE
-                (
-                    (
-                        duration IS NOT NULL
-
-                        AND
-                        (
-                            duration >= :min_duration::integer
-                            OR :min_duration::integer IS NULL
-                        )
-                        AND
-                        (
-                            duration <= :max_duration::integer
-                            OR :max_duration::integer IS NULL
-                        )
-                        AND
-                        (
-                            CASE
-                                WHEN :status::text[] IS NULL AND
-                                    (:min_duration::integer IS NOT NULL OR
-                                    :max_duration::integer IS NOT NULL)
-                                THEN :dur_status_where ELSE TRUE
-                            END
-                        )
-                    )
 
-                    OR (
-                        CASE
-                            WHEN duration IS NULL AND
-                                (:min_duration::integer IS NOT NULL OR
-                                :max_duration::integer IS NOT NULL)
-                            THEN :dur_status_where
-                        END
-                    )
+def check_limit(request: Request, limit: int) -> None:
+    max_limit = request.app.state.settings.job_max_limit
+    if limit > max_limit:
+        raise HTTPException(
+            status_code=422,
+            detail=f"The limit parameter must not exceed {max_limit}, "
+            "use /jobs/export for larger result sets.",
+        )
 
-                    OR (
-                        duration IS NULL
-                        AND (:min_duration::integer IS NULL AND
-                            :max_duration::integer IS NULL)
-                    )
+
+@router.get(
+    "",
+    response_model=JobList,
+    responses={"404": {"model": APIException}, "422": {"model": APIException}},
+    response_model_exclude_unset=True,
+)
+async def list_workflow_executions(
+    request: Request,
+    job_filter: Annotated[JobFilter, Depends(get_job_filter)],
+    limit: int = Query(ge=1, default=DEFAULT_JOB_LIMIT),
+    lastID: UUID | None = None,
+    sortby: JobSortBy | None = None,
+    cursor: str | None = None,
+) -> JobList | APIException:
+    """
+    Returns a list of all available workflow executions
+    """
+    check_limit(request, limit)
+
+    job_cursor = None
+    if sortby is None:
+        if cursor is not None:
+            raise HTTPException(
+                status_code=422,
+                detail="The cursor parameter requires sortby.",
+            )
+    else:
+        if lastID is not None:
+            raise HTTPException(
+                status_code=422,
+                detail="The lastID parameter cannot be used with sortby, use cursor.",
+            )
+        if cursor is not None:
+            try:
+                job_cursor = JobCursor.decode(cursor)
+            except ValueError:
+                raise HTTPException(status_code=422, detail="Invalid cursor.")
+            if job_cursor.sortby != sortby:
+                raise HTTPException(
+                    status_code=422,
+                    detail="The cursor does not match the sortby parameter.",
                 )
-                AND
-                (:last::uuid IS NULL OR action_uuid < :last)
-            ORDER BY action_uuid DESC
-            LIMIT :limit
-            """,
-            processes=processID,
-            proc_where=proc_clause,
-            types=types,
-            type_where=type_clause,
-            jobs=jobID,
-            job_where=job_clause,
-            status=statuses,
-            status_where=status_clause,
-            swoop_status=swoop_status,
-            swoop_status_where=swoop_status_clause,
-            dur_status_where=duration_status_clause,
-            completed_where=completed_status_clause,
-            start_datetime=start,
-            end_datetime=end,
-            dt=dt,
-            limit=limit + 1,
-            min_duration=minDuration,
-            max_duration=maxDuration,
-            last=lastID,
-        )
+
+    q, p = list_jobs_query(
+        job_filter,
+        limit=limit + 1,
+        last=lastID,
+        sortby=sortby,
+        cursor=job_cursor,
+    )
+
+    async with db_reader(request) as conn:
         records = await conn.fetch(q, *p)
 
     links = [
@@ -216,10 +353,15 @@ async def list_workflow_executions(
 
     if len(records) > limit:
         records.pop(-1)
-        lastID = records[-1]["action_uuid"]
+        if sortby is None:
+            next_params = {"lastID": records[-1]["action_uuid"]}
+        else:
+            next_params = {
+                "cursor": JobCursor.from_record(sortby, records[-1]).encode(),
+            }
         links.append(
             Link.next_link(
-                href=str(request.url.include_query_params(lastID=lastID)),
+                href=str(request.url.include_query_params(**next_params)),
             ),
         )
 
@@ -229,6 +371,432 @@ async def list_workflow_executions(
     )
 
 
+async def stream_jobs(
+    request: Request,
+    cursor: Cursor,
+    records: list,
+    resources: AsyncExitStack,
+    export_format: ExportFormat,
+) -> AsyncIterator[str]:
+    """
+    Serialize the jobs read through `cursor` one chunk at a time, starting
+    with the already fetched `records`, then close `resources`.
+
+    Rows are read through a server-side cursor, and each chunk is only
+    fetched once the previous one has been sent to the client, so memory
+    use is bounded by the chunk size regardless of the number of jobs.
+    """
+    chunk_size = request.app.state.settings.job_export_chunk_size
+    first = True
+
+    def encode(chunk: list[str]) -> str:
+        if export_format == ExportFormat.ndjson:
+            return "".join(f"{job}\n" for job in chunk)
+        return ("[" if first else ",") + ",".join(chunk)
+
+    try:
+        while records:
+            yield encode(
+                [
+                    StatusInfo.from_action_record(record, request).model_dump_json(
+                        exclude_unset=True
+                    )
+                    for record in records
+                ]
+            )
+            first = False
+            if len(records) < chunk_size:
+                break
+            records = await cursor.fetch(chunk_size)
+    finally:
+        await resources.aclose()
+
+    if export_format == ExportFormat.json:
+        yield "[]" if first else "]"
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        "200": {
+            "content": {
+                "application/x-ndjson": {},
+                "application/json": {},
+            },
+        },
+        "422": {"model": APIException},
+    },
+)
+async def export_workflow_executions(
+    request: Request,
+    job_filter: Annotated[JobFilter, Depends(get_job_filter)],
+    export_format: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.ndjson,
+    sortby: JobSortBy | None = None,
+    limit: Annotated[int | None, Query(ge=1)] = None,
+) -> StreamingResponse:
+    """
+    Streams all matching workflow executions as NDJSON or a JSON array
+    """
+    q, p = list_jobs_query(job_filter, limit=limit, sortby=sortby)
+
+    # acquire the connection and read the first chunk before responding,
+    # so a busy database or a failing query is still answered with an
+    # error status rather than a truncated stream
+    async with AsyncExitStack() as stack:
+        conn = await stack.enter_async_context(db_reader(request))
+        await stack.enter_async_context(conn.transaction(readonly=True))
+        cursor = await conn.cursor(q, *p)
+        records = await cursor.fetch(request.app.state.settings.job_export_chunk_size)
+        resources = stack.pop_all()
+
+    return StreamingResponse(
+        stream_jobs(request, cursor, records, resources, export_format),
+        media_type=(
+            "application/x-ndjson"
+            if export_format == ExportFormat.ndjson
+            else "application/json"
+        ),
+        # releases the connection should the stream never start
+        background=BackgroundTask(resources.aclose),
+    )
+
+
+@router.get(
+    "/facets",
+    response_model=JobFacets,
+    responses={"422": {"model": APIException}},
+)
+async def get_workflow_execution_facets(
+    request: Request,
+    job_filter: Annotated[JobFilter, Depends(get_job_filter)],
+) -> JobFacets | APIException:
+    """
+    Returns counts of matching workflow executions by process, type and status
+    """
+    q, p = job_facets_query(job_filter)
+    cache = request.app.state.job_facets_cache
+    key = (q, repr(p))
+
+    records = cache.get(key)
+    if records is MISSING:
+        async with db_reader(request) as conn:
+            records = await conn.fetch(q, *p)
+        cache.set(key, records)
+
+    return JobFacets.from_records(
+        records,
+        links=[
+            Link.root_link(request),
+            Link.self_link(href=str(request.url)),
+        ],
+    )
+
+
+@router.get(
+    "/analytics",
+    response_model=JobAnalytics,
+    responses={
+        "422": {"model": APIException},
+        "503": {"model": APIException},
+    },
+)
+async def get_workflow_execution_analytics(
+    request: Request,
+    processID: Annotated[list[str] | None, Query()] = None,
+    window: Annotated[int, Query(ge=1)] = 3600,
+    bucket: Annotated[int, Query(ge=1)] = 60,
+) -> JobAnalytics | APIException:
+    """
+    Returns duration percentiles and completions per time bucket for each
+    workflow, over the last `window` seconds of complete buckets
+    """
+    settings = request.app.state.settings
+
+    if window > settings.analytics_max_window:
+        raise HTTPException(
+            status_code=422,
+            detail=f"The window must not exceed {settings.analytics_max_window}.",
+        )
+    if window % bucket:
+        raise HTTPException(
+            status_code=422,
+            detail="The window must be a multiple of the bucket size.",
+        )
+    if window // bucket > settings.analytics_max_buckets:
+        raise HTTPException(
+            status_code=422,
+            detail=f"The window must not exceed {settings.analytics_max_buckets} "
+            "buckets.",
+        )
+
+    start, end = analytics_window(window, bucket)
+
+    cache = request.app.state.analytics_cache
+    key = (tuple(processID) if processID else processID, start, end, bucket)
+    analytics = cache.get(key)
+
+    if analytics is MISSING:
+        try:
+            async with (
+                db_reader(request) as conn,
+                conn.transaction(readonly=True),
+            ):
+                await conn.execute(
+                    "SELECT set_config('statement_timeout', $1, true)",
+                    str(settings.analytics_statement_timeout),
+                )
+                q, p = job_duration_percentiles_query(processID, start, end)
+                percentiles = await conn.fetch(q, *p)
+                q, p = job_throughput_query(processID, start, end, bucket)
+                throughput = await conn.fetch(q, *p)
+        except QueryCanceledError:
+            raise HTTPException(
+                status_code=503,
+                detail="Analytics query timed out, "
+                "try a smaller window or filtering by processID.",
+            )
+
+        analytics = JobAnalytics.from_records(
+            start=start,
+            end=end,
+            bucket=bucket,
+            percentiles=percentiles,
+            throughput=throughput,
+        )
+        cache.set(key, analytics)
+
+    return analytics.model_copy(
+        update={
+            "links": [
+                Link.root_link(request),
+                Link.self_link(href=str(request.url)),
+            ],
+        },
+    )
+
+
+@router.get(
+    "/changes",
+    response_model=JobList,
+    responses={"422": {"model": APIException}},
+    response_model_exclude_unset=True,
+)
+async def list_workflow_execution_changes(
+    request: Request,
+    job_filter: Annotated[JobFilter, Depends(get_job_filter)],
+    limit: int = Query(ge=1, default=DEFAULT_JOB_LIMIT),
+    cursor: str | None = None,
+) -> JobList | APIException:
+    """
+    Returns workflow executions updated since the cursor, oldest change first
+
+    Changes are ordered by the time of their status event. An event recorded
+    well after the time it reports may be behind a cursor already handed
+    out, and is not returned again, so clients needing every change should
+    still reconcile with the job listing from time to time.
+    """
+    check_limit(request, limit)
+
+    job_cursor = None
+    if cursor is not None:
+        try:
+            job_cursor = JobCursor.decode(cursor)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid cursor.")
+        if job_cursor.sortby != JobSortBy.updated:
+            raise HTTPException(
+                status_code=422,
+                detail="The cursor is not a change feed cursor.",
+            )
+
+    q, p = job_changes_query(
+        job_filter,
+        limit=limit,
+        cursor=job_cursor,
+        settle_time=request.app.state.settings.job_changes_settle_time,
+    )
+
+    async with db_reader(request) as conn:
+        records = await conn.fetch(q, *p)
+
+    # the feed never ends, next always points at the latest position
+    if records:
+        cursor = JobCursor.from_record(JobSortBy.updated, records[-1]).encode()
+
+    links = [
+        Link.root_link(request),
+        Link.self_link(href=str(request.url)),
+        Link.next_link(
+            href=str(
+                request.url.include_query_params(cursor=cursor)
+                if cursor is not None
+                else request.url
+            ),
+        ),
+    ]
+
+    return JobList(
+        jobs=[StatusInfo.from_action_record(record, request) for record in records],
+        links=links,
+    )
+
+
+def format_job_event(request: Request, record) -> tuple[JobCursor, str]:
+    cursor = JobCursor.from_record(JobSortBy.updated, record)
+    data = StatusInfo.from_action_record(record, request).model_dump_json(
+        exclude_unset=True
+    )
+    return cursor, f"id: {cursor.encode()}\nevent: status\ndata: {data}\n\n"
+
+
+async def fetch_job_changes(
+    request: Request,
+    job_filter: JobFilter,
+    cursor: JobCursor,
+) -> list:
+    """Read a chunk of the change feed for `job_filter` after `cursor`."""
+    settings = request.app.state.settings
+    q, p = job_changes_query(
+        job_filter,
+        limit=settings.job_export_chunk_size,
+        cursor=cursor,
+        settle_time=settings.job_changes_settle_time,
+    )
+    async with db_reader(request) as conn:
+        return await conn.fetch(q, *p)
+
+
+async def stream_job_events(
+    request: Request,
+    job_filter: JobFilter,
+    subscription: Subscription,
+    cursor: JobCursor,
+    records: list | None,
+) -> AsyncIterator[str]:
+    """
+    Stream changes to jobs matching `job_filter` as server-sent events.
+
+    Live changes come from the shared job event hub. When resuming from a
+    `Last-Event-ID`, starting with the first chunk of the change feed after
+    it in `records`, or after falling too far behind the hub, the stream
+    first catches up by reading the change feed from its last position.
+    """
+    settings = request.app.state.settings
+    hub = request.app.state.job_events
+    limit = settings.job_export_chunk_size
+
+    async def catch_up(records: list) -> AsyncIterator[str]:
+        nonlocal cursor
+        while True:
+            for record in records:
+                cursor, event = format_job_event(request, record)
+                yield event
+            if len(records) < limit:
+                return
+            records = await fetch_job_changes(request, job_filter, cursor)
+
+    try:
+        if records is not None:
+            async for event in catch_up(records):
+                yield event
+
+        while True:
+            if subscription.overflowed:
+                subscription.reset()
+                records = await fetch_job_changes(request, job_filter, cursor)
+                async for event in catch_up(records):
+                    yield event
+
+            try:
+                record = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    settings.job_events_keepalive,
+                )
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            # skip changes already sent while catching up
+            if (record["last_update"], record["action_uuid"]) <= (
+                cursor.value,
+                cursor.action_uuid,
+            ):
+                continue
+
+            cursor, event = format_job_event(request, record)
+            yield event
+    except DatabaseBusyError:
+        # the response has started, so end the stream instead, and have the
+        # client resume from its last event once the database has recovered
+        yield f"retry: {settings.db_retry_after * 1000}\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={
+        "200": {"content": {"text/event-stream": {}}},
+        "422": {"model": APIException},
+    },
+)
+async def stream_workflow_execution_events(
+    request: Request,
+    job_filter: Annotated[JobFilter, Depends(get_job_filter)],
+    last_event_id: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    """
+    Streams workflow execution status changes as server-sent events
+    """
+    if any(
+        value is not None
+        for value in (
+            job_filter.start,
+            job_filter.end,
+            job_filter.dt,
+            job_filter.min_duration,
+            job_filter.max_duration,
+        )
+    ):
+        raise HTTPException(
+            status_code=422,
+            detail="Job events can only be filtered by process, type, job and status.",
+        )
+
+    cursor = None
+    if last_event_id is not None:
+        try:
+            cursor = JobCursor.decode(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid Last-Event-ID.")
+        if cursor.sortby != JobSortBy.updated:
+            raise HTTPException(status_code=422, detail="Invalid Last-Event-ID.")
+
+    hub = request.app.state.job_events
+    subscription = await hub.subscribe(job_filter)
+    records = None
+    try:
+        if cursor is None:
+            cursor = subscription.cursor
+        else:
+            # read the first chunk to resume from before responding, so a
+            # busy database is still answered with an error status
+            records = await fetch_job_changes(request, job_filter, cursor)
+    except BaseException:
+        hub.unsubscribe(subscription)
+        raise
+
+    return StreamingResponse(
+        stream_job_events(request, job_filter, subscription, cursor, records),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # unsubscribes should the stream never start
+        background=BackgroundTask(hub.unsubscribe, subscription),
+    )
+
+
 @router.get(
     "/{jobID}",
     response_model=StatusInfo,
@@ -239,31 +807,21 @@ async def list_workflow_executions(
     response_model_exclude_unset=True,
 )
 async def get_workflow_execution_details(
-    request: Request, jobID: UUID
+    request: Request,
+    jobID: UUID,
+    wait: Annotated[float | None, Query(gt=0)] = None,
+    status: Annotated[list[StatusCode] | None, Query()] = None,
 ) -> StatusInfo | APIException:
     """
     Returns workflow execution status by jobID
+
+    With `wait`, blocks for up to that many seconds until the job status
+    changes, or until it reaches one of the given `status` values.
     """
-    async with request.app.state.readpool.acquire() as conn:
-        q, p = render(
-            """
-                SELECT
-                    a.action_name,
-                    a.action_uuid,
-                    t.status,
-                    t.created_at,
-                    t.last_update,
-                    a.payload_uuid,
-                    t.started_at
-                FROM swoop.action a
-                INNER JOIN swoop.thread t
-                ON t.action_uuid = a.action_uuid
-                WHERE a.action_type = 'workflow'
-                AND a.action_uuid = :job_id::uuid;
-            """,
-            job_id=jobID,
-        )
-        record = await conn.fetchrow(q, *p)
+    if wait is None:
+        record = await fetch_job(request, jobID)
+    else:
+        record = await wait_for_job(request, jobID, wait, status)
 
     if not record:
         job_not_found()
@@ -271,22 +829,84 @@ async def get_workflow_execution_details(
     return StatusInfo.from_action_record(record, request)
 
 
-async def should_have_job_results(request: Request, jobID: UUID) -> None:
-    async with request.app.state.readpool.acquire() as conn:
-        q, p = render(
-            """
-            SELECT
-                t.status as status,
-                t.error as error
-            FROM swoop.action a
-            INNER JOIN swoop.thread t ON t.action_uuid = a.action_uuid
-            WHERE
-                a.action_type = 'workflow'
-                AND a.action_uuid = :job_id::uuid
-            """,
-            job_id=jobID,
+async def fetch_job(request: Request, jobID: UUID):
+    loader = request.app.state.job_loader
+    min_lsn = request_lsn(request)
+    if min_lsn is None:
+        return await loader.load(jobID)
+    # reads that must see the client's own writes need a particular reader,
+    # or the writer, so are not batched
+    pool = await request.app.state.db.read_pool(min_lsn)
+    return await loader.fetch(pool, jobID)
+
+
+async def wait_for_job(
+    request: Request,
+    jobID: UUID,
+    timeout: float,
+    targets: list[StatusCode] | None,
+):
+    """
+    Wait for a job's status to change, or to reach one of `targets`.
+
+    Waiters subscribe to the shared job event hub rather than polling, so
+    the only queries per waiter are the initial lookup and, on timeout, a
+    final one. Returns the latest known job record once done or after
+    `timeout` seconds.
+    """
+    max_wait = request.app.state.settings.job_wait_max
+    if timeout > max_wait:
+        raise HTTPException(
+            status_code=422,
+            detail=f"The wait parameter must not exceed {max_wait}.",
         )
-        record = await conn.fetchrow(q, *p)
+
+    def done(status: str) -> bool:
+        if targets is None:
+            return status != initial_status
+        return StatusCode.from_swoop_status(status) in targets
+
+    hub = request.app.state.job_events
+    # subscribe before the lookup so no change after it can be missed
+    subscription = await hub.subscribe(JobFilter(jobs=[jobID]))
+    try:
+        record = await fetch_job(request, jobID)
+        if record is None:
+            return None
+
+        initial_status = record["status"]
+        if targets is not None and done(initial_status):
+            return record
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), remaining)
+            except TimeoutError:
+                break
+            if subscription.overflowed:
+                # changes were dropped, so look the job up again
+                subscription.reset()
+                event = await fetch_job(request, jobID) or event
+            if event["last_update"] <= record["last_update"]:
+                continue
+            record = event
+            if done(record["status"]):
+                return record
+
+        # the hub only sees changes after the settle time and the next
+        # notification or poll, so look for one it has not delivered yet
+        latest = await fetch_job(request, jobID)
+        if latest is not None and latest["last_update"] > record["last_update"]:
+            return latest
+        return record
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def should_have_job_results(request: Request, jobID: UUID) -> None:
+    record = await fetch_job(request, jobID)
 
     if not record:
         job_not_found()
@@ -313,6 +933,7 @@ async def should_have_job_results(request: Request, jobID: UUID) -> None:
     response_model=None,
     responses={
         "200": {"model": Payload},
+        "303": {"description": "Redirect to presigned payload URL"},
         "404": {"model": APIException},
         "500": {"model": APIException},
     },
@@ -320,17 +941,26 @@ async def should_have_job_results(request: Request, jobID: UUID) -> None:
 async def get_workflow_execution_result_payload(
     request: Request,
     jobID: UUID,
-) -> JSONResponse | APIException:
+) -> Response | APIException:
     """
     Retrieves workflow execution output payload by jobID
     """
     await should_have_job_results(request, jobID)
-    results = request.app.state.io.get_object(f"/executions/{jobID}/output.json")
+    object_name = f"/executions/{jobID}/output.json"
+
+    if prefers_redirect(request):
+        redirect = await object_redirect(request, object_name)
+        if redirect is not None:
+            return redirect
 
-    if not results:
+    response = await run_in_threadpool(
+        request.app.state.io.object_response, object_name
+    )
+
+    if response is None:
         raise HTTPException(status_code=404)
 
-    return JSONResponse(results)
+    return response
 
 
 @router.get(
@@ -361,14 +991,20 @@ async def get_workflow_execution_result(
     # Per the spec, we're supposed to support PREFER header to conditionally
     # include payload contents in response, but we can choose to ignore that
     # header so we simply always return the payload by reference
+    href = None
+    if prefers_redirect(request):
+        # advertise the object storage location directly so clients
+        # can skip the extra hop through the API for the download
+        href = await presigned_url(request, f"/executions/{jobID}/output.json")
+    if not href:
+        href = str(
+            request.url_for("get_workflow_execution_result_payload", jobID=jobID)
+        )
+
     return Results(
         **{
             "payload": Link(
-                href=str(
-                    request.url_for(
-                        "get_workflow_execution_result_payload", jobID=jobID
-                    )
-                ),
+                href=href,
                 type="application/json",
             ),
         }
@@ -379,20 +1015,40 @@ async def get_workflow_execution_result(
     "/{jobID}/inputs",
     response_model=dict,
     responses={
+        "303": {"description": "Redirect to presigned payload URL"},
         "404": {"model": APIException},
         "500": {"model": APIException},
     },
 )
-async def get_workflow_execution_inputs(request: Request, jobID) -> dict | APIException:
+async def get_workflow_execution_inputs(
+    request: Request, jobID
+) -> Response | APIException:
     """
     Retrieves workflow execution input payload by jobID
     """
-    payload = request.app.state.io.get_object(f"/executions/{jobID}/input.json")
+    object_name = f"/executions/{jobID}/input.json"
+
+    if prefers_redirect(request):
+        # the redirect is made without reading the object, so check the job
+        # exists to answer unknown jobs with a 404 as the proxied path does
+        try:
+            record = await fetch_job(request, UUID(jobID))
+        except ValueError:
+            record = None
+        if not record:
+            job_not_found()
+        redirect = await object_redirect(request, object_name)
+        if redirect is not None:
+            return redirect
+
+    response = await run_in_threadpool(
+        request.app.state.io.object_response, object_name
+    )
 
-    if not payload:
+    if response is None:
         raise HTTPException(status_code=404)
 
-    return payload
+    return response
 
 
 # @router.post(
@@ -8,6 +8,7 @@ from fastapi import APIRouter, Query, Request, Response
 from fastapi.encoders import jsonable_encoder
 from pydantic import ValidationError
 
+from swoop.api.db import db_reader, set_commit_lsn
 from swoop.api.exceptions import HTTPException
 from swoop.api.models.payloads import Invalid, PayloadCacheEntry, PayloadCacheList
 from swoop.api.models.shared import APIException, Link
@@ -36,7 +37,7 @@ async def list_input_payload_cache_entries(
     """
     proc_clause = V("workflow_name") == funcs.any(processID)
 
-    async with request.app.state.readpool.acquire() as conn:
+    async with db_reader(request) as conn:
         q, p = render(
             """
             SELECT
@@ -86,7 +87,7 @@ async def get_payload_cache_entry_from_db(
     request: Request,
     payload_uuid: UUID,
 ) -> PayloadCacheEntry:
-    async with request.app.state.readpool.acquire() as conn:
+    async with db_reader(request) as conn:
         q, p = render(
             """
             SELECT
@@ -199,21 +200,37 @@ async def update_input_payload_cache_entry_invalidation(
     """
     Set invalidAfter property on a payload cache entry
     """
-    async with request.app.state.readpool.acquire() as conn:
-        q, p = render(
-            """
-            UPDATE
-                swoop.payload_cache
-                SET invalid_after = :invalid_after::timestamptz
-            WHERE
-                payload_uuid=:payload_id::uuid;
-            """,
-            payload_id=payloadID,
-            invalid_after=body.invalidAfter,
-        )
-        response = await conn.execute(q, *p)
+    async with request.app.state.writepool.acquire() as conn:
+        async with conn.transaction():
+            q, p = render(
+                """
+                UPDATE
+                    swoop.payload_cache
+                    SET invalid_after = :invalid_after::timestamptz
+                WHERE
+                    payload_uuid=:payload_id::uuid;
+                """,
+                payload_id=payloadID,
+                invalid_after=body.invalidAfter,
+            )
+            response = await conn.execute(q, *p)
+
+            if not response or response == "UPDATE 0":
+                raise HTTPException(status_code=404, detail="Payload ID not found")
+
+            # tell every API process to drop its cached action for the
+            # payload; the notification is only sent on commit
+            q, p = render(
+                "SELECT pg_notify(:channel, :payload_id::text)",
+                channel=request.app.state.settings.payload_cache_channel,
+                payload_id=payloadID,
+            )
+            await conn.execute(q, *p)
+
+        lsn = await request.app.state.db.commit_lsn(conn)
 
-    if not response or response == "UPDATE 0":
-        raise HTTPException(status_code=404, detail="Payload ID not found")
+    request.app.state.payload_action_cache.invalidate(payloadID)
 
-    return Response()
+    response = Response()
+    set_commit_lsn(response, lsn)
+    return response
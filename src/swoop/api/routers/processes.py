@@ -2,16 +2,23 @@ from __future__ import annotations
 
 import json
 from typing import Annotated, Any
+from uuid import UUID
 
-from buildpg import Values, render
-from fastapi import APIRouter, Query, Request
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, RedirectResponse
+from jsonschema import ValidationError
 
+from swoop.api.db import set_commit_lsn
 from swoop.api.exceptions import HTTPException
-from swoop.api.models.jobs import StatusInfo
+from swoop.api.models.jobs import (
+    BatchExecutionItem,
+    BatchExecutionResults,
+    StatusInfo,
+)
 from swoop.api.models.shared import APIException, Link
 from swoop.api.models.workflows import Process, ProcessList, Workflow
-from swoop.api.routers.jobs import get_workflow_execution_details
+from swoop.api.submissions import submit_payloads, submit_workflow_query
 
 DEFAULT_PROCESS_LIMIT = 1000
 
@@ -187,6 +194,64 @@ async def get_process_outputs_schema(
     )
 
 
+def job_redirect(request: Request, action_uuid: UUID) -> RedirectResponse:
+    return RedirectResponse(
+        request.url_for("get_workflow_execution_details", jobID=action_uuid),
+        status_code=303,
+    )
+
+
+def parse_execute_request(workflow: Workflow, body: Any) -> tuple[Any, UUID]:
+    """Validate an execute request, returning its payload and payload UUID"""
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=422, detail="execute request must be an object")
+
+    inputs = body.get("inputs", None)
+
+    if inputs is None:
+        raise HTTPException(status_code=422, detail="inputs required")
+
+    workflow.validate_inputs(inputs)
+
+    payload = inputs.get("payload", {}).get("value")
+
+    return payload, workflow.generate_payload_uuid(payload)
+
+
+async def submit_workflow(
+    request: Request,
+    workflow: Workflow,
+    payload: Any,
+    payload_uuid: UUID,
+):
+    """Submit a single payload, returning the job record and if it was cached"""
+    q, p = submit_workflow_query(
+        workflow,
+        payload_uuid,
+        request.app.state.settings.execution_legacy_payload_locks,
+    )
+
+    async with request.app.state.writepool.acquire() as conn:
+        async with conn.transaction():
+            record = await conn.fetchrow(q, *p)
+
+            if not record["cached"]:
+                # the upload holds the payload lock, but cannot move out of
+                # it: the object is named by the new action's UUID, so it
+                # cannot be made before the insert, and the job is
+                # processable as soon as it commits, so the input must
+                # exist by then
+                await run_in_threadpool(
+                    request.app.state.io.put_object,
+                    object_name=f"executions/{record['action_uuid']}/input.json",
+                    object_content=json.dumps(payload).encode("utf-8"),
+                )
+
+        await request.app.state.db.commit_lsn(conn)
+
+    return record, record["cached"]
+
+
 @router.post(
     "/{processID}/execution",
     response_model=None,
@@ -202,6 +267,7 @@ async def get_process_outputs_schema(
 async def execute_workflow(
     processID: str,
     request: Request,
+    response: Response,
     body: dict[str, Any],
 ) -> RedirectResponse | StatusInfo | APIException:
     """
@@ -212,86 +278,169 @@ async def execute_workflow(
     except KeyError:
         process_not_found()
 
-    inputs = body.get("inputs", None)
+    payload, payload_uuid = parse_execute_request(workflow, body)
+
+    db = request.app.state.db
+    cache = request.app.state.payload_action_cache
+    action_uuid = cache.get(payload_uuid, workflow.version)
+    if action_uuid is not None:
+        redirect = job_redirect(request, action_uuid)
+        # the job was cached after a commit position at or before this one
+        set_commit_lsn(redirect, db.known_commit_lsn())
+        return redirect
+    token = cache.token()
+
+    async def submit():
+        queue = request.app.state.submission_queue
+        if queue is not None:
+            return await queue.submit(workflow, payload, payload_uuid)
+        return await submit_workflow(request, workflow, payload, payload_uuid)
+
+    # identical submissions already in flight in this process share its
+    # outcome rather than each taking a connection to wait on the lock
+    (record, cached), shared = await request.app.state.submission_flights.do(
+        payload_uuid,
+        submit,
+    )
 
-    if inputs is None:
-        raise HTTPException(status_code=422, detail="inputs required")
+    # only the submission that ran gets the new job; the others see it as
+    # already existing, as they would have had they run after it
+    cached = cached or shared
 
-    workflow.validate_inputs(inputs)
+    # so the client's next reads see the job, even on a lagging reader; the
+    # submission read the commit position after committing, on its own
+    # connection or the queue's
+    lsn = db.known_commit_lsn()
 
-    payload = inputs.get("payload", {}).get("value")
+    # either way, the payload now resolves to this job until it fails or
+    # the payload is invalidated
+    cache.set(payload_uuid, workflow.version, record["action_uuid"], token)
 
-    payload_uuid = workflow.generate_payload_uuid(payload)
+    if cached:
+        redirect = job_redirect(request, record["action_uuid"])
+        set_commit_lsn(redirect, lsn)
+        return redirect
 
-    # cut the uuid down into a 32-bit int for use as a lock value
-    lock_id = payload_uuid.int & 0xFFFF
+    set_commit_lsn(response, lsn)
 
-    async with request.app.state.writepool.acquire() as conn:
-        async with conn.transaction():
-            q, p = render(
-                """
-                SELECT pg_advisory_xact_lock(
-                    to_regclass('swoop.payload_cache')::oid::integer,:lock_id
-                )
-                """,
-                lock_id=lock_id,
-            )
+    # the status comes from the insert itself rather than a lookup on a
+    # possibly lagging reader
+    return StatusInfo.from_action_record(record, request)
 
-            await conn.execute(q, *p)
 
-            q, p = render(
-                """
-                SELECT swoop.find_cached_action_for_payload(
-                    :payload_uuid,
-                    :wf_version::smallint
-                )
-                """,
-                payload_uuid=payload_uuid,
-                wf_version=workflow.version,
-            )
-            action_uuid = await conn.fetchval(q, *p)
-
-            if action_uuid:
-                return RedirectResponse(
-                    request.url_for(
-                        "get_workflow_execution_details", jobID=action_uuid
-                    ),
-                    status_code=303,
-                )
+async def read_batch_items(request: Request) -> list[Any]:
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            return [json.loads(line) for line in body.splitlines() if line.strip()]
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="invalid JSON body") from None
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=422,
+            detail="batch body must be an array of execute requests",
+        )
+    return items
 
-            q, p = render(
-                """
-                INSERT INTO swoop.payload_cache (:values__names) VALUES :values
-                ON CONFLICT (payload_uuid) DO UPDATE
-                SET invalid_after = NULL
-                """,
-                values=Values(
-                    payload_uuid=payload_uuid,
-                    workflow_name=workflow.id,
-                ),
-            )
-            await conn.execute(q, *p)
-
-            q, p = render(
-                """
-                INSERT INTO swoop.action (:values__names)
-                VALUES :values
-                RETURNING action_uuid
-                """,
-                values=Values(
-                    action_type="workflow",
-                    action_name=workflow.id,
-                    handler_name=workflow.handler,
-                    handler_type=workflow.handlerType,
-                    workflow_version=workflow.version,
-                    payload_uuid=payload_uuid,
-                ),
-            )
-            action_uuid = await conn.fetchval(q, *p)
 
-            request.app.state.io.put_object(
-                object_name=f"executions/{action_uuid}/input.json",
-                object_content=json.dumps(payload),
-            )
+@router.post(
+    "/{processID}/execution:batch",
+    response_model=BatchExecutionResults,
+    responses={
+        "404": {"model": APIException},
+        "422": {"model": APIException},
+    },
+    response_model_exclude_none=True,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"type": "object"}},
+                },
+                "application/x-ndjson": {
+                    "schema": {"type": "string"},
+                },
+            },
+        },
+    },
+)
+async def execute_workflow_batch(
+    processID: str,
+    request: Request,
+    response: Response,
+) -> BatchExecutionResults | APIException:
+    """
+    Starts workflow executions (Jobs) for a batch of execute requests
 
-    return await get_workflow_execution_details(request, jobID=action_uuid)
+    Takes a JSON array of execute requests, or one per line as NDJSON.
+    Results are reported per item, in request order.
+    """
+    try:
+        workflow: Workflow = request.app.state.workflows[processID]
+    except KeyError:
+        process_not_found()
+
+    settings = request.app.state.settings
+    items = await read_batch_items(request)
+
+    if len(items) > settings.execution_batch_max_size:
+        raise HTTPException(
+            status_code=422,
+            detail=f"batch size must be at most {settings.execution_batch_max_size}",
+        )
+
+    results: list[BatchExecutionItem] = []
+    payloads: dict[UUID, Any] = {}
+    item_payloads: dict[int, UUID] = {}
+
+    for index, body in enumerate(items):
+        try:
+            payload, payload_uuid = parse_execute_request(workflow, body)
+        except HTTPException as e:
+            error = APIException(status=e.status_code, detail=e.detail)
+            results.append(BatchExecutionItem(index=index, error=error))
+            continue
+        except ValidationError as e:
+            error = APIException(status=422, detail=e.message)
+            results.append(BatchExecutionItem(index=index, error=error))
+            continue
+
+        payloads.setdefault(payload_uuid, payload)
+        item_payloads[index] = payload_uuid
+        results.append(BatchExecutionItem(index=index))
+
+    jobs = {}
+    if payloads:
+        async with request.app.state.writepool.acquire() as conn:
+            jobs = await submit_payloads(
+                conn,
+                request.app.state.io,
+                workflow,
+                payloads,
+                settings.execution_batch_upload_concurrency,
+                settings.execution_legacy_payload_locks,
+            )
+            await request.app.state.db.commit_lsn(conn)
+
+    seen: set[UUID] = set()
+    for result in results:
+        if result.error is not None:
+            continue
+        record, cached = jobs[item_payloads[result.index]]
+        action_uuid = record["action_uuid"]
+        # repeats of a payload within the batch share the first item's job
+        cached = cached or action_uuid in seen
+        seen.add(action_uuid)
+        result.jobID = str(action_uuid)
+        result.cached = cached
+
+    set_commit_lsn(response, request.app.state.db.known_commit_lsn())
+
+    return BatchExecutionResults(
+        created=sum(r.cached is False for r in results),
+        cached=sum(r.cached is True for r in results),
+        failed=sum(r.error is not None for r in results),
+        results=results,
+    )
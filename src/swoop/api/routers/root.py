@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any
+
 from fastapi import APIRouter, Request
 
 from swoop.api.models.root import ConfClasses, LandingPage
@@ -96,3 +98,16 @@ def get_conformance_classes(request: Request) -> ConfClasses | APIException:
             Link.self_link(href=str(request.url)),
         ],
     )
+
+
+@router.get(
+    "/metrics",
+    response_model=dict[str, dict[str, Any]],
+    responses={"500": {"model": APIException}},
+    tags=["Monitoring"],
+)
+def get_metrics(request: Request) -> dict[str, dict[str, Any]] | APIException:
+    """
+    process-local metrics for this API worker
+    """
+    return request.app.state.metrics.collect()
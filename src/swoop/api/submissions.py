@@ -0,0 +1,501 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+from uuid import UUID
+
+from asyncpg import Record
+from buildpg import render
+from fastapi.concurrency import run_in_threadpool
+
+from swoop.api.models.workflows import Workflow
+
+# earlier versions locked payload submissions with the two integer form of
+# advisory locks, keyed by the payload_cache table and the low 16 bits of
+# the payload, as swoop.db does for threads with the thread table
+LEGACY_PAYLOAD_LOCK_CLASS = "to_regclass('swoop.payload_cache')::oid::integer"
+
+
+def payload_lock_key(payload_uuid: UUID) -> int:
+    """
+    64-bit advisory lock key for submissions of a payload.
+
+    The two halves of the payload UUID are folded together. Single bigint
+    advisory locks are in a lock space of their own, apart from the two
+    integer locks swoop.db takes on threads.
+    """
+    key = (payload_uuid.int >> 64) ^ (payload_uuid.int & (2**64 - 1))
+    # postgres takes a signed int8
+    return key - 2**64 if key >= 2**63 else key
+
+
+def legacy_payload_lock_key(payload_uuid: UUID) -> int:
+    """The 16-bit payload lock key of earlier versions."""
+    return payload_uuid.int & 0xFFFF
+
+
+def submit_workflow_query(
+    workflow: Workflow,
+    payload_uuid: UUID,
+    legacy_lock: bool = False,
+) -> tuple[str, list[Any]]:
+    """
+    Submit a payload to a workflow in a single statement.
+
+    Takes the payload lock, then either returns the cached action with
+    `cached` set, or upserts the payload cache entry and inserts a new
+    action. The new action's thread row is inserted by trigger and is not
+    visible to this statement, so its initial PENDING status is built from
+    the inserted action instead, matching what the trigger writes.
+
+    The cache lookup reads from the locked CTE so the lock is always taken
+    first; being a volatile function it then sees any action committed by
+    a submission that held the lock before us.
+
+    With `legacy_lock`, the lock of earlier versions is taken first, so
+    submissions exclude those of processes not yet upgraded.
+    """
+    return render(
+        f"""
+        WITH legacy_locked AS MATERIALIZED (
+            SELECT pg_advisory_xact_lock(
+                {LEGACY_PAYLOAD_LOCK_CLASS},
+                :legacy_lock_key::integer
+            )
+            WHERE :legacy_lock_key::integer IS NOT NULL
+        ), locked AS MATERIALIZED (
+            SELECT pg_advisory_xact_lock(:lock_key::bigint)
+            FROM (SELECT count(*) FROM legacy_locked) AS legacy
+        ), cached AS MATERIALIZED (
+            SELECT swoop.find_cached_action_for_payload(
+                :payload_uuid::uuid,
+                :wf_version::smallint
+            ) AS action_uuid
+            FROM locked
+        ), payload AS (
+            INSERT INTO swoop.payload_cache (payload_uuid, workflow_name)
+            SELECT :payload_uuid::uuid, :workflow_name::text
+            FROM cached
+            WHERE cached.action_uuid IS NULL
+            ON CONFLICT (payload_uuid) DO UPDATE
+            SET invalid_after = NULL
+        ), inserted AS (
+            INSERT INTO swoop.action (
+                action_type,
+                action_name,
+                handler_name,
+                handler_type,
+                workflow_version,
+                payload_uuid
+            )
+            SELECT
+                'workflow',
+                :workflow_name::text,
+                :handler_name::text,
+                :handler_type::text,
+                :wf_version::smallint,
+                :payload_uuid::uuid
+            FROM cached
+            WHERE cached.action_uuid IS NULL
+            RETURNING action_name, action_uuid, created_at, payload_uuid
+        )
+        SELECT
+            true AS cached,
+            NULL::text AS action_name,
+            action_uuid,
+            NULL::text AS status,
+            NULL::timestamptz AS created_at,
+            NULL::timestamptz AS last_update,
+            :payload_uuid::uuid AS payload_uuid,
+            NULL::timestamptz AS started_at
+        FROM cached
+        WHERE action_uuid IS NOT NULL
+        UNION ALL
+        SELECT
+            false AS cached,
+            action_name,
+            action_uuid,
+            'PENDING' AS status,
+            created_at,
+            created_at AS last_update,
+            payload_uuid,
+            NULL::timestamptz AS started_at
+        FROM inserted
+        """,
+        legacy_lock_key=(
+            legacy_payload_lock_key(payload_uuid) if legacy_lock else None
+        ),
+        lock_key=payload_lock_key(payload_uuid),
+        payload_uuid=payload_uuid,
+        wf_version=workflow.version,
+        workflow_name=workflow.id,
+        handler_name=workflow.handler,
+        handler_type=workflow.handlerType,
+    )
+
+
+def lock_payloads_query(
+    payload_uuids: list[UUID],
+    legacy_locks: bool = False,
+) -> tuple[str, list[Any]]:
+    """
+    Take the submission locks for many payloads in one statement.
+
+    Keys are locked in sorted order, with any legacy locks all taken
+    before the others, so concurrent batches with overlapping payloads
+    cannot deadlock. The order is set in the query itself: volatile
+    functions in a select list are evaluated after its ORDER BY.
+    """
+    legacy_keys = (
+        sorted({legacy_payload_lock_key(u) for u in payload_uuids})
+        if legacy_locks
+        else []
+    )
+    return render(
+        f"""
+        WITH legacy_locked AS MATERIALIZED (
+            SELECT pg_advisory_xact_lock({LEGACY_PAYLOAD_LOCK_CLASS}, key)
+            FROM unnest(:legacy_keys::integer[]) AS key
+            ORDER BY key
+        )
+        SELECT count(*)
+        FROM (
+            SELECT pg_advisory_xact_lock(key)
+            FROM
+                unnest(:keys::bigint[]) AS key,
+                (SELECT count(*) FROM legacy_locked) AS legacy
+            ORDER BY key
+        ) AS locks
+        """,
+        legacy_keys=legacy_keys,
+        keys=sorted({payload_lock_key(payload_uuid) for payload_uuid in payload_uuids}),
+    )
+
+
+def cached_actions_query(
+    workflow: Workflow, payload_uuids: list[UUID]
+) -> tuple[str, list[Any]]:
+    """Look up the cached action, if any, for each of the payloads."""
+    return render(
+        """
+        SELECT
+            payload_uuid,
+            swoop.find_cached_action_for_payload(
+                payload_uuid,
+                :wf_version::smallint
+            ) AS action_uuid
+        FROM unnest(:payload_uuids::uuid[]) AS payload_uuid
+        """,
+        payload_uuids=payload_uuids,
+        wf_version=workflow.version,
+    )
+
+
+def insert_actions_query(
+    workflow: Workflow, payload_uuids: list[UUID]
+) -> tuple[str, list[Any]]:
+    """
+    Upsert payload cache entries and insert one action per payload,
+    returning each new action's initial PENDING status.
+    """
+    return render(
+        """
+        WITH payload AS (
+            INSERT INTO swoop.payload_cache (payload_uuid, workflow_name)
+            SELECT payload_uuid, :workflow_name::text
+            FROM unnest(:payload_uuids::uuid[]) AS payload_uuid
+            ON CONFLICT (payload_uuid) DO UPDATE
+            SET invalid_after = NULL
+        ), inserted AS (
+            INSERT INTO swoop.action (
+                action_type,
+                action_name,
+                handler_name,
+                handler_type,
+                workflow_version,
+                payload_uuid
+            )
+            SELECT
+                'workflow',
+                :workflow_name::text,
+                :handler_name::text,
+                :handler_type::text,
+                :wf_version::smallint,
+                payload_uuid
+            FROM unnest(:payload_uuids::uuid[]) AS payload_uuid
+            RETURNING action_name, action_uuid, created_at, payload_uuid
+        )
+        SELECT
+            action_name,
+            action_uuid,
+            'PENDING' AS status,
+            created_at,
+            created_at AS last_update,
+            payload_uuid,
+            NULL::timestamptz AS started_at
+        FROM inserted
+        """,
+        payload_uuids=payload_uuids,
+        workflow_name=workflow.id,
+        handler_name=workflow.handler,
+        handler_type=workflow.handlerType,
+        wf_version=workflow.version,
+    )
+
+
+async def upload_inputs(io, inputs: dict[UUID, Any], concurrency: int) -> None:
+    """Upload job inputs, keyed by action UUID, `concurrency` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def upload(action_uuid: UUID, payload: Any) -> None:
+        async with semaphore:
+            await run_in_threadpool(
+                io.put_object,
+                object_name=f"executions/{action_uuid}/input.json",
+                object_content=json.dumps(payload).encode("utf-8"),
+            )
+
+    async with asyncio.TaskGroup() as tg:
+        for action_uuid, payload in inputs.items():
+            tg.create_task(upload(action_uuid, payload))
+
+
+async def submit_payloads(
+    conn,
+    io,
+    workflow: Workflow,
+    payloads: dict[UUID, Any],
+    upload_concurrency: int,
+    legacy_locks: bool = False,
+) -> dict[UUID, tuple[Record, bool]]:
+    """
+    Submit many payloads to a workflow in one transaction.
+
+    Returns, for each payload UUID, the job record and whether it was
+    served from the payload cache. Cached job records only have the
+    action and payload UUIDs; new jobs have their initial status.
+    """
+    payload_uuids = list(payloads)
+    jobs: dict[UUID, tuple[Record, bool]] = {}
+
+    async with conn.transaction():
+        q, p = lock_payloads_query(payload_uuids, legacy_locks)
+        await conn.execute(q, *p)
+
+        q, p = cached_actions_query(workflow, payload_uuids)
+        for record in await conn.fetch(q, *p):
+            if record["action_uuid"]:
+                jobs[record["payload_uuid"]] = (record, True)
+
+        misses = [u for u in payload_uuids if u not in jobs]
+        if misses:
+            q, p = insert_actions_query(workflow, misses)
+            for record in await conn.fetch(q, *p):
+                jobs[record["payload_uuid"]] = (record, False)
+
+            # upload before commit so inputs exist once the jobs are
+            # processable
+            await upload_inputs(
+                io,
+                {jobs[u][0]["action_uuid"]: payloads[u] for u in misses},
+                upload_concurrency,
+            )
+
+    return jobs
+
+
+@dataclass
+class _Window:
+    workflow: Workflow
+    payloads: dict[UUID, Any] = field(default_factory=dict)
+    waiters: dict[UUID, list[asyncio.Future]] = field(default_factory=dict)
+    size: int = 0
+    handle: asyncio.TimerHandle | None = None
+
+
+class SubmissionQueue:
+    """
+    Group commit for single execute requests.
+
+    Submissions to a workflow arriving within `delay` seconds of each other,
+    up to `max_batch` of them, are submitted together in one transaction.
+    Each caller gets the result it would have had on its own: submissions
+    of the same payload within a window resolve as if they ran one after
+    another, so only the first gets the new job and the rest are told it
+    already exists.
+
+    `after_commit` is awaited with the connection once each batch is
+    committed, before its callers are answered.
+    """
+
+    def __init__(
+        self,
+        pool,
+        io,
+        delay: float,
+        max_batch: int,
+        upload_concurrency: int,
+        after_commit: Callable[[Any], Awaitable[Any]] | None = None,
+        legacy_locks: bool = False,
+    ) -> None:
+        self.pool = pool
+        self.io = io
+        self.after_commit = after_commit
+        self.legacy_locks = legacy_locks
+        self.delay = delay
+        self.max_batch = max_batch
+        self.upload_concurrency = upload_concurrency
+        self._windows: dict[str, _Window] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._submissions = 0
+        self._batches = 0
+        self._payloads = 0
+
+    @classmethod
+    def from_settings(
+        cls,
+        pool,
+        io,
+        settings,
+        after_commit: Callable[[Any], Awaitable[Any]] | None = None,
+    ) -> SubmissionQueue:
+        return cls(
+            pool,
+            io,
+            delay=settings.execution_queue_delay,
+            max_batch=settings.execution_queue_max_batch,
+            upload_concurrency=settings.execution_batch_upload_concurrency,
+            after_commit=after_commit,
+            legacy_locks=settings.execution_legacy_payload_locks,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "submissions": self._submissions,
+            "batches": self._batches,
+            "payloads": self._payloads,
+            "pending": sum(w.size for w in self._windows.values()),
+        }
+
+    def register_metrics(self, metrics) -> None:
+        metrics.register("submission_queue", self.stats)
+
+    async def submit(
+        self, workflow: Workflow, payload: Any, payload_uuid: UUID
+    ) -> tuple[Record, bool]:
+        """Return the job record for a submission, and whether it was cached."""
+        self._submissions += 1
+        loop = asyncio.get_running_loop()
+        window = self._windows.get(workflow.id)
+        if window is None:
+            window = self._windows[workflow.id] = _Window(workflow)
+            window.handle = loop.call_later(self.delay, self._dispatch, workflow.id)
+
+        future = loop.create_future()
+        window.payloads.setdefault(payload_uuid, payload)
+        window.waiters.setdefault(payload_uuid, []).append(future)
+        window.size += 1
+        if window.size >= self.max_batch:
+            self._dispatch(workflow.id)
+
+        return await future
+
+    async def close(self) -> None:
+        """Submit any pending windows and wait for all batches to finish."""
+        for workflow_id in list(self._windows):
+            self._dispatch(workflow_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _dispatch(self, workflow_id: str) -> None:
+        window = self._windows.pop(workflow_id, None)
+        if window is None:
+            return
+        if window.handle is not None:
+            window.handle.cancel()
+        task = asyncio.create_task(self._submit(window))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _submit(self, window: _Window) -> None:
+        self._batches += 1
+        self._payloads += len(window.payloads)
+        try:
+            async with self.pool.acquire() as conn:
+                jobs = await submit_payloads(
+                    conn,
+                    self.io,
+                    window.workflow,
+                    window.payloads,
+                    self.upload_concurrency,
+                    self.legacy_locks,
+                )
+                if self.after_commit is not None:
+                    await self.after_commit(conn)
+        except Exception as e:  # noqa: BLE001
+            # raised to each waiter instead
+            for futures in window.waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for payload_uuid, futures in window.waiters.items():
+            record, cached = jobs[payload_uuid]
+            for future in futures:
+                if not future.done():
+                    future.set_result((record, cached))
+                # later submissions of the payload see the job the first
+                # one created
+                cached = True
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key.
+
+    The first call for a key runs the function; calls for that key made
+    while it runs wait for and share its outcome, including any error,
+    instead of running it again.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self._calls = 0
+        self._shared = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self._calls,
+            "shared": self._shared,
+            "in_flight": len(self._in_flight),
+        }
+
+    def register_metrics(self, metrics, name: str) -> None:
+        metrics.register(name, self.stats)
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> tuple[Any, bool]:
+        """Return the outcome of `fn` for `key`, and whether it was shared."""
+        self._calls += 1
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self._shared += 1
+        else:
+            task = asyncio.create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(partial(self._done, key))
+        # a cancelled caller must not cancel the call for the others
+        return await asyncio.shield(task), shared
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            # mark any error as retrieved, in case every caller went away
+            task.exception()
@@ -0,0 +1,115 @@
+from datetime import UTC, datetime
+from uuid import UUID
+
+import pytest
+
+from swoop.api.models.jobs import JobSortBy
+from swoop.api.queries.jobs import (
+    JobCursor,
+    JobFilter,
+    analytics_window,
+    job_changes_query,
+    list_jobs_query,
+)
+
+a_time = datetime(2023, 4, 28, 15, 49, tzinfo=UTC)
+a_uuid = UUID("0187c88d-a9e0-788c-adcb-c0b951f8be91")
+
+
+def test_no_filters():
+    q, p = list_jobs_query(JobFilter(), limit=10)
+    assert "IS NULL" not in q
+    assert "ANY" not in q
+    assert p == [10]
+
+
+@pytest.mark.parametrize(
+    "job_filter,fragment,params",
+    [
+        (JobFilter(processes=["a"]), "a.action_name = ANY($1)", [["a"]]),
+        (JobFilter(types=["argo"]), "a.handler_type = ANY($1)", [["argo"]]),
+        (JobFilter(jobs=[a_uuid]), "a.action_uuid = ANY($1)", [[a_uuid]]),
+        (JobFilter(statuses=["RUNNING"]), "t.status = ANY($1)", [["RUNNING"]]),
+        (JobFilter(start=a_time), "t.created_at >= $1", [a_time]),
+        (JobFilter(end=a_time), "t.created_at <= $1", [a_time]),
+        (JobFilter(dt=a_time), "t.created_at = $1", [a_time]),
+    ],
+)
+def test_only_requested_filters(job_filter, fragment, params):
+    q, p = list_jobs_query(job_filter, limit=10)
+    assert fragment in q
+    assert p == params + [10]
+
+
+def test_duration_filter():
+    q, p = list_jobs_query(JobFilter(min_duration=5), limit=10)
+    assert "EXTRACT" not in q
+    assert "t.started_at <= now() - $2::integer" in q
+    assert "t.last_update >= t.started_at + $2::integer" in q
+    assert "$3" not in q.replace("LIMIT $3", "")
+    assert p[1:] == [5, 10]
+
+
+def test_last_id():
+    q, p = list_jobs_query(JobFilter(), limit=10, last=a_uuid)
+    assert "a.action_uuid < $1" in q
+    assert p == [a_uuid, 10]
+
+
+def test_statement_shape_is_stable():
+    q1, _ = list_jobs_query(JobFilter(processes=["a"], max_duration=1), limit=10)
+    q2, _ = list_jobs_query(JobFilter(processes=["b", "c"], max_duration=9), limit=2)
+    assert q1 == q2
+
+
+@pytest.mark.parametrize("value", [a_time, None])
+def test_cursor_round_trip(value):
+    cursor = JobCursor(sortby=JobSortBy.started, value=value, action_uuid=a_uuid)
+    assert JobCursor.decode(cursor.encode()) == cursor
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", "WzEsMiwzXQ"])
+def test_cursor_invalid(token):
+    with pytest.raises(ValueError):
+        JobCursor.decode(token)
+
+
+def test_sorted_keyset():
+    cursor = JobCursor(sortby=JobSortBy.updated, value=a_time, action_uuid=a_uuid)
+    q, p = list_jobs_query(
+        JobFilter(),
+        limit=10,
+        sortby=JobSortBy.updated,
+        cursor=cursor,
+    )
+    assert "(t.last_update, a.action_uuid) < ($1, $2)" in q
+    assert "ORDER BY t.last_update DESC, a.action_uuid DESC" in q
+    assert p == [a_time, a_uuid, 10]
+
+
+def test_sorted_keyset_null_started():
+    cursor = JobCursor(sortby=JobSortBy.started, value=None, action_uuid=a_uuid)
+    q, p = list_jobs_query(
+        JobFilter(),
+        limit=10,
+        sortby=JobSortBy.started,
+        cursor=cursor,
+    )
+    assert "t.started_at IS NULL AND a.action_uuid < $1" in q
+    assert "ORDER BY t.started_at DESC NULLS LAST, a.action_uuid DESC" in q
+    assert p == [a_uuid, 10]
+
+
+def test_analytics_window():
+    now = datetime(2023, 4, 28, 15, 49, 30, tzinfo=UTC)
+    start, end = analytics_window(3600, 60, now=now)
+    assert end == datetime(2023, 4, 28, 15, 49, tzinfo=UTC)
+    assert start == datetime(2023, 4, 28, 14, 49, tzinfo=UTC)
+
+
+def test_changes_keyset():
+    cursor = JobCursor(sortby=JobSortBy.updated, value=a_time, action_uuid=a_uuid)
+    q, p = job_changes_query(JobFilter(), limit=10, cursor=cursor, settle_time=1)
+    assert "(t.last_update, a.action_uuid) > ($1, $2)" in q
+    assert "ORDER BY t.last_update, a.action_uuid" in q
+    assert p == [a_time, a_uuid, 1, 10]
@@ -22,3 +22,18 @@ def test_no_loads_from_env_file():
         str(swoop_settings.value)
         == "swoop settings does not support loading an env file"
     )
+
+
+def test_filesystem_storage_requires_root(monkeypatch):
+    monkeypatch.setenv("SWOOP_STORAGE_BACKEND", "filesystem")
+    monkeypatch.delenv("SWOOP_STORAGE_ROOT", raising=False)
+    with pytest.raises(ValueError, match="storage_root is required"):
+        Settings()
+
+
+def test_filesystem_storage(monkeypatch, tmp_path):
+    monkeypatch.setenv("SWOOP_STORAGE_BACKEND", "filesystem")
+    monkeypatch.setenv("SWOOP_STORAGE_ROOT", str(tmp_path))
+    settings = Settings()
+    assert settings.storage_backend == "filesystem"
+    assert settings.storage_root == tmp_path
@@ -2,7 +2,7 @@ import pytest
 from fastapi import FastAPI
 
 from swoop.api.app import get_app
-from swoop.api.db import close_db_connection, connect_to_db
+from swoop.api.db import close_db_connection, connect_to_db, parse_lsn
 
 from ..conftest import inject_database_fixture
 
@@ -56,3 +56,42 @@ async def test_db_connection_pool_with_reader_host() -> None:
 
     await close_db_connection(app)
     assert True
+
+
+@pytest.mark.asyncio
+async def test_db_router_commit_lsn() -> None:
+    app: FastAPI = get_app()
+
+    # separate writer and reader pools, on a server that is not a standby
+    app.state.settings.db_writer_host = app.state.settings.db_reader_host
+    await connect_to_db(app)
+    db = app.state.db
+
+    async with app.state.writepool.acquire() as conn:
+        lsn = await db.commit_lsn(conn)
+    assert lsn is not None
+    reader = db.readers.replicas[0]
+    assert await db.read_pool(parse_lsn(lsn)) is reader.pool
+    assert reader.healthy
+    assert reader.replayed >= parse_lsn(lsn)
+    assert db.known_commit_lsn() == lsn
+
+    await close_db_connection(app)
+
+
+@pytest.mark.asyncio
+async def test_db_pooler_mode() -> None:
+    app: FastAPI = get_app()
+    app.state.settings.db_pooler_mode = True
+    await connect_to_db(app)
+
+    async with app.state.writepool.acquire() as conn:
+        # statements are not cached, and cursors use process unique names
+        assert await conn.fetchval("SELECT 1") == 1
+        assert await conn.fetchval("SELECT 1") == 1
+        assert len(conn._stmt_cache) == 0
+        async with conn.transaction():
+            values = [r[0] async for r in conn.cursor("SELECT generate_series(1, 3)")]
+        assert values == [1, 2, 3]
+
+    await close_db_connection(app)
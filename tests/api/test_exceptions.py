@@ -21,3 +21,13 @@ def test_http_exception():
     assert exc["title"] == title
     assert exc["instance"] == instance
     assert exc["detail"] == "Not Found"
+
+
+def test_http_exception_headers():
+    response = exceptions.HTTPException(
+        status_code=503,
+        headers={"Retry-After": "1"},
+    ).to_json()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -1,6 +1,20 @@
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from uuid import UUID
+
+import asyncpg
 import pytest
 from fastapi.testclient import TestClient
 
+from swoop.api.exceptions import DatabaseBusyError
+from swoop.api.models.jobs import JobSortBy
+from swoop.api.queries.jobs import JobCursor
+from swoop.api.routers.jobs import JobLoader, object_redirect, presigned_url
+
 from ..conftest import inject_database_fixture, inject_io_fixture
 
 inject_database_fixture(["base_01"], __name__)
@@ -19,6 +33,13 @@ inject_io_fixture(
 )
 
 
+@pytest.fixture
+def presign_client(test_client: TestClient) -> TestClient:
+    if not test_client.app.state.io.supports_presigned_urls:
+        pytest.skip("storage backend does not support presigned URLs")
+    return test_client
+
+
 a_job = {
     "processID": "action_1",
     "type": "process",
@@ -549,3 +570,283 @@ async def test_get_job_min_max_duration_not_applicable_status(test_client: TestC
     response = test_client.get(url)
     assert response.status_code == 200
     assert response.json()["jobs"] == []
+
+
+@pytest.mark.asyncio
+async def test_get_workflow_execution_results_payload_redirect(
+    presign_client: TestClient,
+):
+    response = presign_client.get(
+        "/jobs/0187c88d-a9e0-788c-adcb-c0b951f8be91/results/payload",
+        headers={"Prefer": "redirect"},
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+    assert response.headers["preference-applied"] == "redirect"
+    assert "X-Amz-Signature" in response.headers["location"]
+    assert "output.json" in response.headers["location"]
+
+
+@pytest.mark.asyncio
+async def test_get_workflow_execution_results_payload_redirect_404(
+    test_client: TestClient,
+):
+    response = test_client.get(
+        "/jobs/00000000-1111-2222-3333-444444444444/results/payload",
+        headers={"Prefer": "redirect"},
+        follow_redirects=False,
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_workflow_execution_results_redirect(presign_client: TestClient):
+    response = presign_client.get(
+        "/jobs/0187c88d-a9e0-788c-adcb-c0b951f8be91/results",
+        headers={"Prefer": "redirect"},
+    )
+    assert response.status_code == 200
+    href = response.json()["payload"]["href"]
+    assert "X-Amz-Signature" in href
+    assert "output.json" in href
+
+
+@pytest.mark.asyncio
+async def test_get_job_payload_redirect(presign_client: TestClient):
+    response = presign_client.get(
+        "/jobs/0187c88d-a9e0-788c-adcb-c0b951f8be91/inputs",
+        headers={"Prefer": "redirect"},
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+    assert "input.json" in response.headers["location"]
+
+
+@pytest.mark.asyncio
+async def test_get_job_payload_redirect_404(presign_client: TestClient):
+    response = presign_client.get(
+        "/jobs/00000000-1111-2222-3333-444444444444/inputs",
+        headers={"Prefer": "redirect"},
+        follow_redirects=False,
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_presigned_url_off_event_loop():
+    threads = []
+
+    def get_presigned_url(object_name, expires):
+        threads.append(threading.current_thread())
+        return f"https://bucket{object_name}"
+
+    request = SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                io=SimpleNamespace(get_presigned_url=get_presigned_url),
+                settings=SimpleNamespace(io_presigned_url_expiry=60),
+            )
+        )
+    )
+    url = await presigned_url(request, "/executions/a/input.json")
+    assert url == "https://bucket/executions/a/input.json"
+    assert threads != [threading.current_thread()]
+
+
+@pytest.mark.asyncio
+async def test_object_redirect_without_presigned_url():
+    request = SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                io=SimpleNamespace(get_presigned_url=lambda name, expires: None),
+                settings=SimpleNamespace(io_presigned_url_expiry=60),
+            )
+        )
+    )
+    assert await object_redirect(request, "/executions/a/input.json") is None
+
+
+@pytest.mark.asyncio
+async def test_get_job_payload_redirect_setting_opt_out(presign_client: TestClient):
+    presign_client.app.state.settings.io_presigned_redirect = True
+    try:
+        response = presign_client.get(
+            "/jobs/0187c88d-a9e0-788c-adcb-c0b951f8be91/inputs",
+            headers={"Prefer": "return=representation"},
+            follow_redirects=False,
+        )
+    finally:
+        presign_client.app.state.settings.io_presigned_redirect = False
+    assert response.status_code == 200
+    assert response.json() == {
+        "process_id": "0187c88d-a9e0-788c-adcb-c0b951f8be91",
+        "payload": "test_input",
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_jobs_limit_over_max(test_client: TestClient):
+    max_limit = test_client.app.state.settings.job_max_limit
+    response = test_client.get(f"/jobs?limit={max_limit + 1}")
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_export_jobs_ndjson(test_client: TestClient):
+    jobs = test_client.get("/jobs").json()["jobs"]
+    response = test_client.get("/jobs/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line) for line in lines] == jobs
+
+
+@pytest.mark.asyncio
+async def test_export_jobs_json_chunked(test_client: TestClient):
+    jobs = test_client.get("/jobs?sortby=created").json()["jobs"]
+    test_client.app.state.settings.job_export_chunk_size = 1
+    try:
+        response = test_client.get("/jobs/export?format=json&sortby=created")
+    finally:
+        test_client.app.state.settings.job_export_chunk_size = 1000
+    assert response.status_code == 200
+    assert response.json() == jobs
+
+
+@pytest.mark.asyncio
+async def test_export_jobs_json_empty(test_client: TestClient):
+    response = test_client.get("/jobs/export?format=json&processID=none")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@asynccontextmanager
+async def busy_reader(lsn=None):
+    raise DatabaseBusyError("no database connection available")
+    yield
+
+
+@pytest.mark.asyncio
+async def test_export_jobs_busy(test_client: TestClient, monkeypatch):
+    monkeypatch.setattr(test_client.app.state.db, "reader", busy_reader)
+    response = test_client.get("/jobs/export")
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+
+
+@pytest.mark.asyncio
+async def test_job_events_resume_busy(test_client: TestClient, monkeypatch):
+    monkeypatch.setattr(test_client.app.state.db, "reader", busy_reader)
+    cursor = JobCursor(
+        JobSortBy.updated,
+        datetime(2023, 4, 28, tzinfo=UTC),
+        UUID("0187c88d-a9e0-788c-adcb-c0b951f8be91"),
+    )
+    response = test_client.get(
+        "/jobs/events",
+        headers={"Last-Event-ID": cursor.encode()},
+    )
+    assert response.status_code == 503
+    assert "retry-after" in response.headers
+    assert not test_client.app.state.job_events.stats()["subscribers"]
+
+
+@pytest.mark.asyncio
+async def test_get_job_facets(test_client: TestClient):
+    response = test_client.get("/jobs/facets")
+    assert response.status_code == 200
+    facets = response.json()
+    assert facets["total"] == 2
+    assert facets["processID"] == {"action_1": 1, "action_2": 1}
+    assert facets["type"] == {"argo-workflow": 1, "cirrus-workflow": 1}
+    assert facets["status"] == {"successful": 1, "accepted": 1}
+    assert facets["swoopStatus"] == {"SUCCESSFUL": 1, "PENDING": 1}
+    assert len(facets["counts"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_job_facets_filtered_cached(test_client: TestClient):
+    cache = test_client.app.state.job_facets_cache
+    url = "/jobs/facets?processID=action_1"
+    first = test_client.get(url).json()
+    hits = cache.hits
+    second = test_client.get(url).json()
+    assert cache.hits == hits + 1
+    assert first == second
+    assert first["total"] == 1
+    assert first["counts"] == [
+        {
+            "processID": "action_1",
+            "type": "argo-workflow",
+            "status": "successful",
+            "swoopStatus": "SUCCESSFUL",
+            "count": 1,
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_job_changes(test_client: TestClient):
+    def next_url(body):
+        link = next(link for link in body["links"] if link["rel"] == "next")
+        return link["href"].removeprefix("http://testserver")
+
+    response = test_client.get("/jobs/changes?limit=1")
+    assert response.status_code == 200
+    body = response.json()
+    assert [job["jobID"] for job in body["jobs"]] == [
+        "0187c88d-a9e0-757e-aa36-2fbb6c834cb5"
+    ]
+
+    body = test_client.get(next_url(body)).json()
+    assert [job["jobID"] for job in body["jobs"]] == [
+        "0187c88d-a9e0-788c-adcb-c0b951f8be91"
+    ]
+
+    # caught up, next keeps pointing at the same position
+    url = next_url(body)
+    body = test_client.get(url).json()
+    assert body["jobs"] == []
+    assert next_url(body) == url
+
+
+@pytest.mark.asyncio
+async def test_get_job_changes_invalid_cursor(test_client: TestClient):
+    response = test_client.get("/jobs/changes?cursor=invalid")
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_job_loader_coalesces(database: str):
+    job_ids = [
+        UUID("0187c88d-a9e0-788c-adcb-c0b951f8be91"),
+        UUID("0187c88d-a9e0-757e-aa36-2fbb6c834cb5"),
+        UUID("00000000-1111-2222-3333-444444444444"),
+    ]
+    async with asyncpg.create_pool(database=database, min_size=1, max_size=1) as pool:
+        loader = JobLoader(pool, delay=0.01, max_batch=100)
+        records = await asyncio.gather(
+            *[loader.load(job_ids[i % 3]) for i in range(30)]
+        )
+
+    assert loader.stats() == {"loads": 30, "batches": 1, "keys": 3}
+    found = [record and record["action_uuid"] for record in records[:3]]
+    assert found == [job_ids[0], job_ids[1], None]
+    assert records[0]["status"] == "SUCCESSFUL"
+
+
+@pytest.mark.asyncio
+async def test_job_loader_close_finishes_pending():
+    class Loader(JobLoader):
+        async def _query(self, pool, job_ids):
+            await asyncio.sleep(0)
+            return []
+
+    loader = Loader(None, delay=60, max_batch=100)
+    load = asyncio.create_task(loader.load(UUID(int=1)))
+    await asyncio.sleep(0)
+    assert loader._pending
+
+    await loader.close()
+    assert await load is None
+    assert not loader._tasks
@@ -0,0 +1,99 @@
+import pytest
+from fastapi.testclient import TestClient
+from swoop.db import SwoopDB
+
+from ..conftest import inject_database_fixture, syncrun
+
+inject_database_fixture([], __name__)
+
+# three successful action_1 jobs that ran for 60, 120 and 180 seconds,
+# finishing about twenty minutes ago, and one still running
+sql: str = """
+INSERT INTO swoop.payload_cache (payload_uuid, workflow_name) VALUES (
+  'ade69fe7-1d7d-572e-9f36-7242cc2aca77',
+  'some_workflow'
+);
+
+INSERT INTO swoop.action (
+  action_type,
+  action_name,
+  handler_name,
+  handler_type,
+  payload_uuid,
+  created_at
+)
+SELECT
+  'workflow',
+  'action_1',
+  'handler_foo',
+  'argo-workflow',
+  'ade69fe7-1d7d-572e-9f36-7242cc2aca77',
+  now() - interval '30 minutes'
+FROM generate_series(1, 4);
+
+UPDATE swoop.thread t SET
+  status = CASE WHEN j.runtime IS NULL THEN 'RUNNING' ELSE 'SUCCESSFUL' END,
+  started_at = now() - interval '25 minutes',
+  last_update = now() - interval '25 minutes'
+    + coalesce(j.runtime, 0) * interval '1 second'
+FROM (
+  SELECT
+    action_uuid,
+    (ARRAY[60, 120, 180, NULL])[row_number() OVER (ORDER BY action_uuid)] AS runtime
+  FROM swoop.thread
+) AS j
+WHERE t.action_uuid = j.action_uuid;
+"""
+
+
+@pytest.fixture(scope="module")
+def jobs(database: str) -> None:
+    syncrun(SwoopDB.execute_sql(sql, database=database))
+
+
+@pytest.mark.asyncio
+async def test_get_job_analytics(test_client: TestClient, jobs):
+    response = test_client.get("/jobs/analytics?window=3600&bucket=60")
+    assert response.status_code == 200
+    analytics = response.json()
+    assert analytics["bucket"] == 60
+    assert len(analytics["workflows"]) == 1
+
+    workflow = analytics["workflows"][0]
+    assert workflow["processID"] == "action_1"
+    assert workflow["completed"] == 3
+    assert workflow["duration"] == pytest.approx(
+        {"p50": 120.0, "p95": 174.0, "p99": 178.8}
+    )
+    assert len(workflow["throughput"]) == 60
+    assert sum(b["completed"] for b in workflow["throughput"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_job_analytics_cached(test_client: TestClient, jobs):
+    cache = test_client.app.state.analytics_cache
+    url = "/jobs/analytics?window=600&bucket=60&processID=action_1"
+    first = test_client.get(url).json()
+    hits = cache.hits
+    assert test_client.get(url).json() == first
+    assert cache.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_get_job_analytics_no_match(test_client: TestClient, jobs):
+    response = test_client.get("/jobs/analytics?processID=action_2")
+    assert response.status_code == 200
+    assert response.json()["workflows"] == []
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "window=100&bucket=60",
+        "window=86400&bucket=1",
+        "window=99999999",
+    ],
+)
+def test_get_job_analytics_invalid(test_client: TestClient, query):
+    response = test_client.get(f"/jobs/analytics?{query}")
+    assert response.status_code == 422
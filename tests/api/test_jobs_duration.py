@@ -0,0 +1,122 @@
+import importlib.util
+import itertools
+import uuid
+from pathlib import Path
+
+import pytest
+from swoop.db import SwoopDB
+
+from swoop.api.models.jobs import StatusCode, SwoopStatusCode
+from swoop.api.queries.jobs import list_jobs_query
+from swoop.api.routers.jobs import get_job_filter
+
+from ..conftest import inject_database_fixture
+
+inject_database_fixture([], __name__)
+
+# seconds before now() each job started, None if not started
+STARTED = [None, 30, 300, 3000]
+BOUNDS = [None, 0, 20, 100, 1000, 2000]
+STATUS_FILTERS = [
+    None,
+    [StatusCode.running],
+    [StatusCode.successful, StatusCode.failed],
+    [StatusCode.accepted],
+]
+SWOOP_STATUS_FILTERS = [
+    None,
+    [SwoopStatusCode.running],
+    [SwoopStatusCode.queued, SwoopStatusCode.successful],
+    [SwoopStatusCode.pending],
+]
+
+
+def load_legacy_query():
+    # the query the builder replaced lives with the benchmark comparing them
+    path = Path(__file__).parents[2] / "bin" / "benchmark-jobs-query.py"
+    spec = importlib.util.spec_from_file_location("benchmark_jobs_query", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.legacy_query
+
+
+def terminal_runtime(started):
+    # terminal jobs ran for a third of the time since they started
+    return started // 3
+
+
+@pytest.mark.asyncio
+async def test_duration_filter_matches_legacy_query(database):
+    # UNKNOWN is not a valid thread state in the database
+    statuses = [s for s in SwoopStatusCode if s != SwoopStatusCode.unknown]
+    jobs = list(itertools.product(statuses, STARTED))
+
+    # now() is fixed for the duration of the transaction, which lets
+    # running job durations be compared exactly
+    async with (
+        SwoopDB().get_db_connection(database=database) as conn,
+        conn.transaction(),
+    ):
+        payload_uuid = uuid.uuid5(uuid.NAMESPACE_OID, "duration")
+        await conn.execute(
+            """
+            INSERT INTO swoop.payload_cache (payload_uuid, workflow_name)
+            VALUES ($1, 'duration')
+            """,
+            payload_uuid,
+        )
+        action_uuids = await conn.fetch(
+            """
+            INSERT INTO swoop.action (
+                action_type,
+                action_name,
+                handler_name,
+                handler_type,
+                payload_uuid
+            )
+            SELECT 'workflow', 'duration', 'handler', 'argo-workflow', $1
+            FROM generate_series(1, $2)
+            RETURNING action_uuid
+            """,
+            payload_uuid,
+            len(jobs),
+        )
+        action_uuids = [r["action_uuid"] for r in action_uuids]
+        await conn.execute(
+            """
+            UPDATE swoop.thread t SET
+                status = j.status,
+                started_at = now() - j.started * interval '1 second',
+                last_update = coalesce(
+                    now() - (j.started - j.runtime) * interval '1 second',
+                    now()
+                )
+            FROM unnest($1::uuid[], $2::text[], $3::integer[], $4::integer[])
+                AS j(action_uuid, status, started, runtime)
+            WHERE t.action_uuid = j.action_uuid
+            """,
+            action_uuids,
+            [status.value for status, _ in jobs],
+            [started for _, started in jobs],
+            [
+                None if started is None else terminal_runtime(started)
+                for _, started in jobs
+            ],
+        )
+
+        legacy_query = load_legacy_query()
+        for min_duration, max_duration, status, swoop_status in itertools.product(
+            BOUNDS, BOUNDS, STATUS_FILTERS, SWOOP_STATUS_FILTERS
+        ):
+            job_filter = get_job_filter(
+                jobID=action_uuids,
+                status=status,
+                swoopStatus=swoop_status,
+                minDuration=min_duration,
+                maxDuration=max_duration,
+            )
+            q, p = list_jobs_query(job_filter, limit=len(jobs))
+            found = {r["action_uuid"] for r in await conn.fetch(q, *p)}
+            q, p = legacy_query(job_filter, limit=len(jobs))
+            expected = {r["action_uuid"] for r in await conn.fetch(q, *p)}
+            assert found == expected, (min_duration, max_duration, status, swoop_status)
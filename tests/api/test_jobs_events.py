@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from swoop.db import SwoopDB
+
+from swoop.api.config import Settings
+from swoop.api.notifications import JobEventHub
+from swoop.api.queries.jobs import JobFilter
+
+from ..conftest import inject_database_fixture, syncrun
+
+inject_database_fixture(["base_01"], __name__)
+
+insert_job = """
+INSERT INTO swoop.action (
+  action_type,
+  action_name,
+  handler_name,
+  handler_type,
+  payload_uuid
+) VALUES (
+  'workflow',
+  'action_3',
+  'handler_foo',
+  'argo-workflow',
+  'ade69fe7-1d7d-572e-9f36-7242cc2aca77'
+) RETURNING action_uuid
+"""
+
+
+@pytest.fixture
+def hub_settings(database: str) -> Settings:
+    settings = Settings()
+    settings.db_name = database
+    return settings
+
+
+async def next_job_uuid(hub: JobEventHub, job_filter: JobFilter, notify: bool):
+    subscription = await hub.subscribe(job_filter)
+    try:
+        async with SwoopDB().get_db_connection(database=hub.settings.db_name) as conn:
+            action_uuid = await conn.fetchval(insert_job)
+            if notify:
+                await conn.execute(f"NOTIFY {hub.channel}")
+        record = await asyncio.wait_for(subscription.queue.get(), 5)
+        assert record["action_uuid"] == action_uuid
+    finally:
+        hub.unsubscribe(subscription)
+        await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_job_event_hub_poll(hub_settings):
+    hub = JobEventHub(
+        hub_settings,
+        channel="swoop_test_events",
+        poll_interval=0.05,
+        queue_size=10,
+    )
+    await next_job_uuid(hub, JobFilter(processes=["action_3"]), notify=False)
+    assert hub.stats()["sweeps"] > 0
+
+
+@pytest.mark.asyncio
+async def test_job_event_hub_notify(hub_settings):
+    # the poll interval is longer than the wait, so only the notification
+    # can deliver the event in time
+    hub = JobEventHub(
+        hub_settings,
+        channel="swoop_test_events",
+        poll_interval=60,
+        queue_size=10,
+    )
+    await next_job_uuid(hub, JobFilter(), notify=True)
+    assert hub.stats()["notifications"] == 1
+
+
+def test_job_events_invalid_last_event_id(test_client: TestClient):
+    response = test_client.get("/jobs/events", headers={"Last-Event-ID": "invalid"})
+    assert response.status_code == 422
+
+
+def test_job_events_unsupported_filter(test_client: TestClient):
+    response = test_client.get("/jobs/events?minDuration=10")
+    assert response.status_code == 422
+
+
+def test_wait_for_job_already_at_target(test_client: TestClient):
+    response = test_client.get(
+        "/jobs/0187c88d-a9e0-788c-adcb-c0b951f8be91?wait=30&status=successful"
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "successful"
+
+
+def test_wait_for_job_timeout(test_client: TestClient):
+    start = time.monotonic()
+    response = test_client.get(
+        "/jobs/0187c88d-a9e0-788c-adcb-c0b951f8be91?wait=0.2&status=failed"
+    )
+    assert time.monotonic() - start >= 0.2
+    assert response.status_code == 200
+    assert response.json()["status"] == "successful"
+
+
+def test_wait_for_job_over_max(test_client: TestClient):
+    max_wait = test_client.app.state.settings.job_wait_max
+    response = test_client.get(
+        f"/jobs/0187c88d-a9e0-788c-adcb-c0b951f8be91?wait={max_wait + 1}"
+    )
+    assert response.status_code == 422
+
+
+def test_wait_for_job_not_found(test_client: TestClient):
+    response = test_client.get("/jobs/00000000-1111-2222-3333-444444444444?wait=1")
+    assert response.status_code == 404
+
+
+def test_wait_for_job_change(test_client: TestClient, database: str):
+    test_client.app.state.job_events.poll_interval = 0.05
+    queue_job = threading.Timer(
+        0.5,
+        syncrun,
+        [
+            SwoopDB.execute_sql(
+                """
+                INSERT INTO swoop.event (event_time, action_uuid, status, event_source)
+                VALUES (now(), '0187c88d-a9e0-757e-aa36-2fbb6c834cb5', 'QUEUED', 'test')
+                """,
+                database=database,
+            )
+        ],
+    )
+    queue_job.start()
+    try:
+        response = test_client.get("/jobs/0187c88d-a9e0-757e-aa36-2fbb6c834cb5?wait=10")
+    finally:
+        queue_job.join()
+    assert response.status_code == 200
+    assert response.json()["status"] == "accepted"
+    assert response.json()["updated"] != "2023-04-28T15:49:00Z"
@@ -1,8 +1,13 @@
+from uuid import UUID
+
 import pytest
 from fastapi.testclient import TestClient
 from swoop.db import SwoopDB
 
-from ..conftest import inject_database_fixture
+from swoop.api.models.jobs import JobSortBy
+from swoop.api.queries.jobs import JobCursor
+
+from ..conftest import inject_database_fixture, syncrun
 
 inject_database_fixture([], __name__)
 
@@ -56,9 +61,13 @@ $$;
 """
 
 
+@pytest.fixture(scope="module")
+def jobs(database: str) -> None:
+    syncrun(SwoopDB.execute_sql(sql, database=database))
+
+
 @pytest.mark.asyncio
-async def test_get_jobs_pagination(test_client: TestClient, database: str):
-    await SwoopDB.execute_sql(sql, database=database)
+async def test_get_jobs_pagination(test_client: TestClient, jobs):
 
     # get first page
     base_url: str = "/jobs?limit=50"
@@ -103,3 +112,52 @@ async def test_get_jobs_pagination(test_client: TestClient, database: str):
     assert [link for link in json["links"] if link["rel"] == "next"] == []
     assert len(payloads) == 1
     assert payloads[0]["jobID"] == first_id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sortby", ["created", "started"])
+async def test_get_jobs_sorted_pagination(test_client: TestClient, jobs, sortby):
+    # all jobs share a created_at and have not started, so ordering
+    # falls through to the job ID
+    base_url: str = f"/jobs?limit=50&sortby={sortby}"
+    url: str = base_url
+    job_ids: list[str] = []
+
+    for _ in range(3):
+        response = test_client.get(url)
+        assert response.status_code == 200
+        json = response.json()
+        job_ids += [job["jobID"] for job in json["jobs"]]
+        next_links = [link for link in json["links"] if link["rel"] == "next"]
+        if not next_links:
+            break
+        url = next_links[0]["href"].removeprefix("http://testserver")
+        assert url.startswith(f"{base_url}&cursor=")
+        cursor = JobCursor.decode(url.split("cursor=")[1])
+        assert str(cursor.action_uuid) == job_ids[-1]
+
+    assert len(job_ids) == 101
+    assert job_ids[0] == "0187c88d-a9e0-788c-adcb-c0b951f8be64"
+    assert job_ids[-1] == "0187c88d-a9e0-788c-adcb-c0b951f8be00"
+    assert job_ids == sorted(job_ids, reverse=True)
+
+
+a_cursor = JobCursor(
+    sortby=JobSortBy.created,
+    value=None,
+    action_uuid=UUID("0187c88d-a9e0-788c-adcb-c0b951f8be64"),
+).encode()
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "sortby=created&cursor=not-a-cursor",
+        f"cursor={a_cursor}",
+        f"sortby=updated&cursor={a_cursor}",
+        "sortby=updated&lastID=0187c88d-a9e0-788c-adcb-c0b951f8be64",
+    ],
+)
+def test_get_jobs_invalid_cursor(test_client: TestClient, query):
+    response = test_client.get(f"/jobs?{query}")
+    assert response.status_code == 422
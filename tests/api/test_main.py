@@ -80,3 +80,10 @@ async def test_conformance(test_client):
             },
         ],
     }
+
+
+@pytest.mark.asyncio
+async def test_metrics(test_client):
+    response = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert "s3_http_pool" in response.json()
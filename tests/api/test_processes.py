@@ -1,4 +1,5 @@
 import asyncio
+import copy
 import json
 
 import pytest
@@ -937,3 +938,67 @@ async def test_get_outputsschema_not_found(test_client: TestClient) -> None:
     url: str = "/processes/badworkflowname/outputsschema"
     response: Response = test_client.get(url)
     assert response.status_code == 404
+
+
+def batch_payload(feature_id: str) -> dict:
+    payload = copy.deepcopy(process_payload_valid)
+    payload["inputs"]["payload"]["value"]["features"][0]["id"] = feature_id
+    return payload
+
+
+@pytest.mark.asyncio
+async def test_post_execution_batch(test_client: TestClient) -> None:
+    items = [
+        batch_payload("batch-1"),
+        batch_payload("batch-2"),
+        batch_payload("batch-1"),
+        {},
+        process_payload_invalid,
+    ]
+    response: Response = test_client.post(
+        "/processes/mirror/execution:batch",
+        content=json.dumps(items),
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["cached"], body["failed"]) == (2, 1, 2)
+
+    results = body["results"]
+    assert [r["index"] for r in results] == list(range(len(items)))
+    assert [r.get("cached") for r in results] == [False, False, True, None, None]
+    assert results[0]["jobID"] == results[2]["jobID"]
+    assert results[0]["jobID"] != results[1]["jobID"]
+    assert results[3]["error"] == {"status": 422, "detail": "inputs required"}
+    assert results[4]["error"]["status"] == 422
+
+    response = test_client.get(f"/jobs/{results[1]['jobID']}/inputs")
+    assert response.status_code == 200
+
+    # resubmitting hits the payload cache
+    response = test_client.post(
+        "/processes/mirror/execution:batch",
+        content="\n".join(json.dumps(item) for item in items[:2]),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["cached"] for r in results] == [True, True]
+    assert [r["jobID"] for r in results] == [r["jobID"] for r in body["results"][:2]]
+
+
+@pytest.mark.asyncio
+async def test_post_execution_batch_not_array(test_client: TestClient) -> None:
+    response: Response = test_client.post(
+        "/processes/mirror/execution:batch",
+        content=json.dumps(process_payload_valid),
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_post_execution_batch_not_found(test_client: TestClient) -> None:
+    response: Response = test_client.post(
+        "/processes/invalid/execution:batch",
+        content=json.dumps([process_payload_valid]),
+    )
+    assert response.status_code == 404
@@ -47,10 +47,7 @@ def generate_io_fixture(fixtures, io_postfix=None, scope="module"):
             .replace("_", "-")
         )
 
-        ioclient = IOClient(
-            bucket_name,
-            settings.s3_endpoint,
-        )
+        ioclient = IOClient.from_settings(settings, bucket_name=bucket_name)
 
         def setup_io(ioclient):
             for fixture in fixtures:
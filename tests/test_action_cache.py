@@ -0,0 +1,53 @@
+from unittest.mock import Mock
+from uuid import UUID
+
+from swoop.api.action_cache import PayloadActionCache
+
+payload_uuid = UUID("ade69fe7-1d7d-572e-9f36-7242cc2aca77")
+action_uuid = UUID("0187c88d-a9e0-788c-adcb-c0b951f8be91")
+
+
+def make_cache(ttl: float = 60) -> PayloadActionCache:
+    return PayloadActionCache(Mock(), "swoop_payload_cache", ttl=ttl, maxsize=10)
+
+
+def test_cache_get_set():
+    cache = make_cache()
+    assert cache.get(payload_uuid, 2) is None
+    cache.set(payload_uuid, 2, action_uuid, cache.token())
+    assert cache.get(payload_uuid, 2) == action_uuid
+    # a newer workflow version must go to the database
+    assert cache.get(payload_uuid, 3) is None
+    assert cache.stats() == {
+        "size": 1,
+        "hits": 2,
+        "misses": 1,
+        "hit_ratio": 2 / 3,
+        "invalidations": 0,
+    }
+
+
+def test_cache_disabled():
+    cache = make_cache(ttl=0)
+    cache.set(payload_uuid, 2, action_uuid, cache.token())
+    assert cache.get(payload_uuid, 2) is None
+    assert cache.stats()["hit_ratio"] == 0.0
+
+
+def test_cache_skips_set_after_invalidation():
+    cache = make_cache()
+    token = cache.token()
+    cache.invalidate(UUID(int=1))
+    cache.set(payload_uuid, 2, action_uuid, token)
+    assert cache.get(payload_uuid, 2) is None
+
+
+def test_cache_notification_invalidates():
+    cache = make_cache()
+    cache.set(payload_uuid, 2, action_uuid, cache.token())
+    cache._on_notification(None, 1, "swoop_payload_cache", str(payload_uuid))
+    assert cache.get(payload_uuid, 2) is None
+
+    cache.set(payload_uuid, 2, action_uuid, cache.token())
+    cache._on_notification(None, 1, "swoop_payload_cache", "not a uuid")
+    assert cache.get(payload_uuid, 2) is None
@@ -0,0 +1,134 @@
+import asyncio
+
+import asyncpg
+import pytest
+
+from swoop.api.db import (
+    STATEMENT_PREFIX,
+    AdaptivePool,
+    PoolerConnection,
+    acquire_timeout,
+    connect_listener,
+    pool_options,
+)
+from swoop.api.exceptions import DatabaseBusyError
+
+
+class FakePool:
+    def __init__(self):
+        self.acquired = 0
+
+    def get_size(self):
+        return self.acquired
+
+    def get_idle_size(self):
+        return 0
+
+    async def acquire(self):
+        self.acquired += 1
+        return object()
+
+    async def release(self, conn, *, timeout=None):
+        self.acquired -= 1
+
+
+def make_pool(**kwargs):
+    options = {
+        "min_size": 1,
+        "max_size": 3,
+        "target_wait": 0.01,
+        "adjust_interval": 60,
+        "default_timeout": 1,
+    }
+    return AdaptivePool(FakePool(), **(options | kwargs))
+
+
+@pytest.mark.asyncio
+async def test_pool_grows_while_requests_wait():
+    pool = make_pool()
+    conns = await asyncio.gather(*[pool.acquire() for _ in range(3)])
+
+    assert pool.limit == 3
+    stats = pool.stats()
+    assert stats["in_use"] == 3
+    assert stats["acquisitions"] == 3
+    assert stats["wait_ms_max"] >= 10
+
+    for conn in conns:
+        await pool.release(conn)
+    assert pool.stats()["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_acquire_times_out():
+    pool = make_pool(max_size=1)
+    async with pool.acquire():
+        with pytest.raises(DatabaseBusyError):
+            await pool.acquire(timeout=0.05)
+
+        # the route's timeout applies when none is given
+        acquire_timeout.set(0.05)
+        with pytest.raises(TimeoutError):
+            async with pool.acquire():
+                pass
+
+    assert pool.stats()["timeouts"] == 2
+    assert pool.stats()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_shrinks_when_underused():
+    pool = make_pool(adjust_interval=0)
+    pool.limit = 3
+    for _ in range(3):
+        async with pool.acquire():
+            pass
+    # one connection in use at a time still keeps two
+    assert pool.limit == 2
+
+
+def test_pool_options(settings):
+    options = pool_options("db", settings)
+    assert options["host"] == "db"
+    assert "statement_cache_size" not in options
+    assert "connection_class" not in options
+
+    settings = settings.model_copy(update={"db_statement_cache_size": 20})
+    assert pool_options("db", settings)["statement_cache_size"] == 20
+
+
+def test_pool_options_pooler_mode(settings):
+    settings = settings.model_copy(update={"db_pooler_mode": True})
+    options = pool_options("db", settings)
+    assert options["connection_class"] is PoolerConnection
+    assert options["statement_cache_size"] == 0
+
+    # a pooler tracking prepared statements can keep the cache
+    settings = settings.model_copy(update={"db_statement_cache_size": 100})
+    assert pool_options("db", settings)["statement_cache_size"] == 100
+
+
+@pytest.mark.asyncio
+async def test_connect_listener_pooler_mode(settings, monkeypatch):
+    connects = []
+
+    async def connect(**options):
+        connects.append(options)
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    settings = settings.model_copy(
+        update={"db_pooler_mode": True, "db_listen_host": None}
+    )
+    await connect_listener(settings)
+    assert connects[0]["connection_class"] is PoolerConnection
+    assert connects[0]["statement_cache_size"] == 0
+
+
+def test_pooler_connection():
+    # neither method touches the connection itself
+    first = PoolerConnection._get_unique_id(None, "stmt")
+    second = PoolerConnection._get_unique_id(None, "stmt")
+    assert first.startswith(STATEMENT_PREFIX)
+    assert first != second
+    assert len(first) < 64
+    assert PoolerConnection._get_reset_query(None) == ""
@@ -0,0 +1,241 @@
+from functools import partial
+
+import pytest
+from starlette.requests import Request
+
+from swoop.api.db import (
+    LSN_COOKIE,
+    LSN_HEADER,
+    DatabaseRouter,
+    ReaderSet,
+    Replica,
+    format_lsn,
+    parse_lsn,
+    reader_hosts,
+    request_lsn,
+)
+from swoop.api.exceptions import DatabaseBusyError
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+
+    async def fetchval(self, query):
+        if self.pool.down:
+            raise OSError("connection refused")
+        return self.pool.replayed
+
+
+class FakeAcquire:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def __await__(self):
+        if self.pool.busy:
+            raise DatabaseBusyError("no database connection available")
+        self.pool.in_use += 1
+        yield from []
+        return FakeConnection(self.pool)
+
+    async def __aenter__(self):
+        return await self
+
+    async def __aexit__(self, *exc):
+        self.pool.in_use -= 1
+
+
+class FakePool:
+    """Enough of an asyncpg pool, whose acquire is awaitable or a context."""
+
+    def __init__(self, replayed=None, down=False):
+        self.replayed = replayed
+        self.down = down
+        self.in_use = 0
+        self.connects = 0
+        self.busy = False
+
+    def get_size(self):
+        return 10
+
+    def get_idle_size(self):
+        return 10 - self.in_use
+
+    def stats(self):
+        return {"in_use": self.in_use}
+
+    def acquire(self, *, timeout=None):
+        return FakeAcquire(self)
+
+    async def release(self, conn, *, timeout=None):
+        self.in_use -= 1
+
+
+async def connect(pool):
+    pool.connects += 1
+    return FakeConnection(pool)
+
+
+def make_readers(*pools, eject_after=2):
+    return ReaderSet(
+        [
+            Replica(f"reader{i}", pool, partial(connect, pool))
+            for i, pool in enumerate(pools)
+        ],
+        health_interval=1,
+        eject_after=eject_after,
+    )
+
+
+def make_request(headers=()):
+    return Request(
+        {
+            "type": "http",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        }
+    )
+
+
+def test_lsn_round_trip():
+    assert parse_lsn("16/B374D848") == (0x16 << 32) + 0xB374D848
+    assert format_lsn(parse_lsn("16/B374D848")) == "16/B374D848"
+    assert parse_lsn("0/10") < parse_lsn("0/F0") < parse_lsn("1/0")
+
+
+def test_request_lsn():
+    assert request_lsn(make_request()) is None
+    assert request_lsn(make_request([(LSN_HEADER, "0/10")])) == 0x10
+    assert request_lsn(make_request([("cookie", f"{LSN_COOKIE}=0/20")])) == 0x20
+    # tokens we cannot have handed out are ignored
+    assert request_lsn(make_request([(LSN_HEADER, "bogus")])) is None
+    assert request_lsn(make_request([(LSN_HEADER, "100000000/0")])) is None
+
+
+def test_reader_hosts(settings):
+    settings = settings.model_copy(update={"db_reader_host": "a, b,,c"})
+    assert reader_hosts(settings) == ["a", "b", "c"]
+    settings = settings.model_copy(update={"db_reader_host": None})
+    assert reader_hosts(settings) == [None]
+
+
+@pytest.mark.asyncio
+async def test_router_reads_from_replayed_reader():
+    writer = FakePool()
+    behind, ahead = FakePool(replayed="0/100"), FakePool(replayed="0/100")
+    db = DatabaseRouter(writer, make_readers(behind, ahead))
+
+    assert await db.read_pool() is db.readers
+    assert await db.read_pool(0x80) in (behind, ahead)
+    assert await db.read_pool(0x200) is writer
+
+    ahead.replayed = "0/200"
+    assert await db.read_pool(0x200) is ahead
+    assert db.stats() == {"reads": 4, "writer_fallbacks": 1}
+
+
+@pytest.mark.asyncio
+async def test_router_without_replica():
+    pool = FakePool()
+    db = DatabaseRouter(pool)
+    assert db.readpool is pool
+    assert await db.read_pool(0x200) is pool
+    assert await db.commit_lsn(None) is None
+    assert db.known_commit_lsn() is None
+
+
+@pytest.mark.asyncio
+async def test_router_commit_lsn_on_writer_connection():
+    writer = FakePool(replayed="0/300")
+    db = DatabaseRouter(writer, make_readers(FakePool()))
+    assert db.known_commit_lsn() is None
+    assert await db.commit_lsn(FakeConnection(writer)) == "0/300"
+    assert db.known_commit_lsn() == "0/300"
+
+    # a position that cannot be read leaves the last known one
+    writer.down = True
+    assert await db.commit_lsn(FakeConnection(writer)) is None
+    assert db.known_commit_lsn() == "0/300"
+
+
+@pytest.mark.asyncio
+async def test_readers_prefer_fast_idle_replica():
+    fast, slow = FakePool(replayed="0/1"), FakePool(replayed="0/1")
+    readers = make_readers(fast, slow)
+    readers.replicas[0].latency = 0.001
+    readers.replicas[1].latency = 0.004
+    assert readers.choose().pool is fast
+
+    # busy connections count against a replica
+    fast.in_use = 4
+    assert readers.choose().pool is slow
+
+    async with readers.acquire() as conn:
+        assert conn.pool is slow
+        assert slow.in_use == 1
+    assert slow.in_use == 0
+    assert readers.stats()["reader1"]["acquisitions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_readers_eject_and_readmit():
+    up, down = FakePool(replayed="0/1"), FakePool(down=True)
+    readers = make_readers(up, down, eject_after=2)
+
+    await readers.refresh()
+    assert readers.replicas[1].healthy
+    await readers.refresh()
+    assert not readers.replicas[1].healthy
+    assert readers.replicas[0].healthy
+    assert readers.stats()["reader0"]["replayed_lsn"] == "0/1"
+
+    # ejected replicas get no reads
+    up.in_use = 9
+    assert readers.choose().pool is up
+
+    down.down = False
+    down.replayed = "0/1"
+    await readers.refresh()
+    assert readers.replicas[1].healthy
+    assert readers.replicas[1].failures == 0
+
+
+@pytest.mark.asyncio
+async def test_readers_ping_outside_the_pool():
+    busy = FakePool(replayed="0/1")
+    busy.in_use = 10
+    readers = make_readers(busy, eject_after=1)
+
+    await readers.refresh()
+    await readers.refresh()
+    assert readers.replicas[0].healthy
+    assert busy.in_use == 10
+    assert busy.connects == 1
+
+    # a failed ping drops its connection and reconnects on the next one
+    busy.down = True
+    await readers.refresh()
+    assert not readers.replicas[0].healthy
+    busy.down = False
+    await readers.refresh()
+    assert readers.replicas[0].healthy
+    assert busy.connects == 2
+
+
+@pytest.mark.asyncio
+async def test_readers_busy_acquire_is_not_a_failure():
+    busy = FakePool(replayed="0/1")
+    busy.busy = True
+    readers = make_readers(busy, eject_after=3)
+
+    for _ in range(3):
+        with pytest.raises(DatabaseBusyError):
+            await readers.acquire()
+    assert readers.replicas[0].healthy
+    assert readers.replicas[0].failures == 0
@@ -1,8 +1,20 @@
+import io
 import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
 import pytest
 
-from swoop.api.io import split_endpoint_protocol
+from swoop.api.io import (
+    FileIOClient,
+    LatencyTracker,
+    create_http_client,
+    hedged_call,
+    http_pool_stats,
+    split_endpoint_protocol,
+)
 
 from .conftest import inject_io_fixture
 
@@ -38,6 +50,218 @@ def test_split_endpoint_protocol(endpoint, expected_secure, expected_endpoint):
     assert (expected_secure, expected_endpoint) == split_endpoint_protocol(endpoint)
 
 
+def test_create_http_client():
+    http_client = create_http_client(
+        max_pool_connections=32,
+        pool_block=True,
+        connect_timeout=2,
+        read_timeout=30,
+        max_retries=3,
+        tcp_keepalive_idle=45,
+    )
+    kw = http_client.connection_pool_kw
+    assert kw["maxsize"] == 32
+    assert kw["block"] is True
+    assert kw["timeout"].connect_timeout == 2
+    assert kw["timeout"].read_timeout == 30
+    assert kw["retries"].total == 3
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in kw["socket_options"]
+
+
+def test_create_http_client_no_keepalive():
+    http_client = create_http_client(tcp_keepalive_idle=None)
+    options = http_client.connection_pool_kw["socket_options"]
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) not in options
+
+
+def test_http_pool_stats_empty():
+    assert http_pool_stats(create_http_client()) == {"pools": []}
+
+
+def test_http_pool_stats(s3_client):
+    ioclient = s3_client.app.state.io
+    ioclient.bucket_exists()
+    stats = ioclient.pool_stats()
+    assert len(stats["pools"]) == 1
+    pool = stats["pools"][0]
+    assert pool["in_use"] == 0
+    assert pool["requests"] >= 1
+    assert pool["idle"] >= 1
+
+
+def test_latency_tracker_initial_delay():
+    tracker = LatencyTracker(initial_delay=0.5, min_samples=10)
+    for _ in range(9):
+        tracker.record(0.001)
+    assert tracker.delay() == 0.5
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(percentile=90, min_delay=0.0, min_samples=10)
+    for i in range(1, 101):
+        tracker.record(i / 1000)
+    assert tracker.delay() == pytest.approx(0.091)
+
+
+def test_latency_tracker_min_delay():
+    tracker = LatencyTracker(min_delay=0.05, min_samples=1)
+    tracker.record(0.001)
+    assert tracker.delay() == 0.05
+
+
+def test_hedged_call_fast_primary():
+    discarded = []
+    with ThreadPoolExecutor() as executor:
+        result = hedged_call(executor, lambda: "primary", 1, discarded.append)
+    assert result == ("primary", False, False)
+    assert discarded == []
+
+
+def test_hedged_call_hedge_wins():
+    calls = []
+    release = threading.Event()
+    discarded = []
+
+    def fn():
+        calls.append(None)
+        if len(calls) == 1:
+            release.wait(5)
+            return "primary"
+        return "hedge"
+
+    with ThreadPoolExecutor() as executor:
+        result = hedged_call(executor, fn, 0.01, discarded.append)
+        release.set()
+
+    assert result == ("hedge", True, True)
+    assert discarded == ["primary"]
+
+
+def test_hedged_call_hedge_fails():
+    calls = []
+
+    def fn():
+        calls.append(None)
+        if len(calls) == 1:
+            threading.Event().wait(0.1)
+            return "primary"
+        raise ValueError("hedge failed")
+
+    with ThreadPoolExecutor() as executor:
+        result = hedged_call(executor, fn, 0.01, lambda _: None)
+
+    assert result == ("primary", True, False)
+
+
+def test_hedged_call_both_fail():
+    def fn():
+        threading.Event().wait(0.05)
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor() as executor, pytest.raises(ValueError):
+        hedged_call(executor, fn, 0.01, lambda _: None)
+
+
+@pytest.fixture
+def s3_client(test_client):
+    if not test_client.app.state.io.supports_presigned_urls:
+        pytest.skip("requires the s3 storage backend")
+    return test_client
+
+
+@pytest.fixture
+def file_ioclient(tmp_path):
+    ioclient = FileIOClient("swoop-test", tmp_path)
+    yield ioclient
+    ioclient.delete_bucket()
+
+
+def test_file_put_get_object(file_ioclient, single_object):
+    object_name = "/executions/2595f2da-81a6-423c-84db-935e6791046e/input.json"
+    file_ioclient.put_object(object_name, json.dumps(single_object))
+    assert file_ioclient.get_object(object_name) == single_object
+    # leading slashes do not change the object identity
+    assert file_ioclient.get_object(object_name.lstrip("/")) == single_object
+
+
+def test_file_put_object_stream(file_ioclient, single_object):
+    content = json.dumps(single_object).encode("utf-8")
+    file_ioclient.put_object("a/b.json", io.BytesIO(content))
+    assert file_ioclient.get_object("a/b.json") == single_object
+
+
+def test_file_put_object_replaces_atomically(file_ioclient):
+    file_ioclient.put_object("a.json", json.dumps({"version": 1}))
+    file_ioclient.put_object("a.json", json.dumps({"version": 2}))
+    assert file_ioclient.get_object("a.json") == {"version": 2}
+    assert list(file_ioclient.list_objects()) == ["a.json"]
+
+
+def test_file_put_file_object(file_ioclient, io_fixture_dir):
+    source = io_fixture_dir.joinpath("base_01", "input.json")
+    file_ioclient.put_file_object("executions/x/input.json", str(source))
+    assert file_ioclient.get_object("executions/x/input.json") == json.loads(
+        source.read_text()
+    )
+
+
+def test_file_get_object_missing(file_ioclient):
+    assert file_ioclient.get_object("does/not/exist.json") is None
+    assert file_ioclient.object_response("does/not/exist.json") is None
+
+
+def test_file_object_outside_bucket(file_ioclient):
+    assert file_ioclient.get_object("../../etc/passwd") is None
+    assert file_ioclient.object_response("../../etc/passwd") is None
+    with pytest.raises(ValueError):
+        file_ioclient.put_object("../escape.json", "{}")
+
+
+def test_file_object_response(file_ioclient, single_object):
+    file_ioclient.put_object("a.json", json.dumps(single_object))
+    response = file_ioclient.object_response("a.json")
+    assert response.media_type == "application/json"
+    assert response.path == file_ioclient.bucket_path / "a.json"
+
+
+def test_file_list_delete_objects(file_ioclient):
+    for name in ["executions/a/input.json", "executions/b/input.json", "other.json"]:
+        file_ioclient.put_object(name, "{}")
+
+    assert sorted(file_ioclient.list_objects(prefix="/executions")) == [
+        "executions/a/input.json",
+        "executions/b/input.json",
+    ]
+
+    file_ioclient.delete_objects(prefix="executions/")
+    assert list(file_ioclient.list_objects()) == ["other.json"]
+
+
+def test_file_presigned_url_unsupported(file_ioclient):
+    assert not file_ioclient.supports_presigned_urls
+    assert file_ioclient.get_presigned_url("a.json", timedelta(minutes=1)) is None
+
+
+def test_file_bucket(tmp_path):
+    ioclient = FileIOClient("swoop-test", tmp_path)
+    assert ioclient.bucket_exists()
+    ioclient.delete_bucket()
+    assert not ioclient.bucket_exists()
+
+
+def test_hedged_reads(s3_client):
+    ioclient = s3_client.app.state.io
+    ioclient.hedge_reads = True
+    try:
+        result = ioclient.get_object(
+            "/executions/2595f2da-81a6-423c-84db-935e6791046e/input.json"
+        )
+    finally:
+        ioclient.hedge_reads = False
+    assert result is not None
+    assert ioclient.read_stats()["reads"] >= 1
+
+
 def test_hasbucket(test_client):
     assert test_client.app.state.io.bucket_exists() is True
 
@@ -50,6 +274,32 @@ def test_add_object(test_client, single_object):
     assert True
 
 
+def test_add_object_bytes(test_client, single_object):
+    object_name = "/executions/2595f2da-81a6-423c-84db-935e6791046e/bytes.json"
+    test_client.app.state.io.put_object(
+        object_name,
+        json.dumps(single_object).encode("utf-8"),
+    )
+    assert test_client.app.state.io.get_object(object_name) == single_object
+
+
+def test_add_object_stream(test_client, single_object):
+    object_name = "/executions/2595f2da-81a6-423c-84db-935e6791046e/stream.json"
+    test_client.app.state.io.put_object(
+        object_name,
+        io.BytesIO(json.dumps(single_object).encode("utf-8")),
+    )
+    assert test_client.app.state.io.get_object(object_name) == single_object
+
+
+def test_add_object_multipart(s3_client):
+    object_name = "/executions/2595f2da-81a6-423c-84db-935e6791046e/large.json"
+    ioclient = s3_client.app.state.io
+    content = json.dumps({"payload": "x" * (ioclient.upload_part_size + 1024)})
+    ioclient.put_object(object_name, content)
+    assert ioclient.get_object(object_name) == json.loads(content)
+
+
 def test_remove_object(test_client):
     test_client.app.state.io.delete_object(
         "/executions/2595f2da-81a6-423c-84db-935e6791046e/io.json"
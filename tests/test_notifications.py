@@ -0,0 +1,66 @@
+from datetime import UTC, datetime
+from uuid import UUID
+
+from swoop.api.models.jobs import JobSortBy
+from swoop.api.notifications import JobEventHub, Subscription
+from swoop.api.queries.jobs import JobCursor, JobFilter
+
+a_cursor = JobCursor(
+    sortby=JobSortBy.updated,
+    value=datetime(2023, 4, 28, 15, 49, tzinfo=UTC),
+    action_uuid=UUID(int=0),
+)
+a_record = {
+    "action_name": "action_1",
+    "handler_type": "argo-workflow",
+    "action_uuid": UUID("0187c88d-a9e0-788c-adcb-c0b951f8be91"),
+    "status": "RUNNING",
+}
+
+
+def test_subscription_matches():
+    assert Subscription(JobFilter(), a_cursor, 1).matches(a_record)
+    assert Subscription(
+        JobFilter(processes=["action_1"], statuses=["RUNNING", "QUEUED"]),
+        a_cursor,
+        1,
+    ).matches(a_record)
+    assert not Subscription(
+        JobFilter(jobs=[UUID(int=1)]),
+        a_cursor,
+        1,
+    ).matches(a_record)
+    assert not Subscription(
+        JobFilter(swoop_statuses=["SUCCESSFUL"]),
+        a_cursor,
+        1,
+    ).matches(a_record)
+
+
+def test_subscription_overflow():
+    subscription = Subscription(JobFilter(), a_cursor, 2)
+    for _ in range(3):
+        subscription.publish(a_record)
+    assert subscription.overflowed
+    assert subscription.queue.qsize() == 2
+
+    subscription.reset()
+    assert not subscription.overflowed
+    assert subscription.queue.empty()
+
+
+def test_hub_indexes_subscribers_by_job():
+    hub = JobEventHub(None, channel="events", poll_interval=1, queue_size=1)
+    everything = Subscription(JobFilter(), a_cursor, 1)
+    this_job = Subscription(JobFilter(jobs=[a_record["action_uuid"]]), a_cursor, 1)
+    other_job = Subscription(JobFilter(jobs=[UUID(int=1)]), a_cursor, 1)
+    for subscription in [everything, this_job, other_job]:
+        hub._add(subscription)
+
+    assert set(hub.subscribers_for(a_record)) == {everything, this_job}
+    assert hub.stats()["subscribers"] == 3
+
+    hub.unsubscribe(this_job)
+    hub.unsubscribe(other_job)
+    assert set(hub.subscribers_for(a_record)) == {everything}
+    assert hub._by_job == {}
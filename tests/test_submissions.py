@@ -0,0 +1,186 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import Mock
+from uuid import UUID
+
+import pytest
+
+from swoop.api import submissions
+from swoop.api.submissions import (
+    SingleFlight,
+    SubmissionQueue,
+    legacy_payload_lock_key,
+    lock_payloads_query,
+    payload_lock_key,
+    submit_workflow_query,
+)
+
+a_uuid = UUID("ade69fe7-1d7d-572e-9f36-7242cc2aca77")
+
+
+def test_payload_lock_key_is_signed_bigint():
+    key = payload_lock_key(a_uuid)
+    assert -(2**63) <= key < 2**63
+    assert payload_lock_key(a_uuid) == key
+    assert payload_lock_key(UUID(int=2**127)) == -(2**63)
+
+
+def test_payload_lock_key_uses_full_uuid():
+    # these collided on the previous 16-bit lock id
+    other = UUID("bde69fe7-1d7d-572e-9f36-7242cc2aca77")
+    assert legacy_payload_lock_key(a_uuid) == legacy_payload_lock_key(other)
+    assert payload_lock_key(a_uuid) != payload_lock_key(other)
+
+
+def test_submit_workflow_query_binds_each_value_once():
+    workflow = Mock(
+        id="mirror",
+        version=2,
+        handler="argo-workflow",
+        handlerType="argoWorkflow",
+    )
+    q, p = submit_workflow_query(workflow, a_uuid)
+    assert p == [
+        None,
+        payload_lock_key(a_uuid),
+        a_uuid,
+        2,
+        "mirror",
+        "argo-workflow",
+        "argoWorkflow",
+    ]
+    # the locks must be taken before the cache lookup
+    assert q.index("FROM legacy_locked") < q.index("FROM locked")
+    assert q.index("FROM locked") < q.index("FROM cached")
+
+    q, p = submit_workflow_query(workflow, a_uuid, legacy_lock=True)
+    assert p[:2] == [legacy_payload_lock_key(a_uuid), payload_lock_key(a_uuid)]
+
+
+def test_lock_payloads_query_sorts_distinct_keys():
+    other = UUID("bde69fe7-1d7d-572e-9f36-7242cc2aca77")
+    q, p = lock_payloads_query([other, a_uuid, other])
+    assert p == [[], sorted({payload_lock_key(a_uuid), payload_lock_key(other)})]
+    # unnest alone does not guarantee the order locks are taken in
+    assert q.count("ORDER BY key") == 2
+
+    q, p = lock_payloads_query([other, a_uuid, other], legacy_locks=True)
+    assert p[0] == [legacy_payload_lock_key(a_uuid)]
+
+
+class FakePool:
+    @asynccontextmanager
+    async def acquire(self):
+        yield None
+
+
+@pytest.mark.asyncio
+async def test_submission_queue_coalesces_window(monkeypatch):
+    batches = []
+
+    async def submit_payloads(
+        conn, io, workflow, payloads, upload_concurrency, legacy_locks
+    ):
+        batches.append(list(payloads))
+        return {
+            payload_uuid: ({"action_uuid": UUID(int=i)}, False)
+            for i, payload_uuid in enumerate(payloads)
+        }
+
+    commits = []
+
+    async def after_commit(conn):
+        commits.append(len(batches))
+
+    monkeypatch.setattr(submissions, "submit_payloads", submit_payloads)
+    queue = SubmissionQueue(
+        FakePool(),
+        None,
+        delay=0.01,
+        max_batch=10,
+        upload_concurrency=1,
+        after_commit=after_commit,
+    )
+    workflow = Mock(id="mirror")
+    other = UUID("bde69fe7-1d7d-572e-9f36-7242cc2aca77")
+
+    results = await asyncio.gather(
+        queue.submit(workflow, {}, a_uuid),
+        queue.submit(workflow, {}, other),
+        queue.submit(workflow, {}, a_uuid),
+    )
+
+    assert batches == [[a_uuid, other]]
+    assert commits == [1]
+    # only the first submission of a payload gets the new job
+    assert [cached for _, cached in results] == [False, False, True]
+    assert results[0][0] is results[2][0]
+    assert queue.stats() == {
+        "submissions": 3,
+        "batches": 1,
+        "payloads": 2,
+        "pending": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_submission_queue_max_batch_and_errors(monkeypatch):
+    async def submit_payloads(
+        conn, io, workflow, payloads, upload_concurrency, legacy_locks
+    ):
+        raise OSError("storage unavailable")
+
+    monkeypatch.setattr(submissions, "submit_payloads", submit_payloads)
+    queue = SubmissionQueue(
+        FakePool(), None, delay=60, max_batch=1, upload_concurrency=1
+    )
+
+    with pytest.raises(OSError):
+        await queue.submit(Mock(id="mirror"), {}, a_uuid)
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_outcome():
+    flights = SingleFlight()
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    async def submit():
+        calls.append(1)
+        started.set()
+        await release.wait()
+        return "job"
+
+    leader = asyncio.create_task(flights.do(a_uuid, submit))
+    await started.wait()
+    follower = asyncio.create_task(flights.do(a_uuid, submit))
+    await asyncio.sleep(0)
+    # a cancelled leader does not cancel the call for its followers
+    leader.cancel()
+    release.set()
+
+    assert await follower == ("job", True)
+    assert len(calls) == 1
+    assert flights.stats() == {"calls": 2, "shared": 1, "in_flight": 0}
+
+    # once done, the next call runs again
+    assert await flights.do(a_uuid, submit) == ("job", False)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors():
+    flights = SingleFlight()
+
+    async def submit():
+        await asyncio.sleep(0)
+        raise OSError("storage unavailable")
+
+    results = await asyncio.gather(
+        flights.do(a_uuid, submit),
+        flights.do(a_uuid, submit),
+        return_exceptions=True,
+    )
+    assert all(isinstance(r, OSError) for r in results)
@@ -0,0 +1,44 @@
+import time
+
+from swoop.api.ttlcache import MISSING, TTLCache
+
+
+def test_ttlcache_get_set():
+    cache = TTLCache(ttl=60)
+    assert cache.get("a") is MISSING
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_ttlcache_expiry():
+    cache = TTLCache(ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is MISSING
+    assert len(cache) == 0
+
+
+def test_ttlcache_disabled():
+    cache = TTLCache(ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is MISSING
+
+
+def test_ttlcache_evicts_least_recently_used():
+    cache = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttlcache_pop():
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+    cache.pop("a")
+    cache.pop("b")
+    assert cache.get("a") is MISSING